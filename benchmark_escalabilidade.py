@@ -0,0 +1,363 @@
+import argparse
+import csv
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# ======================================================
+# Benchmark de escalabilidade das implementações do determinante
+# ======================================================
+
+# ======================================================================================================================================
+# Gera matrizes de dimensão, número de condição e estrutura configuráveis, executa cada implementação (via mpiexec, como um
+# usuário faria) variando a quantidade de processos e compara tempo e resultado com np.linalg.slogdet.
+#
+# Escalabilidade forte: N fixo, p variando. speedup(p) = T(p0) / T(p) e eficiência = speedup * p0 / p, com p0 a menor
+#                       quantidade de processos medida.
+# Escalabilidade fraca: N cresce com p de forma que o trabalho por processo (N³ / p) fique constante, N(p) = N0 * (p / p0)^(1/3).
+#                       eficiência = T(p0) / T(p).
+#
+# O tempo usado nas curvas é o tempo de cálculo informado pela própria implementação ("Tempo total de paralelismo", "Tempo de
+# execução" ou o campo "tempo" do JSON). Uma execução que não informa esse tempo fica só com o tempo de parede (coluna
+# tempo_parede, que inclui o início do interpretador e do mpiexec) e fora das curvas, que comparariam grandezas diferentes.
+# A precisão é medida por |log|det| - log|det|_numpy| (≈ erro relativo de |det|) e pela concordância do sinal; o resultado de
+# determinante_paralelo.py é lido do JSON (--json), com precisão completa, e não do texto impresso com 6 casas.
+#
+# As matrizes são normalizadas para |det(M)| = 10^6, de forma que as implementações que imprimem det(M) com duas casas
+# decimais (e não em log) também possam ser comparadas.
+#
+# Com `paralelo` e `paralelo_mista` (--precisao mista) na mesma execução, o speedup da precisão mista é T(paralelo) /
+# T(paralelo_mista) para cada (modo, N, p) medido nas duas, junto com a precisão efetivamente usada (a mista pode ser recusada).
+#
+# Saída: <saida>.csv (uma linha por execução) e <saida>.json (configuração, execuções, curvas de speedup/eficiência e
+# comparação das precisões).
+# ======================================================================================================================================
+
+# Exec: python benchmark_escalabilidade.py --tamanhos 512 1024 --processos 1 2 4 --modo ambos --saida resultados
+# Exec: python benchmark_escalabilidade.py --estrutura bloco_singular --condicao 1e8 --implementacoes paralelo simples
+# Exec: python benchmark_escalabilidade.py --tamanhos 2000 --estrutura simetrica --implementacoes paralelo paralelo_mista
+
+ESTRUTURAS = ("densa", "simetrica", "diagonal_dominante", "triangular", "bloco_singular")
+LOG_DET_ALVO = 6 * np.log(10)
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Saídas reconhecidas de cada script
+_RE_TEMPO = re.compile(r"(?:Tempo total de paralelismo|Tempo de execução): ([\d.]+) segundos")
+_NUMERO = r"(-?inf|nan|-?[\d.]+(?:e[+-]?\d+)?)"
+
+# nome -> (script, opções, lê --entrada, regex do det(M) impresso (None: resultado lido do JSON gravado com --json), execução)
+# execução: "mpi" (mpiexec -n p), "serial" (um processo, só com a menor quantidade de processos) ou "nucleos" (um processo
+# com p trabalhadores em memória compartilhada, --trabalhadores p)
+IMPLEMENTACOES = {
+    "paralelo": ("determinante_paralelo.py", ["--logdet"], True, None, "mpi"),
+    "paralelo_dinamico": ("determinante_paralelo.py", ["--logdet", "--dinamico"], True, None, "mpi"),
+    "paralelo_2d": ("determinante_paralelo.py", ["--logdet", "--grade2d"], True, None, "mpi"),
+    "paralelo_recursivo": ("determinante_paralelo.py", ["--logdet", "--recursivo"], True, None, "mpi"),
+    "paralelo_mista": ("determinante_paralelo.py", ["--logdet", "--precisao", "mista"], True, None, "mpi"),
+    "simples": ("determinante_paralelo_simples.py", [], True, re.compile(r"det\(M\) = (?:[^\n]* = )?" + _NUMERO), "mpi"),
+    "falha": ("falha_schur_mpi.py", [], False, re.compile(r"det\(M\) pela f\S+rmula de Schur = " + _NUMERO), "mpi"),
+    "memoria_threads": ("determinante_paralelo.py", ["--logdet", "--backend", "threads"], True, None, "nucleos"),
+    "memoria_processos": ("determinante_paralelo.py", ["--logdet", "--backend", "processos"], True, None, "nucleos"),
+    "laplace": ("determinante_laplace.py", ["--metodo", "laplace"], False, re.compile(r"Resultado do Determinante: " + _NUMERO), "serial"),
+    "bitmask": ("determinante_laplace.py", ["--metodo", "bitmask"], False, re.compile(r"Resultado do Determinante: " + _NUMERO), "serial"),
+    "bareiss": ("determinante_laplace.py", ["--metodo", "bareiss"], False, re.compile(r"Resultado do Determinante: " + _NUMERO), "serial"),
+}
+MAX_BITMASK = 18
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Benchmark de escalabilidade (forte e fraca) das implementacoes do determinante.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[256, 512],
+                        help="dimensoes N das matrizes (na escalabilidade fraca, N com a menor quantidade de processos)")
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4],
+                        help="quantidades de processos MPI (padrao: 1 2 4)")
+    parser.add_argument("--modo", choices=("forte", "fraco", "ambos"), default="forte",
+                        help="escalabilidade forte (N fixo), fraca (N^3/p fixo) ou ambas (padrao: forte)")
+    parser.add_argument("--implementacoes", nargs="+", choices=sorted(IMPLEMENTACOES),
+                        default=["paralelo", "paralelo_recursivo", "simples", "falha", "laplace", "bareiss"],
+                        help="implementacoes comparadas")
+    parser.add_argument("--estrutura", choices=ESTRUTURAS, default="densa",
+                        help="estrutura das matrizes geradas (padrao: densa)")
+    parser.add_argument("--condicao", type=float, default=1e3,
+                        help="numero de condicao das matrizes geradas (padrao: 1e3)")
+    parser.add_argument("--repeticoes", type=int, default=3,
+                        help="execucoes por configuracao; o menor tempo eh reportado (padrao: 3)")
+    parser.add_argument("--max-laplace", type=int, default=8,
+                        help="maior N executado pela expansao de Laplace, de custo O(N!) (padrao: 8)")
+    parser.add_argument("--max-bareiss", type=int, default=128,
+                        help="maior N executado pela eliminacao de Bareiss exata (racional para matrizes nao inteiras) (padrao: 128)")
+    parser.add_argument("--tolerancia", type=float, default=1e-6,
+                        help="erro maximo em log|det| para considerar o resultado preciso (padrao: 1e-6)")
+    parser.add_argument("--semente", type=int, default=0, help="semente do gerador de matrizes (padrao: 0)")
+    parser.add_argument("--mpiexec", default="mpiexec",
+                        help="comando do mpiexec, com opcoes extras (ex.: 'mpiexec --oversubscribe')")
+    parser.add_argument("--timeout", type=float, default=600, help="tempo maximo por execucao em segundos (padrao: 600)")
+    parser.add_argument("--saida", default="benchmark", help="prefixo dos arquivos .csv e .json de resultados (padrao: benchmark)")
+    return parser.parse_args()
+
+
+def gerar_matriz(n, condicao=1e3, estrutura="densa", semente=0):
+    """
+    Matriz N x N com número de condição aproximadamente `condicao` e |det| = 10^6.
+
+    densa              - U diag(s) Vᵀ, com U e V ortogonais aleatórias e s em progressão geométrica de 1 a 1/condicao
+    simetrica          - Q diag(s) Qᵀ (simétrica positiva definida)
+    diagonal_dominante - aleatória com diagonal dominante (bem condicionada; `condicao` é ignorado)
+    triangular         - triangular superior com diagonal s (o condicionamento real pode ser maior)
+    bloco_singular     - densa com a primeira coluna do bloco líder A zerada (A singular, M não singular),
+                         que exercita o pivotamento em bloco
+    """
+    rng = np.random.default_rng(semente)
+    s = np.geomspace(1.0, 1.0 / condicao, n)
+
+    if estrutura == "diagonal_dominante":
+        M = rng.uniform(-1, 1, (n, n)) + n * np.eye(n)
+    elif estrutura == "triangular":
+        M = np.triu(rng.uniform(-1, 1, (n, n)), 1) * s[0] / n + np.diag(s)
+    else:
+        U, _ = np.linalg.qr(rng.standard_normal((n, n)))
+        V = U if estrutura == "simetrica" else np.linalg.qr(rng.standard_normal((n, n)))[0]
+        M = (U * s) @ V.T
+        if estrutura == "bloco_singular":
+            M[:n // 2, 0] = 0.0
+
+    # |det(M)| = 10^6: escala por um fator c, det(cM) = c^n det(M)
+    _, logabs = np.linalg.slogdet(M)
+    return M * np.exp((LOG_DET_ALVO - logabs) / n)
+
+
+def salvar_matriz(M, diretorio):
+    """Grava M em .npy (para --entrada) e em matriz.txt (scripts que leem matriz.txt do diretório atual)."""
+    caminho_npy = os.path.join(diretorio, "matriz.npy")
+    np.save(caminho_npy, M)
+    np.savetxt(os.path.join(diretorio, "matriz.txt"), M, fmt="%.17g")
+    return caminho_npy
+
+
+def interpretar_json(caminho):
+    """(sinal, log|det|, tempo informado, precisão usada) a partir do JSON gravado por determinante_paralelo.py --json."""
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            resultado = json.load(arquivo)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"resultado JSON nao encontrado: {e}")
+    logabs = resultado["log_abs_det"]
+    return (float(resultado["sinal"]), (-np.inf if logabs is None else float(logabs)), resultado.get("tempo"),
+            resultado.get("precisao"))
+
+
+def interpretar_saida(texto, regex_det):
+    """(sinal, log|det|, tempo informado) a partir da saída impressa por uma implementação."""
+    tempo = _RE_TEMPO.search(texto)
+    tempo = float(tempo.group(1)) if tempo else None
+
+    if "ENCERRAMENTO ANTECIPADO" in texto:
+        return 0.0, -np.inf, tempo
+
+    det = regex_det.search(texto)
+    if det is None:
+        raise ValueError("det(M) nao encontrado na saida")
+    det = float(det.group(1))
+    if det == 0 or not np.isfinite(det):
+        return (0.0 if det == 0 else np.sign(det)), (-np.inf if det == 0 else np.inf), tempo
+    return float(np.sign(det)), float(np.log(abs(det))), tempo
+
+
+def executar(nome, p, caminho_npy, diretorio, args):
+    """
+    Executa a implementação `nome` com `p` processos; retorna (sinal, log|det|, tempo de cálculo, tempo de parede, precisão),
+    com tempo de cálculo None se a implementação não o informar e precisão None fora de determinante_paralelo.py.
+    """
+    script, opcoes, le_entrada, regex_det, execucao = IMPLEMENTACOES[nome]
+    comando = [sys.executable, os.path.join(DIRETORIO, script)] + opcoes
+    caminho_json = os.path.join(diretorio, "resultado.json")
+    if regex_det is None:
+        if os.path.exists(caminho_json):
+            os.remove(caminho_json)
+        comando += ["--json", caminho_json]
+    if le_entrada:
+        comando += ["--entrada", caminho_npy]
+    if execucao == "nucleos":
+        comando += ["--trabalhadores", str(p)]
+    elif execucao == "mpi":
+        comando = shlex.split(args.mpiexec) + ["-n", str(p)] + comando
+
+    inicio = time.perf_counter()
+    processo = subprocess.run(comando, cwd=diretorio, capture_output=True, text=True, encoding="utf-8",
+                              errors="replace", timeout=args.timeout)
+    parede = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(f"codigo de saida {processo.returncode}: {processo.stderr.strip()[-300:]}")
+
+    precisao = None
+    if regex_det is None:
+        sinal, logabs, tempo, precisao = interpretar_json(caminho_json)
+    else:
+        sinal, logabs, tempo = interpretar_saida(processo.stdout, regex_det)
+    return sinal, logabs, tempo, parede, precisao
+
+
+def motivo_para_ignorar(nome, n, p, args):
+    if IMPLEMENTACOES[nome][4] == "serial" and p != min(args.processos):
+        return "serial (executada apenas com a menor quantidade de processos)"
+    if nome == "laplace" and n > args.max_laplace:
+        return f"N > --max-laplace ({args.max_laplace})"
+    if nome == "bitmask" and n > MAX_BITMASK:
+        return f"N > {MAX_BITMASK} (custo O(N 2^N))"
+    if nome == "bareiss" and n > args.max_bareiss:
+        return f"N > --max-bareiss ({args.max_bareiss})"
+    if nome == "falha" and n % 2:
+        return "exige N par"
+    return None
+
+
+def configuracoes(args):
+    """(modo, N, p) de todas as execuções do benchmark."""
+    processos = sorted(set(args.processos))
+    p0 = processos[0]
+    modos = ("forte", "fraco") if args.modo == "ambos" else (args.modo,)
+    for modo in modos:
+        for n0 in args.tamanhos:
+            for p in processos:
+                n = n0 if modo == "forte" else max(2, int(round(n0 * (p / p0) ** (1 / 3))))
+                yield modo, n0, n, p
+
+
+def calcular_curvas(execucoes):
+    """Speedup e eficiência por (implementação, modo, N base), relativos à menor quantidade de processos medida."""
+    grupos = {}
+    for e in execucoes:
+        if e["status"] == "ok" and e["tempo"] is not None:
+            grupos.setdefault((e["implementacao"], e["modo"], e["n_base"]), []).append(e)
+
+    curvas = []
+    for (nome, modo, n_base), pontos in sorted(grupos.items()):
+        pontos.sort(key=lambda e: e["processos"])
+        base = pontos[0]
+        serie = []
+        for e in pontos:
+            speedup = base["tempo"] / e["tempo"] if e["tempo"] > 0 else float("nan")
+            if modo == "forte":
+                eficiencia = speedup * base["processos"] / e["processos"]
+            else:
+                eficiencia = speedup
+            e["speedup"], e["eficiencia"] = speedup, eficiencia
+            serie.append({"processos": e["processos"], "n": e["n"], "tempo": e["tempo"],
+                          "speedup": speedup, "eficiencia": eficiencia})
+        curvas.append({"implementacao": nome, "modo": modo, "n_base": n_base, "pontos": serie})
+    return curvas
+
+
+def comparar_precisoes(execucoes):
+    """Speedup da precisão mista, T(paralelo) / T(paralelo_mista), para cada (modo, N, p) medido nas duas implementações."""
+    dupla = {(e["modo"], e["n"], e["processos"]): e for e in execucoes
+             if e["implementacao"] == "paralelo" and e["status"] == "ok" and e["tempo"] is not None}
+    comparacoes = []
+    for e in execucoes:
+        base = dupla.get((e["modo"], e["n"], e["processos"]))
+        if e["implementacao"] != "paralelo_mista" or e["status"] != "ok" or e["tempo"] is None or base is None:
+            continue
+        e["speedup_mista"] = base["tempo"] / e["tempo"] if e["tempo"] > 0 else float("nan")
+        comparacoes.append({"modo": e["modo"], "n": e["n"], "processos": e["processos"], "tempo_dupla": base["tempo"],
+                            "tempo_mista": e["tempo"], "speedup": e["speedup_mista"], "precisao": e["precisao"],
+                            "erro_logdet_dupla": base["erro_logdet"], "erro_logdet_mista": e["erro_logdet"]})
+    return comparacoes
+
+
+COLUNAS_CSV = ("implementacao", "modo", "n_base", "n", "processos", "status", "tempo", "tempo_parede", "tempo_numpy",
+               "speedup", "eficiencia", "sinal", "logabs", "sinal_numpy", "logabs_numpy", "erro_logdet", "preciso",
+               "precisao", "speedup_mista")
+
+
+def salvar_resultados(prefixo, config, execucoes, curvas, comparacoes):
+    with open(prefixo + ".csv", "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_CSV, extrasaction="ignore")
+        escritor.writeheader()
+        escritor.writerows(execucoes)
+    with open(prefixo + ".json", "w", encoding="utf-8") as arquivo:
+        json.dump({"configuracao": config, "execucoes": execucoes, "curvas": curvas, "precisao_mista": comparacoes}, arquivo,
+                  indent=2, default=float)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except TypeError:
+        pass
+
+    execucoes = []
+    matrizes = {}
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_det_") as diretorio:
+        print(f"{'implementacao':<20}{'modo':<7}{'N':>7}{'p':>4}{'tempo (s)':>12}{'numpy (s)':>12}{'erro log|det|':>15}  status")
+        for modo, n_base, n, p in configuracoes(args):
+            # Matriz (e referência do numpy) gerada uma vez por dimensão
+            if n not in matrizes:
+                M = gerar_matriz(n, args.condicao, args.estrutura, args.semente)
+                inicio = time.perf_counter()
+                sinal_np, log_np = np.linalg.slogdet(M)
+                matrizes[n] = (M, float(sinal_np), float(log_np), time.perf_counter() - inicio)
+            M, sinal_np, log_np, tempo_np = matrizes[n]
+            caminho_npy = salvar_matriz(M, diretorio)
+
+            for nome in args.implementacoes:
+                registro = {"implementacao": nome, "modo": modo, "n_base": n_base, "n": n, "processos": p,
+                            "tempo_numpy": tempo_np, "sinal_numpy": sinal_np, "logabs_numpy": log_np}
+                motivo = motivo_para_ignorar(nome, n, p, args)
+                if motivo:
+                    registro["status"] = f"ignorado: {motivo}"
+                    execucoes.append(registro)
+                    continue
+
+                tempos = []
+                try:
+                    for _ in range(max(1, args.repeticoes)):
+                        sinal, logabs, tempo, parede, precisao = executar(nome, p, caminho_npy, diretorio, args)
+                        tempos.append((tempo, parede))
+                except (RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+                    registro["status"] = f"erro: {e}"
+                    print(f"{nome:<20}{modo:<7}{n:>7}{p:>4}  ERRO: {e}")
+                    execucoes.append(registro)
+                    continue
+
+                # Menor tempo de cálculo; sem ele, o menor tempo de parede
+                tempo, parede = min(tempos, key=lambda t: (t[0] is None, t[0] if t[0] is not None else t[1]))
+                erro = abs(logabs - log_np) if sinal != 0 else float("inf")
+                registro.update({"status": "ok", "tempo": tempo, "tempo_parede": parede, "sinal": sinal,
+                                 "logabs": logabs, "erro_logdet": erro, "precisao": precisao,
+                                 "preciso": bool(sinal == sinal_np and erro <= args.tolerancia)})
+                execucoes.append(registro)
+                coluna_tempo = f"{tempo:>12.6f}" if tempo is not None else f"{parede:>11.6f}*"
+                print(f"{nome:<20}{modo:<7}{n:>7}{p:>4}{coluna_tempo}{tempo_np:>12.6f}{erro:>15.2e}  "
+                      f"{'ok' if registro['preciso'] else 'IMPRECISO'}")
+
+    curvas = calcular_curvas(execucoes)
+    comparacoes = comparar_precisoes(execucoes)
+    config = {k: v for k, v in vars(args).items()}
+    salvar_resultados(args.saida, config, execucoes, curvas, comparacoes)
+
+    if any(e["status"] == "ok" and e["tempo"] is None for e in execucoes):
+        print("* tempo de parede (a implementacao nao informa o tempo de calculo); fora das curvas de speedup.")
+    print("------------------------------------------------------------------------------------")
+    print(f"{'implementacao':<20}{'modo':<7}{'N base':>7}   speedup / eficiencia por processos")
+    for curva in curvas:
+        pontos = "  ".join(f"p={c['processos']}: {c['speedup']:.2f}/{c['eficiencia']:.2f}" for c in curva["pontos"])
+        print(f"{curva['implementacao']:<20}{curva['modo']:<7}{curva['n_base']:>7}   {pontos}")
+    print("------------------------------------------------------------------------------------")
+    if comparacoes:
+        print("Precisao mista: speedup = tempo de paralelo / tempo de paralelo_mista")
+        print(f"{'modo':<7}{'N':>7}{'p':>4}{'dupla (s)':>12}{'mista (s)':>12}{'speedup':>9}{'erro log|det|':>15}  precisao usada")
+        for c in comparacoes:
+            print(f"{c['modo']:<7}{c['n']:>7}{c['processos']:>4}{c['tempo_dupla']:>12.6f}{c['tempo_mista']:>12.6f}"
+                  f"{c['speedup']:>9.2f}{c['erro_logdet_mista']:>15.2e}  {c['precisao']}")
+        print("------------------------------------------------------------------------------------")
+    print(f"Resultados gravados em '{args.saida}.csv' e '{args.saida}.json'.")
@@ -1,5 +1,39 @@
+import argparse
 import numpy as np
 import time
+from fractions import Fraction
+
+from leitura_matriz import carregar_matriz
+
+try:
+    import flint
+except ImportError:  # python-flint é opcional: sem ele o Bareiss de matrizes inteiras roda em inteiros do Python (mais lento)
+    flint = None
+
+# ======================================================
+# Referências seriais independentes para o determinante
+# ======================================================
+
+# ======================================================================================================================================
+# laplace - expansão de Laplace recursiva pela primeira linha, O(n!). Mantida como referência didática (n <= ~10).
+# bitmask - expansão de Laplace com memorização dos menores: o menor formado pelas primeiras |S| linhas e pelas colunas do
+#           conjunto S (máscara de bits) é calculado uma única vez, O(n * 2^n). Exato para matrizes inteiras (n <= ~20).
+# bareiss - eliminação de Bareiss (sem frações): todas as divisões são exatas, então com inteiros do Python o resultado é o
+#           determinante exato, O(n³) operações com inteiros de tamanho limitado por Hadamard. Para matrizes não inteiras usa
+#           Fraction (resultado racional exato dos valores float64). Os inteiros crescem até ~n·log(n·max|M|) bits, então o tempo
+#           cresce mais rápido que n³: ~3 s para n = 200 e ~20 s para n = 300 (elementos de um dígito). Com python-flint instalado,
+#           matrizes inteiras usam fmpz_mat.det() do FLINT (exato, em C): ~0,6 s para n = 500. Sem ele, acima de n ~ 300 a
+#           referência exata é o modo --exato de determinante_paralelo.py (aritmética modular distribuída).
+#
+# Os três métodos usam a mesma leitura (carregar_matriz, formatos txt/npy/bin).
+# ======================================================================================================================================
+
+# Exec: python determinante_laplace.py                       (Bareiss, exato)
+# Exec: python determinante_laplace.py --metodo laplace      (expansão de Laplace original)
+# Exec: python determinante_laplace.py --metodo bitmask --entrada matriz.npy
+
+METODOS = ("bareiss", "bitmask", "laplace")
+
 
 def determinante_laplace(matrix):
     """
@@ -34,13 +68,115 @@ def determinante_laplace(matrix):
 
     return total
 
+
+def _elementos_exatos(matrix):
+    """Elementos como int do Python (matriz inteira) ou Fraction (valor exato do float64)."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if np.all(matrix == np.round(matrix)):
+        return [[int(v) for v in linha] for linha in matrix]
+    return [[Fraction(float(v)) for v in linha] for linha in matrix]
+
+
+def _como_resultado(valor):
+    """int para resultados inteiros; float para resultados racionais."""
+    if isinstance(valor, Fraction):
+        return int(valor) if valor.denominator == 1 else float(valor)
+    return valor
+
+
+def determinante_bitmask(matrix):
+    """
+    Expansão de Laplace com memorização dos menores sobre máscaras de colunas, O(n * 2^n).
+
+    menor[S] = det das primeiras |S| linhas restritas às colunas de S; expandindo pela última dessas linhas,
+    menor[S] = soma sobre j em S de (-1)^(|S| - 1 + pos(j, S)) * M[|S| - 1, j] * menor[S sem j].
+    """
+    n = matrix.shape[0]
+    if n != matrix.shape[1]:
+        raise ValueError("A matriz de entrada deve ser quadrada.")
+    M = _elementos_exatos(matrix)
+
+    menor = [0] * (1 << n)
+    menor[0] = 1
+    for mascara in range(1, 1 << n):
+        i = bin(mascara).count("1") - 1  # linha expandida: a última das |S| primeiras
+        linha = M[i]
+        total = 0
+        pos = 0  # quantidade de colunas de S menores que j
+        resto = mascara
+        while resto:
+            bit = resto & -resto
+            j = bit.bit_length() - 1
+            anterior = menor[mascara ^ bit]
+            if anterior and linha[j]:
+                termo = linha[j] * anterior
+                total += termo if (i + pos) % 2 == 0 else -termo
+            pos += 1
+            resto ^= bit
+        menor[mascara] = total
+
+    return _como_resultado(menor[(1 << n) - 1])
+
+
+def determinante_bareiss(matrix):
+    """
+    Eliminação de Bareiss (sem frações) com pivotamento por troca de linhas.
+
+    a[i][j] <- (a[i][j] * a[k][k] - a[i][k] * a[k][j]) / a[k-1][k-1], divisão exata; det = ±a[n-1][n-1].
+    As atualizações de cada passo são feitas em arrays NumPy de objetos (inteiros do Python ou Fraction).
+    Matrizes inteiras usam fmpz_mat.det() do python-flint, se estiver instalado (mesmo resultado exato).
+    """
+    n = matrix.shape[0]
+    if n != matrix.shape[1]:
+        raise ValueError("A matriz de entrada deve ser quadrada.")
+    elementos = _elementos_exatos(matrix)
+    inteira = isinstance(elementos[0][0], int)
+    if inteira and flint is not None:
+        return int(flint.fmpz_mat(elementos).det())
+    A = np.empty((n, n), dtype=object)
+    A[:, :] = elementos
+
+    sinal = 1
+    anterior = 1
+    for k in range(n - 1):
+        if A[k, k] == 0:
+            nao_nulos = [i for i in range(k + 1, n) if A[i, k] != 0]
+            if not nao_nulos:
+                return 0
+            r = nao_nulos[0]
+            A[[k, r]] = A[[r, k]]
+            sinal = -sinal
+
+        bloco = A[k + 1:, k + 1:] * A[k, k] - np.outer(A[k + 1:, k], A[k, k + 1:])
+        A[k + 1:, k + 1:] = bloco // anterior if inteira else bloco / anterior
+        anterior = A[k, k]
+
+    return _como_resultado(sinal * A[n - 1, n - 1])
+
+
+CALCULAR = {"laplace": determinante_laplace, "bitmask": determinante_bitmask, "bareiss": determinante_bareiss}
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Determinante serial de referencia (Laplace, Laplace memorizado ou Bareiss).")
+    parser.add_argument("--metodo", choices=METODOS, default="bareiss",
+                        help="bareiss: exato O(n^3); bitmask: Laplace memorizado O(n 2^n); laplace: expansao O(n!) (padrao: bareiss)")
+    parser.add_argument("--entrada", default="matriz.txt",
+                        help="arquivo da matriz: .txt, .npy ou binario float64 .bin/.raw (padrao: matriz.txt)")
+    return parser.parse_args()
+
+
 # --- Bloco Principal de Execução ---
 if __name__ == "__main__":
-    filename = "matriz.txt"
-    print(f"--- Calculando o Determinante pela Forma Convencional (Laplace) ---")
-    
+    args = parse_args()
+    filename = args.entrada
+    nomes = {"laplace": "Forma Convencional (Laplace)", "bitmask": "Laplace Memorizado (mascaras de colunas)",
+             "bareiss": "Eliminacao de Bareiss (exata)"}
+    print(f"--- Calculando o Determinante pela {nomes[args.metodo]} ---")
+
     try:
-        M = np.loadtxt(filename)
+        M = np.asarray(carregar_matriz(filename), dtype=np.float64)
         print(f"Matriz carregada com sucesso do arquivo '{filename}'.\n")
         print("Matriz M (Original):")
         print(M, "\n")
@@ -48,14 +184,14 @@ if __name__ == "__main__":
         print(f"Não foi possível ler o arquivo '{filename}'. Erro: {e}")
         exit()
 
-    # --- Cálculo com a implementação de Laplace ---
+    # --- Cálculo com o método escolhido ---
     print("Calculando...")
     start_time = time.time()
     try:
-        det_laplace = determinante_laplace(M)
+        det_referencia = CALCULAR[args.metodo](M)
         end_time = time.time()
-        print(f"Resultado do Determinante: {det_laplace}")
+        print(f"Resultado do Determinante: {det_referencia}")
         print(f"Tempo de execução: {end_time - start_time:.6f} segundos\n")
     except ValueError as e:
         print(f"Erro: {e}")
-        exit()
\ No newline at end of file
+        exit()
@@ -1,8 +1,34 @@
+import argparse
+import json
+import math
+
+import hibrido
+
+# Threads do BLAS por processo definidas antes do primeiro import do NumPy (ver hibrido.py)
+if __name__ == "__main__":
+    hibrido.configurar_ambiente()
+
 import numpy as np
+import os
 from mpi4py import MPI
 import sys
 import time 
 
+from distribuicao import PRECISOES, calcular_S_pipeline, calcular_T_distribuido, tamanho_bloco
+from distribuicao_2d import calcular_T_summa
+from leitura_matriz import FORMATOS, carregar_matriz, detectar_formato, eh_mapeavel, leitores_de_blocos
+from fatoracao import (LIMIAR_PIVO, combinar_slogdet, corrigir_diagonal_schur, erro_previsto_misto, estimar_condicao_1,
+                       estimar_erro_misto, fatorar_bloco_lider, fatorar_lu_rapido, formatar_slogdet, razao_pivos,
+                       resolver_distribuido, slogdet_com_limiar, slogdet_lu, slogdet_schur_com_limiar)
+from aritmetica_modular import det_exato_distribuido, eh_inteira
+from instrumentacao import exportar_json, fase, imprimir_resumo, instrumentar, reunir
+from memoria_compartilhada import BACKENDS, slogdet_schur_compartilhado
+from servico import servir
+from estimador_logdet import estimar_logdet
+from fora_da_memoria import MB, slogdet_fora_da_memoria
+from estrutura import (FRACAO_BLOCO_PRINCIPAL, analisar_estrutura, descrever_estrutura, eh_esparsa, slogdet_blocos_distribuido,
+                       slogdet_diagonal, slogdet_banda, slogdet_esparsa_distribuido)
+
 # ======================================================
 # Cálculo de determinante de matriz com Schur
 # ======================================================
@@ -11,171 +37,883 @@ import time
 # REQUISITOS:
 # ======================================================
 # Matriz quadrada (N x N) - Fórmula;
-# Determinante de A != 0 - Fórmula;
+# Determinante de A != 0 - Fórmula (senão as linhas de M são permutadas - pivotamento em bloco);
 # A inversivel - Fórmula.
-# N potencia de 2 - Teste;
 # Determinante da matriz != 0 - Teste;
 # ======================================================
 
-# Exec: mpiexec -n 5 python determinante_paralelo.py
+# ======================================================================================================================================
+# REMOVIDO: is_power_of_two() e a exigência de (size - 1) == N/2.
+# A quantidade de processos é livre: as linhas de C são divididas entre todos os processos (inclusive o coordenador) pelo módulo
+# distribuicao.py. Para N ímpar, A tem dimensão N//2 e D tem dimensão N - N//2.
+# ======================================================================================================================================
 
-# Verificar se um número é potência de 2
-def is_power_of_two(n):
-
-    if n <= 0:
-        return False
-    return (n & (n - 1)) == 0
+# Exec: mpiexec -n 4 python determinante_paralelo.py
+# Exec (dinamico): mpiexec -n 4 python determinante_paralelo.py --dinamico --bloco 256
+# Exec (recursivo): mpiexec -n 4 python determinante_paralelo.py --recursivo --corte 64
+# Exec (log-det): mpiexec -n 4 python determinante_paralelo.py --logdet
+# Exec (pipeline): mpiexec -n 4 python determinante_paralelo.py --pipeline --bloco 128
+# Exec (grade 2D): mpiexec -n 6 python determinante_paralelo.py --grade2d --tile 128
+# Exec (binario): python leitura_matriz.py matriz.txt matriz.npy && mpiexec -n 4 python determinante_paralelo.py --entrada matriz.npy
+# Exec (exato): mpiexec -n 4 python determinante_paralelo.py --exato
+# Exec (memoria compartilhada, sem MPI): python determinante_paralelo.py --backend threads --trabalhadores 8
+# Exec (esparsa, requer scipy): mpiexec -n 4 python determinante_paralelo.py --entrada matriz.npz
+# Exec (sem caminhos rapidos): mpiexec -n 4 python determinante_paralelo.py --sem-estrutura
+# Exec (hibrido, 1 processo por no com BLAS multithread): mpiexec -n 2 --map-by ppr:1:node --bind-to none python determinante_paralelo.py --hibrido
+# Exec (servico): mpiexec -n 4 python determinante_paralelo.py --servico unix:/tmp/det.sock   (cliente: python servico.py unix:/tmp/det.sock --entrada matriz.npy)
+# Exec (estimativa, M SPD): mpiexec -n 4 python determinante_paralelo.py --entrada matriz.npy --estimar --sondas 64
+# Exec (fora da memoria): mpiexec -n 4 python determinante_paralelo.py --entrada grande.npy --fora-da-memoria --memoria-max 2048
+# Exec (precisao mista): mpiexec -n 4 python determinante_paralelo.py --entrada matriz.npy --precisao mista
+# Exec (metricas): mpiexec -n 4 python determinante_paralelo.py --instrumentar --metricas metricas.json
 
 def print_matrix(mat, name, precision=2):
     
     with np.printoptions(precision=precision, suppress=True):
         print(f"Matriz {name}:\n{mat}\n")
 
-# --- Inicialização do MPI ---
-comm = MPI.COMM_WORLD
-rank = comm.Get_rank()
-size = comm.Get_size()
+def parse_args(argv=None):
 
-# --- Lógica do Processo Raiz (Coordenador) ---
-if rank == 0:
-    try:
-        sys.stdout.reconfigure(encoding='utf-8')
-    except TypeError:
-        pass
+    parser = argparse.ArgumentParser(description="Determinante paralelo via complemento de Schur (MPI).")
+    parser.add_argument("--entrada", default="matriz.txt",
+                        help="arquivo da matriz: .txt, .npy, binario float64 .bin/.raw ou esparsa .npz (scipy) (padrao: matriz.txt)")
+    parser.add_argument("--formato", choices=FORMATOS, default=None,
+                        help="formato do arquivo de entrada (padrao: deduzido pela extensao)")
+    parser.add_argument("--recursivo", action="store_true",
+                        help="aplica o complemento de Schur recursivamente em S, com todos os processos em cada nivel")
+    parser.add_argument("--corte", type=int, default=64,
+                        help="dimensao do bloco a partir da qual o modo recursivo calcula det() diretamente (padrao: 64)")
+    parser.add_argument("--bloco", type=int, default=0,
+                        help="linhas de C por painel/tarefa; 0 escolhe automaticamente pelo tamanho da cache (padrao: 0)")
+    parser.add_argument("--dinamico", action="store_true",
+                        help="entrega blocos de linhas sob demanda, para que processos mais rapidos calculem mais linhas")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="transferencias nao bloqueantes (Isend/Irecv) com buffers duplos; S = D - T montada na ordem de chegada")
+    parser.add_argument("--grade2d", action="store_true",
+                        help="calcula T = C @ X em grade 2D de processos com tiles bloco-ciclicos (SUMMA)")
+    parser.add_argument("--tile", type=int, default=64,
+                        help="dimensao dos tiles bloco-ciclicos do modo --grade2d (padrao: 64)")
+    parser.add_argument("--precisao", choices=PRECISOES, default="dupla",
+                        help="mista: C, X e T trafegam e sao multiplicados em float32, com A, X e S em float64; usa float64 "
+                             "se kappa_1(A) ou o erro estimado indicarem erro acima de --tolerancia-mista (padrao: dupla)")
+    parser.add_argument("--tolerancia-mista", type=float, default=1e-6,
+                        help="erro maximo estimado em log|det(M)| (erro relativo de det) aceito no modo --precisao mista (padrao: 1e-6)")
+    parser.add_argument("--limiar-singular", type=float, default=LIMIAR_PIVO,
+                        help="trata M como singular se o menor pivo das LU de A e de S (no modo --recursivo, de A em cada "
+                             "nivel e do bloco do caso base) for <= LIMIAR vezes o maior, com ou sem --logdet (padrao: 1e-12; 0: so pivo "
+                             "exatamente nulo)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara o resultado com np.linalg.det(M) sobre a matriz completa (custo O(N^3) serial)")
+    parser.add_argument("--logdet", action="store_true",
+                        help="reporta (sinal, log|det|) em vez de det(M), evitando overflow/underflow para N grande")
+    parser.add_argument("--exato", action="store_true",
+                        help="determinante exato de matriz inteira: det(M) mod primos distintos em cada processo + CRT")
+    parser.add_argument("--estimar", action="store_true",
+                        help="estima log|det(M)| de M simetrica definida positiva (Lanczos estocastico, so produtos M @ V), com intervalo de confianca")
+    parser.add_argument("--sondas", type=int, default=32,
+                        help="vetores de sonda de Rademacher do modo --estimar (padrao: 32)")
+    parser.add_argument("--passos-lanczos", type=int, default=30,
+                        help="iteracoes de Lanczos por sonda no modo --estimar (padrao: 30)")
+    parser.add_argument("--confianca", type=float, default=0.95,
+                        help="nivel do intervalo de confianca do modo --estimar (padrao: 0.95)")
+    parser.add_argument("--semente", type=int, default=0,
+                        help="semente das sondas do modo --estimar (padrao: 0)")
+    parser.add_argument("--fora-da-memoria", action="store_true",
+                        help="entrada .npy/.bin maior que a RAM: le M por tiles e grava X e S em disco, nivel a nivel")
+    parser.add_argument("--memoria-max", type=int, default=1024, metavar="MB",
+                        help="orcamento de memoria por processo no modo --fora-da-memoria, em MB (padrao: 1024)")
+    parser.add_argument("--temporario", default=None, metavar="DIRETORIO",
+                        help="diretorio dos arquivos intermediarios do modo --fora-da-memoria, visivel por todos os processos "
+                             "(padrao: o diretorio temporario do sistema)")
+    parser.add_argument("--backend", choices=BACKENDS, default="mpi",
+                        help="mpi: processos MPI; threads/processos: um unico no com memoria compartilhada, sem MPI (padrao: mpi)")
+    parser.add_argument("--trabalhadores", type=int, default=0,
+                        help="threads ou processos dos backends de memoria compartilhada; 0 usa todos os nucleos (padrao: 0)")
+    parser.add_argument("--sem-estrutura", dest="estrutura", action="store_false",
+                        help="nao procura estrutura (triangular, bloco-triangular, banda, esparsa): sempre o caminho denso")
+    parser.add_argument("--estrutura-mapeada", action="store_true",
+                        help="procura estrutura tambem na entrada mapeada em memoria (.npy/.bin), o que le o arquivo inteiro "
+                             "uma vez; por padrao ela segue direto para o caminho denso")
+    parser.add_argument("--hibrido", action="store_true",
+                        help="poucos processos por no, cada um com BLAS multithread em paineis grandes; imprime o posicionamento")
+    parser.add_argument("--threads-blas", type=int, default=0,
+                        help="threads do BLAS por processo; 0 divide os nucleos do no entre os processos do no (padrao: 0)")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="imprime o tempo por fase e os bytes comunicados por processo, com desbalanceamento e tempo ocioso")
+    parser.add_argument("--metricas", default=None, metavar="ARQUIVO",
+                        help="exporta as metricas por fase e por processo em JSON (implica a instrumentacao)")
+    parser.add_argument("-v", "--verbosidade", action="count", default=1,
+                        help="-v tambem imprime as matrizes intermediarias (M, A, B, C, D, X, T, S); padrao: so as mensagens")
+    parser.add_argument("-q", "--silencioso", dest="verbosidade", action="store_const", const=0,
+                        help="imprime apenas o resultado final")
+    parser.add_argument("--json", default=None, metavar="ARQUIVO",
+                        help="grava o resultado em JSON ('-' para a saida padrao)")
+    parser.add_argument("--servico", default=None, metavar="ENDERECO",
+                        help="mantem os processos ativos e calcula os jobs recebidos em unix:/caminho/do/socket ou em um "
+                             "diretorio de spool (ver servico.py)")
+    return parser.parse_args(argv)
+
+def det_schur_recursivo(M, comm, corte, bloco=0, dinamico=False, limiar=0.0):
+    """
+    Calcula (sinal, log|det(M)|) aplicando o complemento de Schur recursivamente em S.
+
+    Em cada nivel o rank 0 fatora A uma unica vez (fatorar_bloco_lider()) e tira det(A)
+    da diagonal de U; todos os processos de `comm` resolvem X = A⁻¹B com o LU replicado
+    (resolver_distribuido(), colunas de B distribuidas) e T = C @ X (linhas de C
+    distribuidas), e o nivel seguinte repete o processo, com todos os processos, sobre
+    S = D - T, ate que o bloco tenha dimensao <= corte. `bloco` e `dinamico` sao
+    repassados para calcular_T_distribuido(). Os determinantes dos niveis sao acumulados
+    como (sinal, log|det|), como em np.linalg.slogdet, para nao haver overflow/underflow
+    em matrizes grandes. Com `limiar` > 0, M eh tratada como singular se a razao entre o
+    menor e o maior pivo da LU de A de algum nivel, ou da LU do bloco do caso base, for
+    <= limiar (--limiar-singular, ver fatoracao.slogdet_com_limiar()).
+
+    Se A for singular ou mal condicionada em algum nivel (criterio de bem_condicionado()),
+    as linhas de M sao permutadas (pivotamento em bloco, ver escolher_permutacao()),
+    acumulando o sinal da permutacao.
+
+    M so precisa existir no rank 0 de `comm`; o resultado eh retornado apenas nele.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    n = comm.bcast(M.shape[0] if rank == 0 else None, root=0)
+
+    # Caso base: bloco pequeno ou um unico processo
+    if n <= corte or size == 1:
+        if rank != 0:
+            return None
+        with fase("det_S"):
+            return tuple(float(v) for v in slogdet_com_limiar(M, limiar))
+
+    n1 = n // 2
+
+    # 1. Uma unica fatoracao LU de A, no rank 0. A singular ou mal condicionada: as linhas de M sao permutadas
+    #    (pivotamento em bloco) e o novo bloco lider eh aceito como em calcular_schur().
+    singular = False
+    if rank == 0:
+        try:
+            with fase("fatoracao"):
+                perm, trocas_perm, LU_A, piv_A, trocas_A = fatorar_bloco_lider(M, n1)
+            singular = limiar > 0 and razao_pivos(LU_A) <= limiar
+        except np.linalg.LinAlgError:
+            singular = True  # as primeiras n1 colunas de M sao linearmente dependentes: det(M) = 0
+    if comm.bcast(singular, root=0):
+        return (0.0, -np.inf) if rank == 0 else None
 
-    # Verificação inicial do número mínimo de processos
-    if size < 2:
-        print("ERRO: Este programa requer pelo menos 2 processos (1 coordenador e 1+ trabalhadores).", flush=True)
-        comm.Abort()
+    sinalP = 1.0
+    B = C = D = None
+    if rank == 0:
+        if perm is not None:
+            with fase("divisao"):
+                M = M[perm]
+            sinalP = -1.0 if trocas_perm % 2 else 1.0
+        B, C, D = M[:n1, n1:], M[n1:, :n1], M[n1:, n1:]
 
-    print(f"\nExecutando com {size} processos.\n")
+    # 2. X = A⁻¹B (colunas de B distribuidas, LU de A replicado) e T = C @ X (linhas de C distribuidas)
+    X = resolver_distribuido(comm, LU_A if rank == 0 else None, piv_A if rank == 0 else None, B)
+    T = calcular_T_distribuido(comm, C, [X] if rank == 0 else None, bloco, dinamico)
 
-    filename = "matriz.txt"
+    # 3. det(S) = det(D - T) pelo nivel seguinte, com todos os processos
+    S = None
+    if rank == 0:
+        with fase("det_S"):
+            S = D - T
+    slogdet_S = det_schur_recursivo(S, comm, corte, bloco, dinamico, limiar)
+    if rank == 0:
+        return combinar_slogdet((sinalP, 0.0), slogdet_lu(LU_A, trocas_A), slogdet_S)
+    return None
+
+
+def finalizar_metricas(comm, args, inicio):
+    """
+    Reúne as métricas de tempo/bytes de todos os processos e as imprime/exporta no rank 0, onde também as retorna.
+    Operação coletiva: deve ser chamada por todos os processos em todos os caminhos de saída.
+    """
+    if not (args.instrumentar or args.metricas):
+        return None
+    resumo = reunir(comm, time.perf_counter() - inicio)
+    if resumo is None:
+        return None
+    if args.instrumentar:
+        imprimir_resumo(resumo)
+    if args.metricas:
+        exportar_json(resumo, args.metricas)
+        informar(args, f"Metricas exportadas para '{args.metricas}'.")
+    return resumo
+
+def informar(args, texto="", nivel=1):
+    """Imprime `texto` se a verbosidade for pelo menos `nivel` (0: só o resultado, 1: mensagens, 2: matrizes)."""
+    if args.verbosidade >= nivel:
+        print(texto)
+
+def mostrar_matriz(args, mat, name):
+    """As matrizes só são formatadas com verbosidade >= 2: para N grande, imprimi-las custa mais que os GEMMs."""
+    if args.verbosidade >= 2:
+        print_matrix(mat, name)
+
+def resultado_final(sinal, logabs, tempo, **extras):
+    """Dicionário do resultado (serializável em JSON): sinal, log|det|, det(M) quando cabe em float64 e o tempo."""
+    sinal, logabs = float(sinal), float(logabs)
+    finito = sinal != 0 and np.isfinite(logabs)
+    with np.errstate(over="ignore"):
+        det = sinal * np.exp(logabs) if finito else 0.0
+    resultado = {
+        "sinal": sinal,
+        "log_abs_det": logabs if finito else None,
+        "det": float(det) if np.isfinite(det) else None,
+        "det_formatado": formatar_slogdet(sinal, logabs),
+        "singular": sinal == 0,
+        "tempo": tempo,
+    }
+    resultado.update(extras)
+    return resultado
+
+def verificar_numpy(args, M, resultado):
+    """Compara com np.linalg.slogdet/det sobre a matriz completa (opção --verificar)."""
+    with fase("verificacao"):
+        if eh_esparsa(M):
+            M = M.toarray()
+        sinal_np, log_np = np.linalg.slogdet(M)
+        if (args.logdet or args.estimar or args.fora_da_memoria) and not args.exato:
+            informar(args, f"(sinal, log|det(M)|) pelo numpy = ({sinal_np:+.0f}, {log_np:.6f})")
+        else:
+            informar(args, f"det(M) pelo numpy = {np.linalg.det(M)}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado["numpy"] = {"sinal": float(sinal_np), "log_abs_det": float(log_np) if sinal_np != 0 else None}
+
+def validar(M, args):
+    """Mensagem de erro se M não puder ser processada com as opções dadas, ou None."""
+    if M is None or M.ndim != 2 or M.shape[0] != M.shape[1] or M.shape[0] < 2:
+        return "A matriz deve ser quadrada com dimensao (N) de pelo menos 2."
+    if args.exato and not eh_inteira(M):
+        return "O modo --exato exige uma matriz de inteiros (com |elementos| < 2^53)."
+    if args.limiar_singular < 0:
+        return "--limiar-singular deve ser >= 0."
+    if args.grade2d and args.tile < 1:
+        return "O modo --grade2d exige --tile >= 1."
+    if args.estimar and (args.backend != "mpi" or args.exato):
+        return "O modo --estimar usa apenas o backend mpi e nao combina com --exato."
+    if args.precisao == "mista" and (args.backend != "mpi" or args.exato or args.estimar or args.fora_da_memoria
+                                     or args.recursivo or args.pipeline or args.grade2d):
+        return "O modo --precisao mista vale para o caminho padrao do backend mpi (com ou sem --dinamico)."
+    if args.fora_da_memoria and (args.backend != "mpi" or args.exato or args.estimar):
+        return "O modo --fora-da-memoria usa apenas o backend mpi e nao combina com --exato nem --estimar."
+    if args.fora_da_memoria and not eh_mapeavel(detectar_formato(args.entrada, args.formato)):
+        return "O modo --fora-da-memoria exige entrada mapeada em memoria (.npy ou .bin)."
+    if args.fora_da_memoria and args.memoria_max <= 0:
+        return "O modo --fora-da-memoria exige --memoria-max > 0."
+    if args.estimar and (args.sondas < 2 or args.passos_lanczos < 1 or not 0 < args.confianca < 1):
+        return "O modo --estimar exige --sondas >= 2, --passos-lanczos >= 1 e 0 < --confianca < 1."
+    return None
+
+def calcular_memoria_compartilhada(M, args, size):
+    trabalhadores = args.trabalhadores or os.cpu_count() or 1
+    if size > 1:
+        informar(args, f"AVISO: o backend '{args.backend}' usa apenas o rank 0; os demais {size - 1} processos MPI ficam ociosos.\n")
+    informar(args, f"Iniciando calculo em memoria compartilhada ({args.backend}, {trabalhadores} trabalhadores)...")
+    start_time = time.perf_counter()
     try:
-        M = np.loadtxt(filename)
-        print(f"Matriz carregada com sucesso do arquivo '{filename}'.\n")
-    except FileNotFoundError:
-        print(f"ERRO: O arquivo '{filename}' nao foi encontrado.", flush=True)
-        comm.Abort()
-    except Exception as e:
-        print(f"ERRO: Ocorreu um erro ao ler o arquivo '{filename}': {e}", flush=True)
-        comm.Abort()
-    
-    print_matrix(M, "M (Original)")
-    
-    n = M.shape[0]
-    
-    if M.shape[0] != M.shape[1] or not is_power_of_two(n):
-        print("ERRO: A matriz deve ser quadrada e sua dimensao (N) deve ser uma potencia de 2.", flush=True)
-        comm.Abort()
+        sinalM, logM, perm, (sinalP, _), (sinalA, logA), (sinalS, logS) = slogdet_schur_compartilhado(
+            M, args.backend, trabalhadores, args.bloco, args.limiar_singular)
+    except np.linalg.LinAlgError:
+        # As primeiras N/2 colunas de M são linearmente dependentes: det(M) = 0
+        sinalM, logM, perm = 0.0, -np.inf, None
+    elapsed_time = time.perf_counter() - start_time
+
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Resultado Final (backend {args.backend})")
+    if sinalM == 0:
+        informar(args, "det(M) = 0 (matriz singular)")
+    elif args.logdet:
+        informar(args, f"sinal = {sinalP:+.0f} * {sinalA:+.0f} * {sinalS:+.0f} = {sinalM:+.0f}")
+        informar(args, f"log|det(M)| = {logA:.6f} + {logS:.6f} = {logM:.6f}")
+        informar(args, f"det(M) = {formatar_slogdet(sinalM, logM)}")
+    else:
+        informar(args, f"det(M) = {sinalP:+.0f} * {sinalA * np.exp(logA):.2f} * {sinalS * np.exp(logS):.2f} = {sinalM * np.exp(logM):.2f}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(sinalM, logM, elapsed_time, modo=f"memoria_{args.backend}", trabalhadores=trabalhadores,
+                           permutacao=perm is not None)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
 
+def calcular_exato(comm, M, args):
+    informar(args, "Iniciando calculo exato (aritmetica modular + CRT)...")
+    start_time = time.perf_counter()
+    detM, num_primos = det_exato_distribuido(comm, M)
+    elapsed_time = time.perf_counter() - start_time
+
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Resultado Final (exato, {num_primos} primo(s) de 31 bits combinados pelo CRT)")
+    informar(args, f"det(M) = {detM}")
+    informar(args, "------------------------------------------------------------------------------------")
+    sinal = float(np.sign(detM))
+    logabs = math.log(abs(detM)) if detM != 0 else -np.inf
+    resultado = resultado_final(sinal, logabs, elapsed_time, modo="exato", det_exato=str(detM), primos=num_primos)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
+
+def calcular_estimativa(comm, M, args, mapeada=False):
+    informar(args, f"Iniciando estimativa de log|det(M)| (Lanczos estocastico, {args.sondas} sondas x {args.passos_lanczos} passos)...")
+    start_time = time.perf_counter()
+    estimativa = estimar_logdet(comm, M, mapeada, args.sondas, args.passos_lanczos, args.semente, args.confianca)
+    elapsed_time = time.perf_counter() - start_time
+
+    inferior, superior = estimativa["intervalo"]
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, "Resultado Final (estimativa para M simetrica definida positiva)")
+    informar(args, f"log|det(M)| ~ {estimativa['estimativa']:.6f} +- {estimativa['erro_padrao']:.6f} (erro padrao)")
+    informar(args, f"IC {args.confianca:.0%}: [{inferior:.6f}, {superior:.6f}]")
+    informar(args, f"det(M) ~ {formatar_slogdet(1.0, estimativa['estimativa'])}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(1.0, estimativa.pop("estimativa"), elapsed_time, modo="estimativa", **estimativa)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
+
+def calcular_fora_da_memoria(comm, M, args):
+    informar(args, f"Iniciando calculo fora da memoria (orcamento de {args.memoria_max} MB por processo)...")
+    start_time = time.perf_counter()
+    sinalM, logM, niveis = slogdet_fora_da_memoria(comm, M, args.memoria_max * MB, args.temporario)
+    elapsed_time = time.perf_counter() - start_time
+
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Resultado Final (produto de det(A) de {niveis} nivel(is) e det(S) do ultimo nivel)")
+    informar(args, f"det(M) = {formatar_slogdet(sinalM, logM)}" + (f"  (log|det(M)| = {logM:.6f})" if sinalM != 0 else ""))
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(sinalM, logM, elapsed_time, modo="fora_da_memoria", niveis=niveis)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
+
+def calcular_recursivo(comm, M, args):
+    informar(args, f"Iniciando calculo paralelo recursivo (corte = {args.corte})...")
+    start_time = time.perf_counter()
+    sinalM, logM = det_schur_recursivo(M, comm, args.corte, args.bloco, args.dinamico, args.limiar_singular)
+    end_time = time.perf_counter()
+    elapsed_time = end_time - start_time
+
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, "Resultado Final (Schur recursivo)")
+    if args.logdet:
+        informar(args, f"sinal = {sinalM:+.0f}, log|det(M)| = {logM:.6f}")
+        informar(args, f"det(M) = {formatar_slogdet(sinalM, logM)}")
+    else:
+        informar(args, f"det(M) = {sinalM * np.exp(logM):.2f}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(sinalM, logM, elapsed_time, modo="recursivo")
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
+
+def calcular_schur(comm, M, args, mapeada=False):
+    n = M.shape[0]
     n2 = n // 2
+    start_time = time.perf_counter()  # inclui a fatoração de A, como nos demais modos
 
-    # VERIFICAÇÃO DE PROCESSOS EXCEDENTES 
-    num_workers = size - 1
-    if num_workers != n2:
-        print("ERRO: Configuracao de processos invalida para o tamanho do problema.", flush=True)
-        print(f"      A quantidade de trabalhadores ({num_workers}) deve ser igual a dimensao da submatriz ({n2}).", flush=True)
-        print(f"      Por favor, execute novamente com {n2 + 1} processos (mpiexec -n {n2 + 1} ...).", flush=True)
-        comm.Abort()
-
-    # 1. Dividir M em blocos
-    A = M[:n2, :n2]
-    B = M[:n2, n2:]
-    C = M[n2:, :n2]
-    D = M[n2:, n2:]
-
-    print_matrix(A, "A")
-    print_matrix(B, "B")
-    print_matrix(C, "C")
-    print_matrix(D, "D")
-    
-    # 2. Calcular det(A) e A⁻¹
+    # 1. Uma única fatoração LU do bloco líder A: det(A) pela diagonal de U (sem calcular A⁻¹).
+    #    Se A for singular ou mal condicionada, as linhas de M são permutadas (pivotamento em bloco).
     try:
-        detA = np.linalg.det(A)
-        if np.isclose(detA, 0):
-            raise np.linalg.LinAlgError("Matriz A singular")
-        A_inv = np.linalg.inv(A)
-    except np.linalg.LinAlgError as e:
-        print(f"ERRO: A submatriz A eh singular (determinante proximo de zero), impossivel continuar.", flush=True)
-        comm.Abort()
-
-    print(f"det(A) = {detA:.2f}\n")
-    print_matrix(A_inv, "A inversa")
-    
-    print("Iniciando calculo paralelo...")
-    start_time = time.perf_counter()
+        with fase("fatoracao"):
+            perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(M, n2)
+    except np.linalg.LinAlgError:
+        # As primeiras N/2 colunas de M são linearmente dependentes: det(M) = 0
+        comm.bcast((False, None), root=0)
+        informar(args, "---------------------------------------------------------------------------------------------------------")
+        informar(args, "!!! ENCERRAMENTO ANTECIPADO DO CALCULO !!!")
+        informar(args, "Motivo: As primeiras N/2 colunas de M sao linearmente dependentes. Consequentemente, det(M) = 0 (matriz singular).")
+        informar(args, "---------------------------------------------------------------------------------------------------------")
+        return resultado_final(0.0, -np.inf, time.perf_counter() - start_time, modo="schur",
+                               motivo="colunas do bloco lider linearmente dependentes")
+    comm.bcast((True, perm), root=0)
 
-    # 3. Distribuir o cálculo de T
-    rows_to_calculate = np.array_split(np.arange(n2), num_workers)
-    
-    for i in range(num_workers):
-        worker_rank = i + 1
-        indices = rows_to_calculate[i]
-        C_chunk = C[indices, :]
-        comm.send({'c_chunk': C_chunk, 'indices': indices}, dest=worker_rank, tag=1)
-    
-    comm.bcast({'A_inv': A_inv, 'B': B}, root=0)
+    sinalP = -1.0 if trocas_perm % 2 else 1.0
+    M_pivotado = M
+    if perm is not None:
+        with fase("divisao"):
+            M_pivotado = M[perm]
+        informar(args, "A submatriz A eh singular ou mal condicionada: linhas de M permutadas (pivotamento em bloco).")
+        informar(args, f"Permutacao de linhas: {perm.tolist() if n <= 16 else f'{trocas_perm} trocas'} (sinal {sinalP:+.0f})\n")
+
+    # 2. Dividir M (eventualmente permutada) em blocos
+    A = M_pivotado[:n2, :n2]
+    B = M_pivotado[:n2, n2:]
+    C = M_pivotado[n2:, :n2]
+    D = M_pivotado[n2:, n2:]
 
-    # 4. Coletar os resultados
-    T = np.zeros((n2, n2))
-    for i in range(num_workers):
-        worker_rank = i + 1
-        result_data = comm.recv(source=worker_rank, tag=2)
-        T_partial = result_data['t_partial']
-        indices = result_data['indices']
-        T[indices, :] = T_partial
+    mostrar_matriz(args, A, "A")
+    mostrar_matriz(args, B, "B")
+    mostrar_matriz(args, C, "C")
+    mostrar_matriz(args, D, "D")
 
-    print_matrix(T, "T (calculado C @ A inversa @ B)")
+    sinalA, logA = slogdet_lu(LU, trocas)
 
+    if args.logdet:
+        informar(args, f"det(A) = {formatar_slogdet(sinalA, logA)}  (log|det(A)| = {logA:.6f})\n")
+    else:
+        informar(args, f"det(A) = {sinalA * np.exp(logA):.2f}\n")
+
+    informar(args, "Iniciando calculo paralelo...")
+
+    # Matriz mapeada em memória: cada processo lê as próprias colunas de B e linhas de C do arquivo
+    leitor_B = leitor_C = None
+    if mapeada:
+        leitor_B, leitor_C = leitores_de_blocos(M, perm, n2)
+
+    # 3. X = A⁻¹B por substituições triangulares, com as colunas de B divididas entre os processos
+    X = resolver_distribuido(comm, LU, piv, B, leitor_B)
+    mostrar_matriz(args, X, "X (A inversa @ B)")
+
+    # Precisão mista: antes de qualquer trabalho em float32, κ₁(A) (estimador de Hager-Higham com o LU de A) decide se
+    # T̃ = C X em float32 tem chance de atingir a tolerância (fatoracao.erro_previsto_misto); senão T é calculada em float64.
+    precisao = args.precisao
+    condicao_A = erro_estimado = None
+    if args.precisao == "mista":
+        with fase("verificacao"):
+            condicao_A = estimar_condicao_1(A, LU, piv)
+        if erro_previsto_misto(condicao_A) > args.tolerancia_mista:
+            precisao = "dupla (A mal condicionada)"
+        informar(args, f"Precisao mista: kappa_1(A) ~ {condicao_A:.2e}" +
+                       ("" if precisao == "mista" else " -> T calculada direto em float64"))
+
+    # 4. Distribuir o cálculo de T = C @ X entre todos os processos (inclusive este) e coletar os resultados
     # 5. Calcular o Complemento de Schur e verificar
-    S = D - T
-    print_matrix(S, "S (D - T)")
-    
-    detS = np.linalg.det(S)
-    
-    if np.isclose(detS, 0):
+    if args.pipeline:
+        # S = D - T montada painel a painel, à medida que os resultados chegam
+        S = calcular_S_pipeline(comm, C, D, X, args.bloco, leitor_C)
+    else:
+        if args.grade2d:
+            T = calcular_T_summa(comm, C, X, args.tile)
+        else:
+            dtype = np.float32 if precisao == "mista" else np.float64
+            T = calcular_T_distribuido(comm, C, [X], args.bloco, args.dinamico, leitor_C, dtype)
+
+        mostrar_matriz(args, T, "T (calculado C @ A inversa @ B)")
+
+        with fase("det_S"):
+            S = D - T
+    mostrar_matriz(args, S, "S (D - T)")
+
+    # Precisão mista: a diagonal de S̃ é refeita em float64 e S̃ é fatorada; o erro de log|det(S̃)| é estimado com resíduos
+    # S z = D z - C (X z) em float64, aplicados como produtos e resolvidos com o LU de S̃ (fatoracao.estimar_erro_misto).
+    # Acima da tolerância (S mal condicionada ou cancelamento em D - T), T é refeita em float64.
+    fatores_S = None
+    if args.precisao == "mista":
+        refazer = False
+        if precisao == "mista":
+            with fase("verificacao"):
+                del T  # float32: não é mais necessária
+                corrigir_diagonal_schur(S, C, D, X)
+                try:
+                    with fase("det_S"):
+                        LU_S, piv_S, trocas_S = fatorar_lu_rapido(S)
+                    fatores_S = (LU_S, piv_S, trocas_S)
+                    erro_estimado = estimar_erro_misto(S, C, D, X, LU_S, piv_S)
+                except np.linalg.LinAlgError:
+                    erro_estimado = np.inf
+            refazer = not erro_estimado <= args.tolerancia_mista
+            informar(args, f"Precisao mista: erro estimado de log|det(S)| = {erro_estimado:.2e} "
+                           f"(tolerancia {args.tolerancia_mista:.0e})")
+        comm.bcast(refazer, root=0)
+        if refazer:
+            informar(args, "Erro acima da tolerancia: T recalculada em float64.")
+            precisao, fatores_S = "dupla (mista rejeitada)", None
+            T = calcular_T_distribuido(comm, C, [X], args.bloco, args.dinamico, leitor_C)
+            with fase("det_S"):
+                S = D - T
+        informar(args, "")
+
+    # Singularidade numérica: um pivô de A ou de S desprezível em relação ao maior (mesma regra de fatoracao.slogdet_com_limiar)
+    with fase("det_S"):
+        sinalS, logS, _ = slogdet_schur_com_limiar(LU, S, args.limiar_singular, fatores_S)
+    sinalS, logS = float(sinalS), float(logS)
+
+    with np.errstate(over="ignore"):
+        detA = sinalA * np.exp(logA)
+        detS = sinalS * np.exp(logS)
+        detM = sinalP * detA * detS
+
+    modo = "pipeline" if args.pipeline else "grade2d" if args.grade2d else "dinamico" if args.dinamico else "schur"
+
+    if sinalS == 0:
         end_time = time.perf_counter()
         elapsed_time = end_time - start_time
-        
-        print(f"det(S) = {detS:.2f}\n")
-        print("---------------------------------------------------------------------------------------------------------")
-        print("!!! ENCERRAMENTO ANTECIPADO DO CALCULO !!!")
-        print("Motivo: O determinante do Complemento de Schur (S) = zero. Consequentemente, torna a matriz M singular.")
-        print(f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
-        print("---------------------------------------------------------------------------------------------------------")
-        sys.exit(0)
-
-    # Se o script chegou aqui, det(S) != 0. 
-    detM = detA * detS
+
+        informar(args, f"det(S) = {detS:.2f}\n")
+        informar(args, "---------------------------------------------------------------------------------------------------------")
+        informar(args, "!!! ENCERRAMENTO ANTECIPADO DO CALCULO !!!")
+        informar(args, "Motivo: O determinante do Complemento de Schur (S) = zero. Consequentemente, torna a matriz M singular.")
+        informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+        informar(args, "---------------------------------------------------------------------------------------------------------")
+        return resultado_final(0.0, -np.inf, elapsed_time, modo=modo, permutacao=perm is not None,
+                               motivo="complemento de Schur singular")
+
+    # Se chegou aqui, det(S) != 0.
+    sinalM, logM = combinar_slogdet((sinalP, 0.0), (sinalA, logA), (sinalS, logS))
     end_time = time.perf_counter()
     elapsed_time = end_time - start_time
 
-    print(f"det(S) = {detS:.2f}\n")
-    print("------------------------------------------------------------------------------------")
-    print(f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
-    print("------------------------------------------------------------------------------------")
-    print("Resultado Final (det(A) * det(S))")
-    print(f"det(M) = {detA:.2f} * {detS:.2f} = {detM:.2f}")
-    print("------------------------------------------------------------------------------------")
-    print(f"det(M) pelo numpy = {np.linalg.det(M)}")
-    print("------------------------------------------------------------------------------------")
-    print("VERIFICACAO FINAL: determinante da matriz M diferente de zero (matriz != singular).")
-    print("------------------------------------------------------------------------------------")
-
-# --- Lógica dos Processos Trabalhadores ---
-else:
-    # Como o mestre aborta antes de enviar qualquer mensagem se a configuração for inválida,
-    # os trabalhadores serão encerrados pelo comm.Abort() sem receberem tarefas.
-    
-    data_chunk = comm.recv(source=0, tag=1)
-    C_chunk = data_chunk['c_chunk']
-    indices = data_chunk['indices']
-    
-    common_data = comm.bcast(None, root=0)
-    A_inv = common_data['A_inv']
-    B = common_data['B']
-    
-    T_partial = C_chunk @ A_inv @ B
-    
-    comm.send({'t_partial': T_partial, 'indices': indices}, dest=0, tag=2)
\ No newline at end of file
+    if args.logdet:
+        informar(args, f"det(S) = {formatar_slogdet(sinalS, logS)}  (log|det(S)| = {logS:.6f})\n")
+    else:
+        informar(args, f"det(S) = {detS:.2f}\n")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    if perm is None:
+        informar(args, "Resultado Final (det(A) * det(S))")
+    else:
+        informar(args, "Resultado Final (sinal(P) * det(A) * det(S))")
+    if args.logdet:
+        informar(args, f"sinal = {sinalP:+.0f} * {sinalA:+.0f} * {sinalS:+.0f} = {sinalM:+.0f}")
+        informar(args, f"log|det(M)| = {logA:.6f} + {logS:.6f} = {logM:.6f}")
+        informar(args, f"det(M) = {formatar_slogdet(sinalM, logM)}")
+    elif perm is None:
+        informar(args, f"det(M) = {detA:.2f} * {detS:.2f} = {detM:.2f}")
+    else:
+        informar(args, f"det(M) = {sinalP:+.0f} * {detA:.2f} * {detS:.2f} = {detM:.2f}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(sinalM, logM, elapsed_time, modo=modo, permutacao=perm is not None)
+    if args.precisao == "mista":
+        resultado.update(precisao=precisao, condicao_A=condicao_A, erro_estimado=erro_estimado)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    informar(args, "VERIFICACAO FINAL: determinante da matriz M diferente de zero (matriz != singular).")
+    informar(args, "------------------------------------------------------------------------------------")
+    return resultado
+
+def calcular_estruturado(comm, M, args, estrutura, mapeada=False):
+    """Caminhos rápidos do módulo estrutura.py: sem T = C A⁻¹ B (ver analisar_estrutura())."""
+    tipo, detalhes = estrutura
+    informar(args, f"Estrutura detectada: matriz {descrever_estrutura(estrutura)}.")
+    informar(args, "Iniciando calculo aproveitando a estrutura...")
+    start_time = time.perf_counter()
+
+    if tipo == "singular":
+        sinalM, logM = 0.0, -np.inf
+        titulo = "linha nula"
+    elif tipo == "triangular":
+        with fase("det_S"):
+            sinalM, logM = slogdet_diagonal(M.diagonal())
+        titulo = "produto da diagonal"
+    elif tipo == "banda":
+        with fase("det_S"):
+            sinalM, logM = slogdet_banda(M, *detalhes)
+        titulo = "LU em banda"
+    elif tipo == "esparsa":
+        sinalM, logM = slogdet_esparsa_distribuido(comm, M)
+        titulo = "Schur com LU esparsa"
+    else:
+        blocos, principal = dividir_blocos(detalhes, M.shape[0], comm.Get_size())
+        sinalM, logM = slogdet_blocos_distribuido(comm, M, blocos, mapeada)
+        if principal is not None:
+            # O maior bloco diagonal usa o caminho distribuído completo, sem mensagens próprias
+            inicio, fim = principal
+            sinalP, logP = calcular_bloco_principal(comm, M[inicio:fim, inicio:fim], args)
+            sinalM, logM = combinar_slogdet((sinalM, logM), (sinalP, logP))
+        titulo = "produto dos blocos diagonais"
+    elapsed_time = time.perf_counter() - start_time
+
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+    informar(args, "------------------------------------------------------------------------------------")
+    informar(args, f"Resultado Final ({titulo})")
+    if args.logdet:
+        informar(args, f"sinal = {sinalM:+.0f}, log|det(M)| = {logM:.6f}")
+        informar(args, f"det(M) = {formatar_slogdet(sinalM, logM)}")
+    else:
+        with np.errstate(over="ignore"):
+            informar(args, f"det(M) = {sinalM * np.exp(logM):.2f}")
+    informar(args, "------------------------------------------------------------------------------------")
+    resultado = resultado_final(sinalM, logM, elapsed_time, modo="estrutura", estrutura=tipo)
+    if args.verificar:
+        verificar_numpy(args, M, resultado)
+    return resultado
+
+def dividir_blocos(blocos, n, size):
+    """
+    Separa o maior bloco diagonal quando ele domina a matriz (mais que FRACAO_BLOCO_PRINCIPAL * N linhas) e há mais de um
+    processo: calculá-lo em um único processo seria mais lento que o caminho distribuído. Retorna (demais blocos, principal).
+    """
+    maior = max(blocos, key=lambda bloco: bloco[1] - bloco[0])
+    if size == 1 or maior[1] - maior[0] <= FRACAO_BLOCO_PRINCIPAL * n:
+        return blocos, None
+    return [bloco for bloco in blocos if bloco != maior], maior
+
+def calcular_bloco_principal(comm, M, args):
+    """(sinal, log|det|) do bloco principal pelo caminho distribuído do modo escolhido, sem imprimir nada."""
+    esparsa = eh_esparsa(M) and not args.recursivo
+    comm.bcast(esparsa, root=0)
+    if esparsa:
+        return slogdet_esparsa_distribuido(comm, M)
+    M = M.toarray() if eh_esparsa(M) else np.asarray(M)
+    args_bloco = argparse.Namespace(**{**vars(args), "verbosidade": 0, "verificar": False})
+    if args.recursivo:
+        resultado = calcular_recursivo(comm, M, args_bloco)
+    else:
+        resultado = calcular_schur(comm, M, args_bloco)
+    return resultado["sinal"], (resultado["log_abs_det"] if resultado["log_abs_det"] is not None else -np.inf)
+
+def procurar_estrutura(args, mapeada):
+    """
+    Se o coordenador roda analisar_estrutura() (e a transmite aos trabalhadores, que decidem pela mesma condição).
+    A varredura lê M inteira, então a entrada mapeada em memória só é analisada com --estrutura-mapeada.
+    """
+    if args.exato or args.estimar or args.fora_da_memoria:
+        return False
+    return args.estrutura and (args.estrutura_mapeada or not mapeada)
+
+def coordenar(comm, M, args):
+    """Lógica do processo raiz (coordenador): valida M, escolhe o modo e retorna o resultado."""
+    size = comm.Get_size()
+
+    # Entrada esparsa fora do caminho estruturado: convertida para densa
+    if eh_esparsa(M) and (args.backend != "mpi" or args.exato or not args.estrutura):
+        informar(args, "Matriz esparsa convertida para densa (o modo escolhido nao usa a LU esparsa).\n")
+        M = M.toarray()
+
+    # Os backends de memória compartilhada não usam os demais processos
+    if args.backend != "mpi":
+        erro = validar(M, args)
+        if erro:
+            raise ValueError(erro)
+        resultado = calcular_memoria_compartilhada(M, args, size)
+    else:
+        erro = validar(M, args)
+        comm.bcast(erro, root=0)
+        if erro:
+            raise ValueError(erro)
+        if args.hibrido and args.bloco <= 0:
+            # Painéis grandes o bastante para todas as threads do BLAS (um único GEMM por painel)
+            threads = hibrido.threads_blas_atuais() or 1
+            args = argparse.Namespace(**{**vars(args), "bloco": tamanho_bloco(M.shape[0] - M.shape[0] // 2) * threads})
+            informar(args, f"Modo hibrido: paineis de {args.bloco} linhas para {threads} threads do BLAS por processo.\n")
+        mapeada = eh_mapeavel(detectar_formato(args.entrada, args.formato))
+        estrutura = ("densa", None)
+        if procurar_estrutura(args, mapeada):
+            with fase("estrutura"):
+                estrutura = analisar_estrutura(M)
+            comm.bcast(estrutura, root=0)
+
+        if args.exato:
+            resultado = calcular_exato(comm, M, args)
+        elif args.estimar:
+            resultado = calcular_estimativa(comm, M, args, mapeada)
+        elif args.fora_da_memoria:
+            resultado = calcular_fora_da_memoria(comm, M, args)
+        elif estrutura[0] != "densa":
+            resultado = calcular_estruturado(comm, M, args, estrutura, mapeada)
+        elif args.recursivo:
+            resultado = calcular_recursivo(comm, M, args)
+        else:
+            resultado = calcular_schur(comm, M, args, mapeada)
+
+    resultado.update(n=int(M.shape[0]), processos=size)
+    return resultado
+
+def trabalhar_schur(comm, args, M=None):
+    """Parte dos trabalhadores em calcular_schur(); com M (np.memmap), cada processo lê os próprios blocos de B e C."""
+    # Se M for singular já na escolha do bloco líder, o mestre avisa e não há cálculo distribuído.
+    continuar, perm = comm.bcast(None, root=0)
+    if continuar:
+        leitor_B = leitor_C = None
+        if M is not None:
+            leitor_B, leitor_C = leitores_de_blocos(M, perm, M.shape[0] // 2)
+
+        resolver_distribuido(comm, None, None, None, leitor_B)
+        if args.pipeline:
+            calcular_S_pipeline(comm, None, None, None, args.bloco, leitor_C)
+        elif args.grade2d:
+            calcular_T_summa(comm, None, None, args.tile)
+        else:
+            calcular_T_distribuido(comm, None, None, args.bloco, args.dinamico, leitor_C)
+            # Precisão mista rejeitada pelo coordenador: T é refeita em float64
+            if args.precisao == "mista" and comm.bcast(None, root=0):
+                calcular_T_distribuido(comm, None, None, args.bloco, args.dinamico, leitor_C)
+
+def trabalhar_estruturado(comm, args, estrutura, M=None):
+    """Parte dos trabalhadores em calcular_estruturado()."""
+    tipo, detalhes = estrutura
+    if tipo == "esparsa":
+        slogdet_esparsa_distribuido(comm, None)
+    elif tipo == "bloco_triangular":
+        blocos, principal = dividir_blocos(detalhes, int(detalhes[-1][1]), comm.Get_size())
+        slogdet_blocos_distribuido(comm, M, blocos, M is not None)
+        if principal is not None:
+            if comm.bcast(None, root=0):
+                slogdet_esparsa_distribuido(comm, None)
+            elif args.recursivo:
+                det_schur_recursivo(None, comm, args.corte, args.bloco, args.dinamico, args.limiar_singular)
+            else:
+                trabalhar_schur(comm, args)
+
+def trabalhar(comm, args):
+    """Lógica dos processos trabalhadores: participam das operações coletivas do modo escolhido."""
+    # Os backends de memória compartilhada usam apenas o rank 0
+    if args.backend != "mpi":
+        return
+
+    # Entrada inválida: o coordenador avisa e não há cálculo distribuído
+    if comm.bcast(None, root=0):
+        return
+
+    if args.exato:
+        det_exato_distribuido(comm, None)
+        return
+
+    # Nos formatos mapeados em memória cada processo abre o arquivo para ler os próprios blocos.
+    M = None
+    mapeada = eh_mapeavel(detectar_formato(args.entrada, args.formato))
+    if mapeada:
+        try:
+            with fase("leitura"):
+                M = carregar_matriz(args.entrada, args.formato)
+        except Exception:
+            M = None  # o coordenador reporta o erro
+
+    if args.fora_da_memoria:
+        slogdet_fora_da_memoria(comm, M, args.memoria_max * MB, args.temporario)
+        return
+
+    if args.estimar:
+        estimar_logdet(comm, M, M is not None, args.sondas, args.passos_lanczos, args.semente, args.confianca)
+        return
+
+    if procurar_estrutura(args, mapeada):
+        estrutura = comm.bcast(None, root=0)
+        if estrutura[0] != "densa":
+            trabalhar_estruturado(comm, args, estrutura, M)
+            return
+
+    if args.recursivo:
+        det_schur_recursivo(None, comm, args.corte, args.bloco, args.dinamico, args.limiar_singular)
+        return
+
+    trabalhar_schur(comm, args, M)
+
+def determinante(M, comm=None, inicio=None, **opcoes):
+    """
+    Determinante de M pelo complemento de Schur distribuído entre os processos de `comm` (padrão: MPI.COMM_WORLD).
+
+    Operação coletiva: todos os processos devem chamá-la com as mesmas opções; M só precisa existir no rank 0,
+    o único que recebe o resultado (dicionário com sinal, log_abs_det, det, det_formatado, singular, tempo, modo, ...);
+    os demais retornam None. As opções são as mesmas da linha de comando, com os nomes dos atributos do argparse
+    (ex.: determinante(M, logdet=True, pipeline=True, bloco=256, verbosidade=0)); por padrão nada é impresso além
+    das mensagens de progresso, e com verbosidade=0 nada é impresso. Lança ValueError (no rank 0) se M não for
+    quadrada com N >= 2, ou não for inteira no modo exato. `inicio` (time.perf_counter()) é o instante a partir do qual
+    o tempo total das métricas é contado (padrão: a chamada), para incluir por exemplo a leitura feita antes dela.
+    """
+    padrao = vars(parse_args([]))
+    desconhecidas = set(opcoes) - set(padrao)
+    if desconhecidas:
+        raise TypeError(f"Opcoes desconhecidas: {', '.join(sorted(desconhecidas))}")
+    args = argparse.Namespace(**{**padrao, **opcoes})
+
+    comm = comm if comm is not None else MPI.COMM_WORLD
+    inicio = inicio if inicio is not None else time.perf_counter()
+
+    # Com instrumentação, as operações com buffers tipados contabilizam os bytes enviados/recebidos em cada fase
+    if args.instrumentar or args.metricas:
+        comm = instrumentar(comm)
+
+    # Threads do BLAS: já definidas pelo ambiente no script principal; no uso como biblioteca, ajustadas aqui (threadpoolctl)
+    posicionamento = None
+    if args.hibrido or args.threads_blas > 0:
+        threads = args.threads_blas or hibrido.threads_automaticas(comm)
+        if hibrido.threads_blas_atuais() != threads:
+            hibrido.ajustar_threads(threads)
+    if args.hibrido:
+        posicionamento = hibrido.posicionamento(comm)
+        if posicionamento is not None and args.verbosidade >= 1:
+            hibrido.imprimir_posicionamento(posicionamento)
+
+    resultado = None
+    try:
+        if comm.Get_rank() == 0:
+            resultado = coordenar(comm, M, args)
+        else:
+            trabalhar(comm, args)
+    finally:
+        resumo = finalizar_metricas(comm, args, inicio)
+    if resultado is not None and resumo is not None:
+        resultado["metricas"] = resumo
+    if resultado is not None and posicionamento is not None:
+        resultado["posicionamento"] = posicionamento
+    return resultado
+
+def main():
+    args = parse_args()
+    inicio = time.perf_counter()
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if args.servico:
+        servir(comm, args.servico, determinante, vars(args))
+        return
+
+    M = None
+    if rank == 0:
+        try:
+            sys.stdout.reconfigure(encoding='utf-8')
+        except TypeError:
+            pass
+
+        informar(args, f"\nExecutando com {size} processos.\n")
+
+        filename = args.entrada
+        try:
+            with fase("leitura"):
+                M = carregar_matriz(filename, args.formato)
+            informar(args, f"Matriz carregada com sucesso do arquivo '{filename}'.\n")
+        except FileNotFoundError:
+            print(f"ERRO: O arquivo '{filename}' nao foi encontrado.", flush=True)
+            comm.Abort()
+        except Exception as e:
+            print(f"ERRO: Ocorreu um erro ao ler o arquivo '{filename}': {e}", flush=True)
+            comm.Abort()
+
+        mostrar_matriz(args, M, "M (Original)")
+
+    opcoes = {chave: valor for chave, valor in vars(args).items() if chave != "json"}
+    try:
+        resultado = determinante(M, comm, inicio, **opcoes)
+    except ValueError as e:
+        print(f"ERRO: {e}", flush=True)
+        sys.exit(1)
+
+    if rank != 0:
+        return
+
+    if args.verbosidade == 0:
+        if "det_exato" in resultado:
+            print(f"det(M) = {resultado['det_exato']}")
+        elif "intervalo" in resultado:
+            inferior, superior = resultado["intervalo"]
+            print(f"log|det(M)| ~ {resultado['log_abs_det']:.6f} [{inferior:.6f}, {superior:.6f}]")
+        elif args.logdet or resultado["det"] is None:
+            print(f"det(M) = {resultado['det_formatado']}")
+        else:
+            print(f"det(M) = {resultado['det']:.2f}")
+
+    if args.json:
+        if args.json == "-":
+            print(json.dumps(resultado, indent=2))
+        else:
+            with open(args.json, "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2)
+            informar(args, f"Resultado gravado em '{args.json}'.")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import argparse
 import numpy as np
 from mpi4py import MPI
 import sys
 import time 
 
+from distribuicao import calcular_T_distribuido
+from fatoracao import det_lu, fatorar_bloco_lider, resolver_distribuido
+from leitura_matriz import carregar_matriz
+
 # ======================================================
 # Cálculo de determinante de matriz com Schur
 # ======================================================
@@ -14,152 +19,167 @@ import time
 
 # REMOVIDO: o sys(0) da verificação if np.isclose(detS, 0):
 # O programa apenas faz uma verificação de se o det(M) é 0 e determina se a matriz é singular ou não.
+
+# REMOVIDO: a exigência de N par e de (size - 1) == N/2.
+# As linhas de C são divididas entre todos os processos (inclusive o coordenador) pelo módulo distribuicao.py.
+
+# REMOVIDO: o comm.Abort() quando A é singular.
+# As linhas de M são permutadas para obter um bloco líder não singular (pivotamento em bloco, fatoracao.py).
 # ======================================================================================================================================
 
-# Exec: mpiexec -n 3 python determinante_paralelo_geral.py
+# Exec: mpiexec -n 3 python determinante_paralelo_simples.py
+# Exec (matrizes intermediarias): mpiexec -n 3 python determinante_paralelo_simples.py -v --entrada matriz.npy
 
 def print_matrix(mat, name, precision=2):
     """Função auxiliar para imprimir uma matriz NumPy de forma legível."""
     with np.printoptions(precision=precision, suppress=True):
         print(f"Matriz {name}:\n{mat}\n")
 
-# --- Inicialização do MPI ---
-comm = MPI.COMM_WORLD
-rank = comm.Get_rank()
-size = comm.Get_size()
-
-# --- Lógica do Processo Raiz (Coordenador) ---
-if rank == 0:
-    try:
-        sys.stdout.reconfigure(encoding='utf-8')
-    except TypeError:
-        pass
-
-    # Verificação inicial do número mínimo de processos
-    if size < 2:
-        print("ERRO: Este programa requer pelo menos 2 processos (1 coordenador e 1+ trabalhadores).", flush=True)
-        comm.Abort()
-
-    print(f"\nExecutando com {size} processos.\n")
-
-    filename = "matriz.txt"
-    try:
-        M = np.loadtxt(filename)
-        print(f"Matriz carregada com sucesso do arquivo '{filename}'.\n")
-    except FileNotFoundError:
-        print(f"ERRO: O arquivo '{filename}' nao foi encontrado.", flush=True)
-        comm.Abort()
-    except Exception as e:
-        print(f"ERRO: Ocorreu um erro ao ler o arquivo '{filename}': {e}", flush=True)
-        comm.Abort()
-    
-    print_matrix(M, "M (Original)")
-    
-    n = M.shape[0]
-    
-    # Verifica se é quadrada E se a dimensão é um número par.
-    if M.shape[0] != M.shape[1] or n % 2 != 0:
-        print("ERRO: A matriz deve ser quadrada e sua dimensao (N) deve ser um número par.", flush=True)
-        comm.Abort()
-
-    n2 = n // 2
-
-    # VERIFICAÇÃO DE PROCESSOS EXCEDENTES 
-    num_workers = size - 1
-    if num_workers != n2:
-        print("ERRO: Configuracao de processos invalida para o tamanho do problema.", flush=True)
-        print(f"      A quantidade de trabalhadores ({num_workers}) deve ser igual a dimensao da submatriz ({n2}).", flush=True)
-        print(f"      Por favor, execute novamente com {n2 + 1} processos (mpiexec -n {n2 + 1} ...).", flush=True)
-        comm.Abort()
-
-    # 1. Dividir M em blocos
-    A = M[:n2, :n2]
-    B = M[:n2, n2:]
-    C = M[n2:, :n2]
-    D = M[n2:, n2:]
-
-    print_matrix(A, "A")
-    print_matrix(B, "B")
-    print_matrix(C, "C")
-    print_matrix(D, "D")
-    
-    # 2. Calcular det(A) e A⁻¹
-    try:
-        detA = np.linalg.det(A)
-        if np.isclose(detA, 0):
-            raise np.linalg.LinAlgError("Matriz A singular")
-        A_inv = np.linalg.inv(A)
-    except np.linalg.LinAlgError as e:
-        print(f"ERRO: A submatriz A eh singular (determinante proximo de zero), impossivel continuar.", flush=True)
-        comm.Abort()
-
-    print(f"det(A) = {detA:.2f}\n")
-    print_matrix(A_inv, "A inversa")
-    
-    print("Iniciando calculo paralelo...")
-    start_time = time.perf_counter()
-
-    # 3. Distribuir o cálculo de T
-    rows_to_calculate = np.array_split(np.arange(n2), num_workers)
-    
-    for i in range(num_workers):
-        worker_rank = i + 1
-        indices = rows_to_calculate[i]
-        C_chunk = C[indices, :]
-        comm.send({'c_chunk': C_chunk, 'indices': indices}, dest=worker_rank, tag=1)
-    
-    comm.bcast({'A_inv': A_inv, 'B': B}, root=0)
-
-    # 4. Coletar os resultados
-    T = np.zeros((n2, n2))
-    for i in range(num_workers):
-        worker_rank = i + 1
-        result_data = comm.recv(source=worker_rank, tag=2)
-        T_partial = result_data['t_partial']
-        indices = result_data['indices']
-        T[indices, :] = T_partial
-
-    print_matrix(T, "T (calculado C @ A inversa @ B)")
-
-    # 5. Calcular o Complemento de Schur
-    S = D - T
-    print_matrix(S, "S (D - T)")
-    
-    detS = np.linalg.det(S)
-    detM = detA * detS
-    end_time = time.perf_counter()
-    elapsed_time = end_time - start_time
-
-    print(f"det(S) = {detS:.2f}\n")
-    print("------------------------------------------------------------------------------------")
-    print(f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
-    print("------------------------------------------------------------------------------------")
-    print("Resultado Final (det(A) * det(S))")
-    print(f"det(M) = {detA:.2f} * {detS:.2f} = {detM:.2f}")
-    print("------------------------------------------------------------------------------------")
-    print(f"det(M) pelo numpy = {np.linalg.det(M):.2f}")
-    print("------------------------------------------------------------------------------------")
-    
-    # Verificação final sobre o resultado
-    if np.isclose(detM, 0):
-        print("VERIFICACAO FINAL: determinante da matriz M eh nulo (matriz singular).")
+def parse_args():
+    """Opções de linha de comando da distribuição de T."""
+    parser = argparse.ArgumentParser(description="Determinante paralelo via complemento de Schur (MPI).")
+    parser.add_argument("--entrada", default="matriz.txt",
+                        help="arquivo da matriz: .txt, .npy ou binario float64 .bin/.raw (padrao: matriz.txt)")
+    parser.add_argument("--bloco", type=int, default=0,
+                        help="linhas de C por painel/tarefa; 0 escolhe automaticamente pelo tamanho da cache (padrao: 0)")
+    parser.add_argument("--dinamico", action="store_true",
+                        help="entrega blocos de linhas sob demanda, para que processos mais rapidos calculem mais linhas")
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara o resultado com np.linalg.det(M) sobre a matriz completa (custo O(N^3) serial)")
+    parser.add_argument("-v", "--verbosidade", action="count", default=1,
+                        help="-v tambem imprime as matrizes intermediarias (M, A, B, C, D, X, T, S); padrao: so as mensagens")
+    return parser.parse_args()
+
+def main():
+    # --- Inicialização do MPI ---
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    args = parse_args()
+
+    def mostrar(mat, name):
+        # As matrizes só são impressas com -v: para N grande, formatá-las custa mais que o próprio cálculo
+        if args.verbosidade >= 2:
+            print_matrix(mat, name)
+
+    # --- Lógica do Processo Raiz (Coordenador) ---
+    if rank == 0:
+        try:
+            sys.stdout.reconfigure(encoding='utf-8')
+        except TypeError:
+            pass
+
+        print(f"\nExecutando com {size} processos.\n")
+
+        filename = args.entrada
+        try:
+            M = carregar_matriz(filename)
+            print(f"Matriz carregada com sucesso do arquivo '{filename}'.\n")
+        except FileNotFoundError:
+            print(f"ERRO: O arquivo '{filename}' nao foi encontrado.", flush=True)
+            comm.Abort()
+        except Exception as e:
+            print(f"ERRO: Ocorreu um erro ao ler o arquivo '{filename}': {e}", flush=True)
+            comm.Abort()
+
+        mostrar(M, "M (Original)")
+
+        n = M.shape[0]
+
+        # Verifica se é quadrada (para N ímpar, A tem dimensão N//2 e D tem dimensão N - N//2).
+        if M.ndim != 2 or M.shape[0] != M.shape[1] or n < 2:
+            print("ERRO: A matriz deve ser quadrada com dimensao (N) de pelo menos 2.", flush=True)
+            comm.Abort()
+
+        n2 = n // 2
+
+        # 1. Uma única fatoração LU do bloco líder A: det(A) pela diagonal de U (sem calcular A⁻¹).
+        #    Se A for singular ou mal condicionada, as linhas de M são permutadas (pivotamento em bloco).
+        try:
+            perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(M, n2)
+        except np.linalg.LinAlgError:
+            # As primeiras N/2 colunas de M são linearmente dependentes: det(M) = 0
+            comm.bcast(False, root=0)
+            print("det(M) = 0.00 (as primeiras N/2 colunas de M sao linearmente dependentes)")
+            print("------------------------------------------------------------------------------------")
+            print("VERIFICACAO FINAL: determinante da matriz M eh nulo (matriz singular).")
+            print("------------------------------------------------------------------------------------")
+            return
+        comm.bcast(True, root=0)
+
+        sinalP = -1.0 if trocas_perm % 2 else 1.0
+        M_pivotado = M
+        if perm is not None:
+            M_pivotado = M[perm]
+            print("A submatriz A eh singular ou mal condicionada: linhas de M permutadas (pivotamento em bloco).\n")
+
+        # 2. Dividir M (eventualmente permutada) em blocos
+        A = M_pivotado[:n2, :n2]
+        B = M_pivotado[:n2, n2:]
+        C = M_pivotado[n2:, :n2]
+        D = M_pivotado[n2:, n2:]
+
+        mostrar(A, "A")
+        mostrar(B, "B")
+        mostrar(C, "C")
+        mostrar(D, "D")
+
+        detA = det_lu(LU, trocas)
+        print(f"det(A) = {detA:.2f}\n")
+
+        print("Iniciando calculo paralelo...")
+        start_time = time.perf_counter()
+
+        # 3. X = A⁻¹B por substituições triangulares, com as colunas de B divididas entre os processos
+        X = resolver_distribuido(comm, LU, piv, B)
+        mostrar(X, "X (A inversa @ B)")
+
+        # 4. Distribuir o cálculo de T = C @ X entre todos os processos (inclusive este) e coletar os resultados
+        T = calcular_T_distribuido(comm, C, [X], args.bloco, args.dinamico)
+
+        mostrar(T, "T (calculado C @ A inversa @ B)")
+
+        # 5. Calcular o Complemento de Schur
+        S = D - T
+        mostrar(S, "S (D - T)")
+
+        detS = np.linalg.det(S)
+        detM = sinalP * detA * detS
+        end_time = time.perf_counter()
+        elapsed_time = end_time - start_time
+
+        print(f"det(S) = {detS:.2f}\n")
+        print("------------------------------------------------------------------------------------")
+        print(f"Tempo total de paralelismo: {elapsed_time:.6f} segundos")
+        print("------------------------------------------------------------------------------------")
+        if perm is None:
+            print("Resultado Final (det(A) * det(S))")
+            print(f"det(M) = {detA:.2f} * {detS:.2f} = {detM:.2f}")
+        else:
+            print("Resultado Final (sinal(P) * det(A) * det(S))")
+            print(f"det(M) = {sinalP:+.0f} * {detA:.2f} * {detS:.2f} = {detM:.2f}")
+        print("------------------------------------------------------------------------------------")
+        if args.verificar:
+            print(f"det(M) pelo numpy = {np.linalg.det(M):.2f}")
+            print("------------------------------------------------------------------------------------")
+
+        # Verificação final sobre o resultado
+        if np.isclose(detM, 0):
+            print("VERIFICACAO FINAL: determinante da matriz M eh nulo (matriz singular).")
+        else:
+            print("VERIFICACAO FINAL: determinante da matriz M diferente de zero (matriz nao singular).")
+        print("------------------------------------------------------------------------------------")
+
+    # --- Lógica dos Processos Trabalhadores ---
     else:
-        print("VERIFICACAO FINAL: determinante da matriz M diferente de zero (matriz nao singular).")
-    print("------------------------------------------------------------------------------------")
-
-# --- Lógica dos Processos Trabalhadores ---
-else:
-    # Como o mestre aborta antes de enviar qualquer mensagem se a configuração for inválida,
-    # os trabalhadores serão encerrados pelo comm.Abort() sem receberem tarefas.
-    
-    data_chunk = comm.recv(source=0, tag=1)
-    C_chunk = data_chunk['c_chunk']
-    indices = data_chunk['indices']
-    
-    common_data = comm.bcast(None, root=0)
-    A_inv = common_data['A_inv']
-    B = common_data['B']
-    
-    T_partial = C_chunk @ A_inv @ B
-    
-    comm.send({'t_partial': T_partial, 'indices': indices}, dest=0, tag=2)
\ No newline at end of file
+        # Como o mestre aborta antes de enviar qualquer mensagem se a entrada for inválida,
+        # os trabalhadores serão encerrados pelo comm.Abort() sem receberem tarefas.
+        # Se M for singular já na escolha do bloco líder, o mestre avisa e não há cálculo distribuído.
+        if comm.bcast(None, root=0):
+            resolver_distribuido(comm, None, None, None)
+            calcular_T_distribuido(comm, None, None, args.bloco, args.dinamico)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import numpy as np
+from mpi4py import MPI
+
+from instrumentacao import fase
+
+# ======================================================
+# Distribuição do cálculo de T = C @ A⁻¹ @ B entre os processos
+# ======================================================
+
+# ======================================================================================================================================
+# A quantidade de processos é independente da dimensão da matriz: as linhas de C são divididas com np.array_split entre TODOS
+# os processos (o coordenador também calcula a sua parte). Cada processo multiplica as suas linhas em painéis de `bloco` linhas,
+# de forma que o produto intermediário (painel @ A⁻¹) caiba na cache e os GEMMs do BLAS tenham tamanho eficiente.
+#
+# No modo dinâmico o coordenador entrega blocos de linhas sob demanda: quem termina primeiro recebe o próximo bloco, e o próprio
+# coordenador calcula blocos enquanto não há resultados para receber.
+#
+# Os dados trafegam apenas em buffers float64 contíguos (Scatterv/Bcast/Gatherv/Send/Recv com letra maiúscula), sem pickle:
+# os resultados são recebidos diretamente nas linhas correspondentes de T, que é pré-alocada no coordenador.
+# Apenas metadados pequenos (dimensões e o tipo dos dados) usam bcast com pickle. Com dtype=np.float32 (precisão mista),
+# C, X e T trafegam e são multiplicados em float32: metade dos bytes e da memória, e o GEMM em precisão simples.
+#
+# No modo pipeline (calcular_S_pipeline) as transferências não bloqueiam: o coordenador posta todos os painéis de C (Isend) e os
+# recebimentos dos resultados (Irecv) de uma vez, os trabalhadores recebem o próximo painel enquanto calculam o atual (buffers
+# duplos), e o coordenador calcula os próprios painéis e monta S = D - T incrementalmente, na ordem em que os painéis chegam
+# (Testsome/Waitany), de forma que um processo lento não atrasa a coleta dos demais.
+#
+# Com a matriz mapeada em memória (leitura_matriz.py), cada processo recebe um `leitor_C` e lê as próprias linhas de C direto do
+# arquivo, sem Scatterv/Send das linhas pelo coordenador.
+# ======================================================================================================================================
+
+TAG_TAREFA = 1
+TAG_RESULTADO = 2
+TAG_FIM = 3
+TAG_DADOS_TAREFA = 4
+TAG_DADOS_RESULTADO = 5
+TAG_PAINEL = 6
+TAG_PAINEL_RESULTADO = 7
+
+# Tipo MPI de cada tipo de ponto flutuante aceito nos buffers
+TIPOS_MPI = {np.dtype(np.float64): MPI.DOUBLE, np.dtype(np.float32): MPI.FLOAT}
+
+# dupla: tudo em float64; mista: T = C @ X em float32 (ver determinante_paralelo.calcular_schur)
+PRECISOES = ("dupla", "mista")
+
+
+def contiguo(mat, dtype=np.float64):
+    """Garante um buffer C-contíguo do tipo `dtype` (sem cópia quando a matriz já está nesse formato)."""
+    return np.ascontiguousarray(mat, dtype=dtype)
+
+
+def contagens_deslocamentos(partes, largura=1):
+    """Tabelas de contagem e deslocamento (em elementos) para Scatterv/Gatherv de faixas de linhas com `largura` colunas."""
+    contagens = np.array([len(p) for p in partes], dtype=np.int64) * largura
+    deslocamentos = np.zeros_like(contagens)
+    deslocamentos[1:] = np.cumsum(contagens)[:-1]
+    return contagens, deslocamentos
+
+
+def tamanho_bloco(n_colunas, itemsize=8, alvo_bytes=4 * 1024 * 1024, multiplo=16):
+    """
+    Número de linhas por painel para que um painel (linhas x n_colunas) ocupe cerca de
+    `alvo_bytes` (ordem de grandeza da cache L2/L3), arredondado para um múltiplo de `multiplo`.
+    """
+    linhas = alvo_bytes // max(1, n_colunas * itemsize)
+    return int(max(multiplo, (linhas // multiplo) * multiplo))
+
+
+def particionar_linhas(n, num_processos):
+    """Divide os índices 0..n-1 em `num_processos` faixas contíguas (algumas podem ser vazias)."""
+    return np.array_split(np.arange(n), num_processos)
+
+
+def particionar_por_peso(pesos, num_processos):
+    """
+    Divide os índices 0..n-1 em `num_processos` faixas contíguas com somas de `pesos` aproximadamente iguais
+    (ex.: linhas de uma matriz esparsa divididas pela quantidade de elementos não nulos).
+    """
+    acumulado = np.cumsum(pesos, dtype=np.float64)
+    if len(acumulado) == 0 or acumulado[-1] <= 0:
+        return particionar_linhas(len(acumulado), num_processos)
+    alvos = acumulado[-1] * np.arange(1, num_processos) / num_processos
+    cortes = np.minimum(np.searchsorted(acumulado, alvos, side="left") + 1, len(acumulado))
+    return np.split(np.arange(len(acumulado)), cortes)
+
+
+def multiplicar_em_paineis(C_local, fatores, bloco, saida=None):
+    """Calcula C_local @ fatores[0] @ fatores[1] @ ... processando `bloco` linhas por vez."""
+    linhas = C_local.shape[0]
+    if saida is None:
+        saida = np.empty((linhas, fatores[-1].shape[1]), dtype=fatores[-1].dtype)
+
+    for inicio in range(0, linhas, bloco):
+        fim = min(inicio + bloco, linhas)
+        painel = C_local[inicio:fim]
+        for fator in fatores[:-1]:
+            painel = painel @ fator
+        np.matmul(painel, fatores[-1], out=saida[inicio:fim])
+    return saida
+
+
+def calcular_T_distribuido(comm, C, fatores, bloco=0, dinamico=False, leitor_C=None, dtype=np.float64):
+    """
+    Calcula T = C @ fatores[0] @ fatores[1] @ ... distribuindo as linhas de C entre todos os processos de `comm`.
+
+    Operação coletiva: todos os processos devem chamá-la. C e fatores só precisam existir no rank 0,
+    que é o único a receber T (os demais retornam None). Com bloco = 0 o tamanho do painel é escolhido
+    automaticamente por tamanho_bloco().
+
+    Se `leitor_C` for fornecido (em todos os processos), cada processo obtém as suas linhas com
+    leitor_C(indices_linhas) em vez de recebê-las do rank 0; no rank 0, C só é usada pela dimensão.
+
+    `dtype` (só no rank 0) é o tipo em que C, os fatores e T trafegam e são multiplicados; T é retornada nesse tipo.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if rank == 0:
+        if leitor_C is None:
+            C = contiguo(C, dtype)
+        fatores = [contiguo(f, dtype) for f in fatores]
+        n_linhas = C.shape[0]
+        if bloco <= 0:
+            bloco = tamanho_bloco(max(f.shape[1] for f in fatores))
+        if dinamico:
+            # Blocos menores que o painel ideal quando há poucas linhas por processo, para balancear a carga
+            bloco = max(1, min(bloco, -(-n_linhas // (4 * size))))
+        meta = (C.shape, [f.shape for f in fatores], bloco, np.dtype(dtype).str)
+    else:
+        meta = None
+
+    with fase("distribuicao"):
+        forma_C, formas, bloco, dtype = comm.bcast(meta, root=0)
+        dtype = np.dtype(dtype)
+        n_linhas, n_colunas = forma_C
+        m = formas[-1][1]
+
+        # Fatores comuns (A⁻¹ e B, ou X = A⁻¹B) replicados em todos os processos
+        if rank != 0:
+            fatores = [np.empty(forma, dtype=dtype) for forma in formas]
+        for fator in fatores:
+            comm.Bcast(fator, root=0)
+
+    if dinamico:
+        if rank == 0:
+            return _coordenar_dinamico(comm, C, fatores, bloco, leitor_C)
+        _trabalhar_dinamico(comm, fatores, bloco, n_colunas, leitor_C)
+        return None
+
+    # --- Particionamento estático ---
+    partes = particionar_linhas(n_linhas, size)
+    contagens_C, deslocamentos_C = contagens_deslocamentos(partes, n_colunas)
+    contagens_T, deslocamentos_T = contagens_deslocamentos(partes, m)
+
+    with fase("distribuicao"):
+        if leitor_C is not None:
+            C_local = leitor_C(partes[rank]).astype(dtype, copy=False)
+        else:
+            C_local = np.empty((len(partes[rank]), n_colunas), dtype=dtype)
+            comm.Scatterv([C, contagens_C, deslocamentos_C, TIPOS_MPI[dtype]] if rank == 0 else None, C_local, root=0)
+
+    with fase("gemm"):
+        T_local = multiplicar_em_paineis(C_local, fatores, bloco)
+
+    with fase("coleta"):
+        T = np.empty((n_linhas, m), dtype=dtype) if rank == 0 else None
+        comm.Gatherv(T_local, [T, contagens_T, deslocamentos_T, TIPOS_MPI[dtype]] if rank == 0 else None, root=0)
+
+    return T
+
+
+def _coordenar_dinamico(comm, C, fatores, bloco, leitor_C=None):
+    size = comm.Get_size()
+    n_linhas = C.shape[0]
+    T = np.empty((n_linhas, fatores[-1].shape[1]), dtype=fatores[-1].dtype)
+
+    tarefas = [(inicio, min(inicio + bloco, n_linhas)) for inicio in range(0, n_linhas, bloco)]
+    tarefas.reverse()
+    pendentes = 0
+
+    @fase("distribuicao")
+    def enviar_proxima(worker_rank):
+        if tarefas:
+            inicio, fim = tarefas.pop()
+            comm.Send(np.array([inicio, fim], dtype=np.int64), dest=worker_rank, tag=TAG_TAREFA)
+            if leitor_C is None:
+                comm.Send(C[inicio:fim], dest=worker_rank, tag=TAG_DADOS_TAREFA)
+            return 1
+        comm.Send(np.zeros(2, dtype=np.int64), dest=worker_rank, tag=TAG_FIM)
+        return 0
+
+    # Um bloco inicial para cada trabalhador
+    for worker_rank in range(1, size):
+        pendentes += enviar_proxima(worker_rank)
+
+    cabecalho = np.empty(2, dtype=np.int64)
+    status = MPI.Status()
+    while pendentes > 0 or tarefas:
+        # Sem resultados prontos, o coordenador calcula um bloco em vez de ficar ocioso
+        if tarefas and not comm.Iprobe(source=MPI.ANY_SOURCE, tag=TAG_RESULTADO, status=status):
+            inicio, fim = tarefas.pop()
+            with fase("gemm"):
+                painel = C[inicio:fim] if leitor_C is None else leitor_C(np.arange(inicio, fim)).astype(T.dtype, copy=False)
+                multiplicar_em_paineis(painel, fatores, bloco, saida=T[inicio:fim])
+            continue
+
+        with fase("coleta"):
+            comm.Recv(cabecalho, source=MPI.ANY_SOURCE, tag=TAG_RESULTADO, status=status)
+            worker_rank = status.Get_source()
+            inicio, fim = cabecalho
+            # Recebe direto nas linhas de T (faixa contígua)
+            comm.Recv(T[inicio:fim], source=worker_rank, tag=TAG_DADOS_RESULTADO)
+        pendentes -= 1
+
+        pendentes += enviar_proxima(worker_rank)
+
+    return T
+
+
+def _trabalhar_dinamico(comm, fatores, bloco, n_colunas, leitor_C=None):
+    cabecalho = np.empty(2, dtype=np.int64)
+    buffer_C = np.empty((bloco, n_colunas), dtype=fatores[-1].dtype)
+    buffer_T = np.empty((bloco, fatores[-1].shape[1]), dtype=fatores[-1].dtype)
+    status = MPI.Status()
+    while True:
+        with fase("distribuicao"):
+            comm.Recv(cabecalho, source=0, tag=MPI.ANY_TAG, status=status)
+            if status.Get_tag() == TAG_FIM:
+                break
+            linhas = int(cabecalho[1] - cabecalho[0])
+            if leitor_C is None:
+                comm.Recv(buffer_C[:linhas], source=0, tag=TAG_DADOS_TAREFA)
+            else:
+                buffer_C[:linhas] = leitor_C(np.arange(cabecalho[0], cabecalho[1]))
+        with fase("gemm"):
+            multiplicar_em_paineis(buffer_C[:linhas], fatores, bloco, saida=buffer_T[:linhas])
+        with fase("coleta"):
+            comm.Send(cabecalho, dest=0, tag=TAG_RESULTADO)
+            comm.Send(buffer_T[:linhas], dest=0, tag=TAG_DADOS_RESULTADO)
+
+
+def paineis_do_processo(n_linhas, bloco, size, rank):
+    """Painéis (inicio, fim) de `bloco` linhas atribuídos ao processo `rank` (distribuição cíclica)."""
+    paineis = [(inicio, min(inicio + bloco, n_linhas)) for inicio in range(0, n_linhas, bloco)]
+    return paineis[rank::size]
+
+
+def calcular_S_pipeline(comm, C, D, X, bloco=0, leitor_C=None):
+    """
+    Calcula S = D - C @ X com transferências não bloqueantes e sobreposição de comunicação e cálculo.
+
+    Os painéis de `bloco` linhas de C são distribuídos ciclicamente entre todos os processos (inclusive o rank 0).
+    Operação coletiva: C, D e X só precisam existir no rank 0, o único que recebe S (os demais retornam None).
+    Com `leitor_C` (em todos os processos), cada processo lê os seus painéis de C em vez de recebê-los.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if rank == 0:
+        if leitor_C is None:
+            C = contiguo(C)
+        X = contiguo(X)
+        if bloco <= 0:
+            bloco = tamanho_bloco(X.shape[1])
+        # Painéis menores quando há poucas linhas por processo, para que haja o que sobrepor
+        bloco = max(1, min(bloco, -(-C.shape[0] // (2 * size))))
+        meta = (C.shape, X.shape, bloco)
+    else:
+        meta = None
+
+    with fase("distribuicao"):
+        (n_linhas, n_colunas), forma_X, bloco = comm.bcast(meta, root=0)
+        if rank != 0:
+            X = np.empty(forma_X, dtype=np.float64)
+        comm.Bcast(X, root=0)
+    m = forma_X[1]
+
+    if rank != 0:
+        _trabalhar_pipeline(comm, X, paineis_do_processo(n_linhas, bloco, size, rank), n_colunas, leitor_C)
+        return None
+
+    S = np.empty((n_linhas, m), dtype=np.float64)
+    envios = []
+    recebimentos = []
+    paineis_recebidos = []
+
+    with fase("distribuicao"):
+        for worker_rank in range(1, size):
+            for inicio, fim in paineis_do_processo(n_linhas, bloco, size, worker_rank):
+                if leitor_C is None:
+                    envios.append(comm.Isend(C[inicio:fim], dest=worker_rank, tag=TAG_PAINEL))
+                # O resultado é recebido direto nas linhas de S e convertido em D - T quando chegar
+                recebimentos.append(comm.Irecv(S[inicio:fim], source=worker_rank, tag=TAG_PAINEL_RESULTADO))
+                paineis_recebidos.append((inicio, fim))
+
+    def concluir(indice):
+        inicio, fim = paineis_recebidos[indice]
+        np.subtract(D[inicio:fim], S[inicio:fim], out=S[inicio:fim])
+
+    # Painéis do coordenador, intercalados com a conclusão dos resultados que já chegaram
+    for inicio, fim in paineis_do_processo(n_linhas, bloco, size, 0):
+        with fase("gemm"):
+            painel = C[inicio:fim] if leitor_C is None else leitor_C(np.arange(inicio, fim))
+            multiplicar_em_paineis(painel, [X], bloco, saida=S[inicio:fim])
+            np.subtract(D[inicio:fim], S[inicio:fim], out=S[inicio:fim])
+        if recebimentos:
+            with fase("coleta"):
+                for indice in MPI.Request.Testsome(recebimentos) or []:
+                    concluir(indice)
+
+    # Restante na ordem de chegada
+    with fase("coleta"):
+        while True:
+            indice = MPI.Request.Waitany(recebimentos)
+            if indice == MPI.UNDEFINED:
+                break
+            concluir(indice)
+        MPI.Request.Waitall(envios)
+
+    return S
+
+
+def _trabalhar_pipeline(comm, X, paineis, n_colunas, leitor_C=None):
+    """Recebe o próximo painel enquanto calcula o atual (buffers duplos) e devolve cada resultado com Isend."""
+    if not paineis:
+        return
+    bloco = max(fim - inicio for inicio, fim in paineis)
+    buffers_C = [np.empty((bloco, n_colunas), dtype=np.float64) for _ in range(2)]
+    buffers_T = [np.empty((bloco, X.shape[1]), dtype=np.float64) for _ in range(2)]
+    envios = [MPI.REQUEST_NULL, MPI.REQUEST_NULL]
+
+    def receber(k):
+        inicio, fim = paineis[k]
+        if leitor_C is not None:
+            return None
+        return comm.Irecv(buffers_C[k % 2][:fim - inicio], source=0, tag=TAG_PAINEL)
+
+    proximo = receber(0)
+    for k, (inicio, fim) in enumerate(paineis):
+        linhas = fim - inicio
+        with fase("distribuicao"):
+            if proximo is not None:
+                proximo.Wait()
+            else:
+                buffers_C[k % 2][:linhas] = leitor_C(np.arange(inicio, fim))
+            # O painel k + 1 chega enquanto o painel k é calculado
+            proximo = receber(k + 1) if k + 1 < len(paineis) else None
+
+        with fase("gemm"):
+            # O buffer de saída só é reutilizado depois que o envio de dois painéis atrás terminou
+            envios[k % 2].Wait()
+            multiplicar_em_paineis(buffers_C[k % 2][:linhas], [X], linhas, saida=buffers_T[k % 2][:linhas])
+
+        with fase("coleta"):
+            envios[k % 2] = comm.Isend(buffers_T[k % 2][:linhas], dest=0, tag=TAG_PAINEL_RESULTADO)
+
+    with fase("coleta"):
+        MPI.Request.Waitall(envios)
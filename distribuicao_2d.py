@@ -0,0 +1,142 @@
+import numpy as np
+from mpi4py import MPI
+
+from distribuicao import contiguo
+from instrumentacao import fase
+
+# ======================================================
+# T = C @ X em grade 2D de processos (SUMMA, bloco-cíclico)
+# ======================================================
+
+# ======================================================================================================================================
+# Os processos formam uma grade pr x pc (MPI.Compute_dims). C, X = A⁻¹B e T são divididas em tiles de `tile` x `tile`
+# distribuídos de forma bloco-cíclica: o tile (I, J) fica no processo (I % pr, J % pc). Os trabalhadores guardam apenas os
+# seus tiles e os painéis do passo atual, O(n² / p) de memória em vez da cópia completa de X do particionamento por linhas.
+# O rank 0 continua com C, X e T completos (T é reunida nele para S = D - T), então a memória do coordenador não diminui.
+#
+# SUMMA: para cada tile K da dimensão interna, a coluna de processos dona do painel C[:, K] o difunde ao longo das linhas da
+# grade, a linha de processos dona do painel X[K, :] o difunde ao longo das colunas, e cada processo acumula
+# T_local += C_painel @ X_painel.
+# ======================================================================================================================================
+
+TAG_TILES = 20
+
+
+def criar_grade(comm):
+    """Cria a grade 2D e retorna (cart, linha_comm, coluna_comm, dims, coords)."""
+    dims = MPI.Compute_dims(comm.Get_size(), 2)
+    cart = comm.Create_cart(dims=dims, periods=[False, False], reorder=False)
+    coords = cart.Get_coords(cart.Get_rank())
+    linha_comm = cart.Sub([False, True])   # processos na mesma linha da grade
+    coluna_comm = cart.Sub([True, False])  # processos na mesma coluna da grade
+    return cart, linha_comm, coluna_comm, dims, coords
+
+
+def indices_ciclicos(n, tile, num_partes, parte):
+    """Índices globais (0..n-1) pertencentes à `parte` numa distribuição bloco-cíclica com tiles de `tile`."""
+    indices = np.arange(n)
+    return indices[(indices // tile) % num_partes == parte]
+
+
+def _distribuir(cart, mat, formas, tile, dims, coords):
+    """Envia a cada processo os seus tiles de `mat` (existente só no rank 0); retorna a parte local."""
+    linhas, colunas = formas
+    pr, pc = dims
+
+    if cart.Get_rank() == 0:
+        for destino in range(1, cart.Get_size()):
+            pi, pj = cart.Get_coords(destino)
+            local = mat[np.ix_(indices_ciclicos(linhas, tile, pr, pi), indices_ciclicos(colunas, tile, pc, pj))]
+            cart.Send(contiguo(local), dest=destino, tag=TAG_TILES)
+        pi, pj = coords
+        return contiguo(mat[np.ix_(indices_ciclicos(linhas, tile, pr, pi), indices_ciclicos(colunas, tile, pc, pj))])
+
+    pi, pj = coords
+    local = np.empty((len(indices_ciclicos(linhas, tile, pr, pi)), len(indices_ciclicos(colunas, tile, pc, pj))),
+                     dtype=np.float64)
+    cart.Recv(local, source=0, tag=TAG_TILES)
+    return local
+
+
+def _reunir(cart, T_local, formas, tile, dims):
+    """Reúne no rank 0 os tiles de T distribuídos de forma bloco-cíclica."""
+    linhas, colunas = formas
+    pr, pc = dims
+
+    if cart.Get_rank() != 0:
+        cart.Send(T_local, dest=0, tag=TAG_TILES)
+        return None
+
+    T = np.empty((linhas, colunas), dtype=np.float64)
+    for origem in range(cart.Get_size()):
+        pi, pj = cart.Get_coords(origem)
+        idx_linhas = indices_ciclicos(linhas, tile, pr, pi)
+        idx_colunas = indices_ciclicos(colunas, tile, pc, pj)
+        if origem == 0:
+            parte = T_local
+        else:
+            parte = np.empty((len(idx_linhas), len(idx_colunas)), dtype=np.float64)
+            cart.Recv(parte, source=origem, tag=TAG_TILES)
+        T[np.ix_(idx_linhas, idx_colunas)] = parte
+    return T
+
+
+def calcular_T_summa(comm, C, X, tile=64):
+    """
+    Calcula T = C @ X com o algoritmo SUMMA numa grade 2D de processos e tiles bloco-cíclicos.
+
+    Operação coletiva: C e X só precisam existir no rank 0, o único que recebe T (os demais retornam None).
+    """
+    rank = comm.Get_rank()
+    formas = comm.bcast((C.shape, X.shape) if rank == 0 else None, root=0)
+    (m, k), (_, n) = formas
+
+    cart, linha_comm, coluna_comm, dims, coords = criar_grade(comm)
+    pr, pc = dims
+    pi, pj = coords
+
+    # Parte local: linhas cíclicas em pr, colunas cíclicas em pc (a dimensão interna k segue a mesma regra)
+    with fase("distribuicao"):
+        C_local = _distribuir(cart, C, (m, k), tile, dims, coords)
+        X_local = _distribuir(cart, X, (k, n), tile, dims, coords)
+
+    k_colunas_locais = indices_ciclicos(k, tile, pc, pj)  # colunas de C_local
+    k_linhas_locais = indices_ciclicos(k, tile, pr, pi)   # linhas de X_local
+
+    T_local = np.zeros((C_local.shape[0], X_local.shape[1]), dtype=np.float64)
+
+    for inicio in range(0, k, tile):
+        fim = min(inicio + tile, k)
+        largura = fim - inicio
+        kt = inicio // tile
+
+        # Painel de C (linhas locais x tile K), difundido pela coluna de processos dona ao longo da linha da grade
+        dono_coluna = kt % pc
+        if pj == dono_coluna:
+            pos = np.searchsorted(k_colunas_locais, inicio)
+            painel_C = contiguo(C_local[:, pos:pos + largura])
+        else:
+            painel_C = np.empty((C_local.shape[0], largura), dtype=np.float64)
+        with fase("distribuicao"):
+            linha_comm.Bcast(painel_C, root=dono_coluna)
+
+        # Painel de X (tile K x colunas locais), difundido pela linha de processos dona ao longo da coluna da grade
+        dono_linha = kt % pr
+        if pi == dono_linha:
+            pos = np.searchsorted(k_linhas_locais, inicio)
+            painel_X = contiguo(X_local[pos:pos + largura, :])
+        else:
+            painel_X = np.empty((largura, X_local.shape[1]), dtype=np.float64)
+        with fase("distribuicao"):
+            coluna_comm.Bcast(painel_X, root=dono_linha)
+
+        with fase("gemm"):
+            T_local += painel_C @ painel_X
+
+    with fase("coleta"):
+        T = _reunir(cart, T_local, (m, n), tile, dims)
+
+    linha_comm.Free()
+    coluna_comm.Free()
+    cart.Free()
+    return T
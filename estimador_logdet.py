@@ -0,0 +1,184 @@
+from statistics import NormalDist
+
+import numpy as np
+from mpi4py import MPI
+
+from distribuicao import contagens_deslocamentos, contiguo, particionar_linhas
+from instrumentacao import fase
+
+# ======================================================
+# Estimativa de log|det(M)| para matrizes simétricas definidas positivas (SLQ)
+# ======================================================
+
+# ======================================================================================================================================
+# Para M simétrica definida positiva, log det(M) = tr(log M). O traço é estimado pelo método de Hutchinson com sondas de Rademacher z
+# (E[zᵀ log(M) z] = tr(log M)), e cada forma quadrática zᵀ log(M) z por quadratura de Gauss a partir de `passos` iterações de
+# Lanczos iniciadas em z (stochastic Lanczos quadrature):
+#
+#   zᵀ log(M) z ≈ ||z||² · Σ_i Q[0, i]² · log(θ_i),   com T = Q·diag(θ)·Qᵀ a tridiagonal de Lanczos.
+#
+# Só são usados produtos M·V, então M nunca é fatorada nem reunida: cada processo guarda apenas as suas linhas (lidas do próprio
+# arquivo nos formatos mapeados em memória, ou recebidas do rank 0). As sondas também são distribuídas por linhas, e todas avançam
+# juntas: a cada passo, um Allgatherv reúne o bloco V (N x sondas) e cada processo faz um único GEMM com as suas linhas. O custo é
+# O(N² · sondas · passos) operações e O(N²/p + N · sondas) de memória por processo.
+#
+# M precisa ser simétrica: antes do Lanczos, verificar_simetria() compara M·z com Mᵀ·z para duas sondas (cada processo usa só as
+# suas linhas) e recusa a matriz se a diferença relativa passar de TOLERANCIA_SIMETRIA. Com M não simétrica, o Lanczos ainda pode
+# produzir nós positivos e um intervalo de aparência confiável, mas sem relação com log|det(M)|.
+#
+# O intervalo de confiança vem da variância amostral entre as sondas (aproximação normal); ele não inclui o erro de truncamento do
+# Lanczos, que decai exponencialmente com `passos` (mais passos para matrizes mal condicionadas).
+# ======================================================================================================================================
+
+# beta abaixo deste valor (relativo a |alfa|) indica um subespaço invariante: a recorrência daquela sonda termina
+TOLERANCIA_LANCZOS = 1e-12
+# ||M z - Mᵀ z|| / ||M z|| acima deste valor: M não é simétrica
+TOLERANCIA_SIMETRIA = 1e-8
+
+
+def linhas_locais(comm, M, mapeada=False):
+    """
+    Operação coletiva: (M_local, partes), com M_local as linhas de M deste processo e partes a divisão das linhas.
+
+    Com `mapeada`, cada processo lê as próprias linhas do seu np.memmap; senão o rank 0 as distribui (Scatterv, ou
+    scatter de blocos CSR se M for esparsa).
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    n = comm.bcast(M.shape[0] if rank == 0 else None, root=0)
+    partes = particionar_linhas(n, size)
+    minhas = slice(int(partes[rank][0]), int(partes[rank][-1]) + 1) if len(partes[rank]) else slice(0, 0)
+
+    with fase("distribuicao"):
+        if mapeada:
+            return np.ascontiguousarray(M[minhas], dtype=np.float64), partes
+        esparsa = comm.bcast(hasattr(M, "tocsr") if rank == 0 else None, root=0)
+        if esparsa:
+            blocos = [M[p[0]:p[-1] + 1] if len(p) else M[0:0] for p in partes] if rank == 0 else None
+            return comm.scatter(blocos, root=0), partes
+        contagens, deslocamentos = contagens_deslocamentos(partes, n)
+        M_local = np.empty((len(partes[rank]), n), dtype=np.float64)
+        comm.Scatterv([contiguo(M), contagens, deslocamentos, MPI.DOUBLE] if rank == 0 else None, M_local, root=0)
+    return M_local, partes
+
+
+def sondas_rademacher(linhas, quantidade, semente):
+    """
+    Linhas `linhas` de `quantidade` sondas de Rademacher (±1). Cada elemento sai de uma posição fixa do gerador, então
+    as sondas são as mesmas para qualquer quantidade de processos.
+    """
+    gerador = np.random.PCG64(semente)
+    if len(linhas):
+        gerador.advance(int(linhas[0]) * quantidade)
+    bits = gerador.random_raw(len(linhas) * quantidade) & 1
+    return (1.0 - 2.0 * bits.astype(np.float64)).reshape(len(linhas), quantidade)
+
+
+def verificar_simetria(comm, M_local, partes, semente=0):
+    """
+    Operação coletiva: ||M Z - Mᵀ Z|| / ||M Z|| para duas sondas de Rademacher (Z, N x 2), igual em todos os processos.
+    M Z usa as linhas locais; Mᵀ Z é a soma (Allreduce) das contribuições M_localᵀ Z_local de cada processo.
+    """
+    rank = comm.Get_rank()
+    n = sum(len(p) for p in partes)
+    Z = sondas_rademacher(np.arange(n), 2, semente)
+    minhas = partes[rank]
+    MZ_local = np.asarray(M_local @ Z)
+    MtZ = comm.allreduce(np.asarray(M_local.T @ Z[minhas]), op=MPI.SUM)
+    diferenca = comm.allreduce(float(np.sum((MZ_local - MtZ[minhas]) ** 2)), op=MPI.SUM)
+    norma = comm.allreduce(float(np.sum(MZ_local ** 2)), op=MPI.SUM)
+    return float(np.sqrt(diferenca / norma)) if norma > 0 else 0.0
+
+
+def lanczos_distribuido(comm, M_local, partes, Z_local, passos):
+    """
+    Lanczos simultâneo para todas as sondas (colunas de Z), com vetores distribuídos por linhas.
+
+    Retorna (alfas, betas, comprimentos, normas2) em todos os processos: alfas/betas (passos x sondas) definem a
+    tridiagonal de cada sonda, truncada em comprimentos[k] passos, e normas2 = ||z_k||².
+    """
+    n = sum(len(p) for p in partes)
+    sondas = Z_local.shape[1]
+    contagens, deslocamentos = contagens_deslocamentos(partes, sondas)
+
+    normas2 = comm.allreduce(np.sum(Z_local * Z_local, axis=0), op=MPI.SUM)
+    V = Z_local / np.sqrt(normas2)
+    V_anterior = np.zeros_like(V)
+    beta_anterior = np.zeros(sondas)
+    alfas = np.zeros((passos, sondas))
+    betas = np.zeros((passos, sondas))
+    comprimentos = np.full(sondas, passos)
+    ativas = np.ones(sondas, dtype=bool)
+    V_completo = np.empty((n, sondas), dtype=np.float64)
+
+    for j in range(passos):
+        with fase("distribuicao"):
+            comm.Allgatherv(contiguo(V), [V_completo, contagens, deslocamentos, MPI.DOUBLE])
+        with fase("gemm"):
+            W = np.asarray(M_local @ V_completo)
+        with fase("resolucao"):
+            W -= beta_anterior * V_anterior
+            alfa = comm.allreduce(np.sum(V * W, axis=0), op=MPI.SUM)
+            W -= alfa * V
+            beta = np.sqrt(comm.allreduce(np.sum(W * W, axis=0), op=MPI.SUM))
+        alfas[j] = np.where(ativas, alfa, 0.0)
+        betas[j] = np.where(ativas, beta, 0.0)
+
+        # Subespaço invariante: a tridiagonal desta sonda já é exata com j + 1 passos
+        terminou = ativas & (beta <= TOLERANCIA_LANCZOS * np.maximum(np.abs(alfa), 1.0))
+        comprimentos[terminou] = j + 1
+        ativas &= ~terminou
+        if not ativas.any():
+            break
+
+        beta_seguro = np.where(ativas, beta, 1.0)
+        V_anterior, V = V, np.where(ativas, W / beta_seguro, 0.0)
+        beta_anterior = np.where(ativas, beta, 0.0)
+
+    return alfas, betas, comprimentos, normas2
+
+
+def quadratura_log(alfas, betas, comprimento, norma2):
+    """zᵀ log(M) z pela quadratura de Gauss da tridiagonal de Lanczos. Lança ValueError se algum nó for <= 0."""
+    T = np.diag(alfas[:comprimento]) + np.diag(betas[:comprimento - 1], 1) + np.diag(betas[:comprimento - 1], -1)
+    theta, Q = np.linalg.eigh(T)
+    if theta.min() <= 0:
+        raise ValueError("A matriz nao eh simetrica definida positiva (autovalor de Ritz <= 0); a estimativa exige M SPD.")
+    return norma2 * float(np.sum(Q[0] ** 2 * np.log(theta)))
+
+
+def estimar_logdet(comm, M, mapeada=False, sondas=32, passos=30, semente=0, confianca=0.95):
+    """
+    Operação coletiva: estimativa de log det(M) para M simétrica definida positiva (ver o comentário do módulo).
+
+    M só precisa existir no rank 0 (ou, com `mapeada`, ser o np.memmap aberto em cada processo). Retorna no rank 0
+    um dicionário com estimativa, erro_padrao, intervalo (de nível `confianca`) e as amostras por sonda; os demais
+    recebem None. Lança ValueError no rank 0 se M não for simétrica ou não for definida positiva.
+    """
+    rank = comm.Get_rank()
+    M_local, partes = linhas_locais(comm, M, mapeada)
+    with fase("verificacao"):
+        assimetria = verificar_simetria(comm, M_local, partes, semente)
+    if assimetria > TOLERANCIA_SIMETRIA:
+        if rank != 0:
+            return None
+        raise ValueError(f"A matriz nao eh simetrica (||Mz - M^T z|| / ||Mz|| = {assimetria:.1e}); a estimativa exige M SPD.")
+    Z_local = sondas_rademacher(partes[rank], sondas, semente)
+    alfas, betas, comprimentos, normas2 = lanczos_distribuido(comm, M_local, partes, Z_local, passos)
+    if rank != 0:
+        return None
+
+    with fase("quadratura"):
+        amostras = np.array([quadratura_log(alfas[:, k], betas[:, k], comprimentos[k], normas2[k]) for k in range(sondas)])
+    estimativa = float(np.mean(amostras))
+    erro_padrao = float(np.std(amostras, ddof=1) / np.sqrt(sondas)) if sondas > 1 else float("inf")
+    meia_largura = NormalDist().inv_cdf(0.5 + confianca / 2) * erro_padrao
+    return {
+        "estimativa": estimativa,
+        "erro_padrao": erro_padrao,
+        "intervalo": [estimativa - meia_largura, estimativa + meia_largura],
+        "confianca": confianca,
+        "sondas": sondas,
+        "passos": int(comprimentos.max()),
+        "amostras": amostras.tolist(),
+    }
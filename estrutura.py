@@ -0,0 +1,394 @@
+import numpy as np
+from mpi4py import MPI
+
+from distribuicao import contagens_deslocamentos, particionar_linhas, particionar_por_peso
+from fatoracao import combinar_slogdet
+from instrumentacao import fase
+
+try:
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import splu
+except ImportError:  # scipy é opcional: sem ele só a entrada esparsa (.npz / scipy.sparse) fica indisponível
+    sp = splu = None
+
+# ======================================================
+# Caminhos rápidos para matrizes estruturadas
+# ======================================================
+
+# ======================================================================================================================================
+# Antes do caminho denso (LU de A, X = A⁻¹B, T = C @ X, det(D - T)), o coordenador varre M uma vez e obtém, para cada linha, as
+# colunas do primeiro e do último elemento não nulo (extremos_das_linhas). Disso saem, em O(N²) leituras e sem cópias de M:
+#
+#   singular          - linha nula: det(M) = 0.
+#   triangular        - kl = 0 ou ku = 0 (inclui diagonal): det(M) = produto da diagonal, O(N).
+#   bloco_triangular  - índices k com M[:k, k:] = 0 (B nulo) ou M[k:, :k] = 0 (C nulo). Em cada um deles
+#                       det(M) = det(M[:k, :k]) * det(M[k:, k:]), sem T; com todos os cortes, det(M) é o produto dos
+#                       determinantes dos blocos diagonais, que são divididos entre os processos (slogdet_blocos_distribuido).
+#   banda             - kl subdiagonais e ku superdiagonais com kl + ku + 1 <= FRACAO_BANDA * N: LU com pivotamento parcial
+#                       restrita à banda, O(N * kl * (kl + ku)) e memória O(kl * (kl + ku)) (slogdet_banda).
+#   esparsa           - entrada scipy.sparse sem as estruturas acima: complemento de Schur com LU esparsa (splu) de A e as
+#                       linhas de C divididas entre os processos pela quantidade de não nulos (slogdet_esparsa_distribuido).
+#   densa             - nenhuma estrutura aproveitável: caminho denso de sempre.
+#
+# Os blocos diagonais e a matriz em banda são analisados de novo (slogdet_estruturado), de forma que, por exemplo, um bloco em
+# banda dentro de uma matriz bloco-triangular também usa a LU em banda.
+# ======================================================================================================================================
+
+ESTRUTURAS = ("singular", "triangular", "bloco_triangular", "banda", "esparsa", "densa")
+
+# A LU em banda é usada quando kl + ku + 1 <= FRACAO_BANDA * N (abaixo disso o laço por coluna perde para o LAPACK denso)
+FRACAO_BANDA = 0.05
+
+# Um bloco diagonal maior que FRACAO_BLOCO_PRINCIPAL * N usa o caminho distribuído inteiro em vez de um único processo
+FRACAO_BLOCO_PRINCIPAL = 0.5
+
+LINHAS_POR_VARREDURA = 1024
+
+TAG_BLOCO = 8
+TAG_DADOS_BLOCO = 9
+
+
+def eh_esparsa(M):
+    """Indica se M é uma matriz/array do scipy.sparse."""
+    return sp is not None and sp.issparse(M)
+
+
+def extremos_das_linhas(M):
+    """
+    (primeira, ultima): colunas do primeiro e do último elemento não nulo de cada linha de M (N e -1 nas linhas nulas).
+    Matrizes densas (inclusive np.memmap) são varridas em faixas de LINHAS_POR_VARREDURA linhas.
+    """
+    n = M.shape[0]
+    primeira = np.full(n, n, dtype=np.int64)
+    ultima = np.full(n, -1, dtype=np.int64)
+
+    if eh_esparsa(M):
+        M = sp.csr_matrix(M, copy=True)
+        M.eliminate_zeros()
+        nao_vazias = np.diff(M.indptr) > 0
+        if M.nnz:
+            inicios = M.indptr[:-1][nao_vazias]
+            primeira[nao_vazias] = np.minimum.reduceat(M.indices, inicios)
+            ultima[nao_vazias] = np.maximum.reduceat(M.indices, inicios)
+        return primeira, ultima
+
+    for inicio in range(0, n, LINHAS_POR_VARREDURA):
+        fim = min(inicio + LINHAS_POR_VARREDURA, n)
+        nao_nulos = np.asarray(M[inicio:fim]) != 0
+        tem = nao_nulos.any(axis=1)
+        primeira[inicio:fim] = np.where(tem, nao_nulos.argmax(axis=1), n)
+        ultima[inicio:fim] = np.where(tem, n - 1 - nao_nulos[:, ::-1].argmax(axis=1), -1)
+    return primeira, ultima
+
+
+def cortes_bloco_triangulares(primeira, ultima):
+    """Índices 0 < k < N com M[:k, k:] = 0 ou M[k:, :k] = 0, a partir dos extremos das linhas."""
+    n = len(primeira)
+    k = np.arange(1, n)
+    b_nulo = np.maximum.accumulate(ultima)[:-1] < k
+    c_nulo = np.minimum.accumulate(primeira[::-1])[::-1][1:] >= k
+    return k[b_nulo | c_nulo]
+
+
+def analisar_estrutura(M):
+    """
+    (tipo, detalhes) da estrutura de M, com tipo em ESTRUTURAS. Os detalhes são a lista de blocos diagonais
+    (inicio, fim) no tipo bloco_triangular e (kl, ku) no tipo banda; None nos demais.
+    """
+    n = M.shape[0]
+    primeira, ultima = extremos_das_linhas(M)
+    if np.any(ultima < 0):
+        return "singular", None
+
+    linhas = np.arange(n)
+    kl = int(np.max(linhas - primeira))
+    ku = int(np.max(ultima - linhas))
+    if kl <= 0 or ku <= 0:
+        return "triangular", None
+
+    cortes = cortes_bloco_triangulares(primeira, ultima)
+    if len(cortes):
+        limites = [0] + [int(k) for k in cortes] + [n]
+        return "bloco_triangular", list(zip(limites[:-1], limites[1:]))
+
+    if eh_esparsa(M):
+        return "esparsa", None
+    if kl + ku + 1 <= FRACAO_BANDA * n:
+        return "banda", (kl, ku)
+    return "densa", None
+
+
+def descrever_estrutura(estrutura):
+    """Descrição curta da estrutura para as mensagens do coordenador."""
+    tipo, detalhes = estrutura
+    if tipo == "bloco_triangular":
+        maior = max(fim - inicio for inicio, fim in detalhes)
+        return f"bloco-triangular ({len(detalhes)} blocos diagonais, o maior com {maior} linhas)"
+    if tipo == "banda":
+        return f"em banda (kl = {detalhes[0]}, ku = {detalhes[1]})"
+    if tipo == "singular":
+        return "com linha nula"
+    return tipo
+
+
+def slogdet_diagonal(diagonal):
+    """(sinal, log|det|) do produto dos elementos de `diagonal`."""
+    diagonal = np.asarray(diagonal, dtype=np.float64)
+    if np.any(diagonal == 0):
+        return 0.0, -np.inf
+    return float(np.prod(np.sign(diagonal))), float(np.sum(np.log(np.abs(diagonal))))
+
+
+def slogdet_banda(M, kl, ku):
+    """
+    (sinal, log|det(M)|) por eliminação com pivotamento parcial restrita à banda.
+
+    Na coluna j as linhas candidatas a pivô são j..j+kl e, depois das trocas, os seus não nulos ficam nas colunas
+    j..j+kl+ku. Basta então uma janela de (kl + 1) x (kl + ku + 1) elementos, que a cada coluna anda uma linha e uma
+    coluna e recebe a próxima linha de M (ainda não tocada pela eliminação).
+    """
+    n = M.shape[0]
+    largura = kl + ku + 1
+
+    def linha_original(i, j):
+        linha = np.zeros(largura)
+        if i < n:
+            fim = min(j + largura, n)
+            linha[:fim - j] = M[i, j:fim]
+        return linha
+
+    janela = np.array([linha_original(i, 0) for i in range(kl + 1)])
+    sinal, logabs = 1.0, 0.0
+    for j in range(n):
+        p = int(np.argmax(np.abs(janela[:, 0])))
+        pivo = janela[p, 0]
+        if pivo == 0.0:
+            return 0.0, -np.inf
+        if p:
+            janela[[0, p]] = janela[[p, 0]]
+            sinal = -sinal
+        sinal *= np.sign(pivo)
+        logabs += np.log(np.abs(pivo))
+
+        janela[1:, 1:] -= np.outer(janela[1:, 0] / pivo, janela[0, 1:])
+        janela[:-1, :-1] = janela[1:, 1:]
+        janela[:-1, -1] = 0.0
+        janela[-1] = linha_original(j + 1 + kl, j + 1)
+    return float(sinal), float(logabs)
+
+
+def paridade(perm):
+    """Sinal (+1/-1) da permutação `perm`, pela quantidade de ciclos."""
+    perm = np.asarray(perm)
+    visitado = np.zeros(len(perm), dtype=bool)
+    trocas = 0
+    for inicio in range(len(perm)):
+        comprimento = 0
+        i = inicio
+        while not visitado[i]:
+            visitado[i] = True
+            i = perm[i]
+            comprimento += 1
+        trocas += max(comprimento - 1, 0)
+    return -1.0 if trocas % 2 else 1.0
+
+
+def slogdet_splu(lu):
+    """(sinal, log|det|) a partir de Pr A Pc = L U (splu; L com diagonal unitária)."""
+    sinal, logabs = slogdet_diagonal(lu.U.diagonal())
+    return sinal * paridade(lu.perm_r) * paridade(lu.perm_c), logabs
+
+
+def slogdet_esparsa(M):
+    """(sinal, log|det(M)|) por LU esparsa (splu) em um único processo."""
+    try:
+        lu = splu(sp.csc_matrix(M))
+    except RuntimeError:
+        # splu recusa fatores exatamente singulares
+        return 0.0, -np.inf
+    return slogdet_splu(lu)
+
+
+def slogdet_estruturado(M):
+    """(sinal, log|det(M)|) em um único processo, aproveitando a estrutura de M (recursivamente nos blocos diagonais)."""
+    tipo, detalhes = analisar_estrutura(M)
+    if tipo == "singular":
+        return 0.0, -np.inf
+    if tipo == "triangular":
+        return slogdet_diagonal(M.diagonal())
+    if tipo == "bloco_triangular":
+        return combinar_slogdet(*(slogdet_estruturado(M[inicio:fim, inicio:fim]) for inicio, fim in detalhes))
+    if tipo == "banda":
+        return slogdet_banda(M, *detalhes)
+    if tipo == "esparsa":
+        return slogdet_esparsa(M)
+    sinal, logabs = np.linalg.slogdet(np.asarray(M, dtype=np.float64))
+    return float(sinal), float(logabs)
+
+
+def atribuir_blocos(blocos, size):
+    """Dono de cada bloco diagonal: maior custo (dimensão³) primeiro, sempre para o processo menos carregado."""
+    carga = np.zeros(size)
+    donos = [0] * len(blocos)
+    for i in sorted(range(len(blocos)), key=lambda i: -(blocos[i][1] - blocos[i][0])):
+        dono = int(np.argmin(carga))
+        donos[i] = dono
+        carga[dono] += float(blocos[i][1] - blocos[i][0]) ** 3
+    return donos
+
+
+def _mensagens_bloco(bloco):
+    """Buffers tipados que representam um bloco denso ou esparso (CSR), com o cabeçalho (esparso, n, nnz)."""
+    if eh_esparsa(bloco):
+        bloco = sp.csr_matrix(bloco)
+        cabecalho = np.array([1, bloco.shape[0], bloco.nnz], dtype=np.int64)
+        return [cabecalho, bloco.indptr.astype(np.int64), bloco.indices.astype(np.int64), np.ascontiguousarray(bloco.data, dtype=np.float64)]
+    bloco = np.ascontiguousarray(bloco, dtype=np.float64)
+    return [np.array([0, bloco.shape[0], 0], dtype=np.int64), bloco]
+
+
+def _receber_bloco(comm):
+    cabecalho = np.empty(3, dtype=np.int64)
+    comm.Recv(cabecalho, source=0, tag=TAG_BLOCO)
+    esparso, n, nnz = (int(v) for v in cabecalho)
+    if not esparso:
+        bloco = np.empty((n, n), dtype=np.float64)
+        comm.Recv(bloco, source=0, tag=TAG_DADOS_BLOCO)
+        return bloco
+    indptr = np.empty(n + 1, dtype=np.int64)
+    indices = np.empty(nnz, dtype=np.int64)
+    dados = np.empty(nnz, dtype=np.float64)
+    for buffer in (indptr, indices, dados):
+        comm.Recv(buffer, source=0, tag=TAG_DADOS_BLOCO)
+    return sp.csr_matrix((dados, indices, indptr), shape=(n, n))
+
+
+def slogdet_blocos_distribuido(comm, M, blocos, mapeada=False):
+    """
+    (sinal, log|det|) do produto dos determinantes dos blocos diagonais M[inicio:fim, inicio:fim] de `blocos`,
+    divididos entre os processos de `comm` por atribuir_blocos(); cada bloco é calculado por slogdet_estruturado().
+
+    Operação coletiva: `blocos` deve ser o mesmo em todos os processos. M só precisa existir no rank 0, que envia os
+    blocos dos demais com Isend e calcula os seus enquanto isso; com `mapeada`, cada processo lê os seus blocos da
+    sua própria cópia de M (np.memmap). O resultado é retornado apenas no rank 0.
+    """
+    rank = comm.Get_rank()
+    donos = atribuir_blocos(blocos, comm.Get_size())
+    meus = [bloco for bloco, dono in zip(blocos, donos) if dono == rank]
+
+    envios, mensagens = [], []
+    if rank == 0 and not mapeada:
+        with fase("distribuicao"):
+            for (inicio, fim), dono in zip(blocos, donos):
+                if dono != 0:
+                    partes = _mensagens_bloco(M[inicio:fim, inicio:fim])
+                    mensagens.append(partes)
+                    envios.append(comm.Isend(partes[0], dest=dono, tag=TAG_BLOCO))
+                    envios.extend(comm.Isend(parte, dest=dono, tag=TAG_DADOS_BLOCO) for parte in partes[1:])
+
+    pares = []
+    for inicio, fim in meus:
+        if rank == 0 or mapeada:
+            bloco = M[inicio:fim, inicio:fim]
+        else:
+            with fase("distribuicao"):
+                bloco = _receber_bloco(comm)
+        with fase("det_S"):
+            pares.append(slogdet_estruturado(bloco))
+
+    with fase("coleta"):
+        MPI.Request.Waitall(envios)
+        pares = comm.gather(combinar_slogdet(*pares), root=0)
+    return combinar_slogdet(*pares) if rank == 0 else None
+
+
+def _bcast_esparsa(comm, mat, formato):
+    """Replica a matriz esparsa `mat` (do rank 0) em todos os processos, com os três vetores em buffers tipados."""
+    rank = comm.Get_rank()
+    if rank == 0:
+        mat = mat.asformat(formato)
+        partes = [mat.indptr.astype(np.int64), mat.indices.astype(np.int64), np.ascontiguousarray(mat.data, dtype=np.float64)]
+        meta = (mat.shape, mat.nnz)
+    else:
+        meta = None
+    forma, nnz = comm.bcast(meta, root=0)
+    if rank != 0:
+        ponteiros = forma[0] if formato == "csr" else forma[1]
+        partes = [np.empty(ponteiros + 1, dtype=np.int64), np.empty(nnz, dtype=np.int64), np.empty(nnz, dtype=np.float64)]
+    for parte in partes:
+        comm.Bcast(parte, root=0)
+    construtor = sp.csr_matrix if formato == "csr" else sp.csc_matrix
+    return construtor((partes[2], partes[1], partes[0]), shape=forma)
+
+
+def slogdet_esparsa_distribuido(comm, M):
+    """
+    (sinal, log|det(M)|) pelo complemento de Schur com LU esparsa, para M scipy.sparse.
+
+    A, B e C (esparsas) são replicadas em todos os processos; cada processo fatora A com splu (o objeto da fatoração
+    não é serializável, então a fatoração é repetida, como o LU denso é replicado por Bcast), resolve X = A⁻¹B para
+    uma faixa de colunas de B e recebe X inteira por Allgatherv. As linhas de C são divididas pela quantidade de não
+    nulos, que é o que determina o custo de C_local @ X; o rank 0 reúne T e calcula det(S) = det(D - T) denso.
+
+    Se A for exatamente singular, o rank 0 fatora M inteira com splu (sem distribuição). Operação coletiva: M só
+    precisa existir no rank 0, o único que recebe o resultado.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if rank == 0:
+        M = sp.csr_matrix(M)
+        n2 = M.shape[0] // 2
+        with fase("fatoracao"):
+            try:
+                lu = splu(sp.csc_matrix(M[:n2, :n2]))
+            except RuntimeError:
+                lu = None
+        comm.bcast(lu is not None, root=0)
+        if lu is None:
+            with fase("det_S"):
+                return slogdet_esparsa(M)
+        A, B, C, D = M[:n2, :n2], M[:n2, n2:], M[n2:, :n2], M[n2:, n2:]
+    else:
+        if not comm.bcast(None, root=0):
+            return None
+        A = B = C = D = None
+
+    with fase("distribuicao"):
+        A = _bcast_esparsa(comm, A, "csc")
+        B = _bcast_esparsa(comm, B, "csc")
+        C = _bcast_esparsa(comm, C, "csr")
+    n2, m = B.shape
+
+    if rank != 0:
+        with fase("fatoracao"):
+            lu = splu(A)
+
+    # X = A⁻¹B: faixas de colunas de B, reunidas em todos os processos
+    partes = particionar_linhas(m, size)
+    with fase("resolucao"):
+        colunas = partes[rank]
+        X_local_t = np.ascontiguousarray(lu.solve(B[:, colunas].toarray()).T) if len(colunas) else np.empty((0, n2))
+    with fase("distribuicao"):
+        contagens, deslocamentos = contagens_deslocamentos(partes, n2)
+        X_t = np.empty((m, n2), dtype=np.float64)
+        comm.Allgatherv(X_local_t, [X_t, contagens, deslocamentos, MPI.DOUBLE])
+        X = X_t.T
+
+    # T = C @ X: linhas de C divididas pela quantidade de não nulos
+    partes_C = particionar_por_peso(np.diff(C.indptr), size)
+    with fase("gemm"):
+        linhas = partes_C[rank]
+        T_local = np.ascontiguousarray(C[linhas[0]:linhas[-1] + 1] @ X if len(linhas) else np.empty((0, m)))
+
+    with fase("coleta"):
+        contagens_T, deslocamentos_T = contagens_deslocamentos(partes_C, m)
+        T = np.empty((C.shape[0], m), dtype=np.float64) if rank == 0 else None
+        comm.Gatherv(T_local, [T, contagens_T, deslocamentos_T, MPI.DOUBLE] if rank == 0 else None, root=0)
+
+    if rank != 0:
+        return None
+
+    with fase("det_S"):
+        sinalS, logS = np.linalg.slogdet(D.toarray() - T)
+    return combinar_slogdet(slogdet_splu(lu), (float(sinalS), float(logS)))
@@ -1,3 +1,5 @@
+import time
+
 from mpi4py import MPI
 import numpy as np
 
@@ -5,132 +7,104 @@ comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 tamanho = comm.Get_size()
 
+# ======================================================================================================================================
+# Pipeline distribuído: os intermediários ficam nos processos e só o complemento de Schur chega ao rank 0.
+#
+# A versão anterior difundia M inteira com pickle, reunia A⁻¹ no rank 0 (transposta, pelo Gatherv de blocos de colunas
+# em ordem de linhas, daí o det(M) = -7 que ela imprimia para a matriz abaixo), espalhava de novo para C * A_inv, reunia, e espalhava
+# mais uma vez para C * A_inv * B.
+#
+# Agora, com K_r um bloco de índices do processo r (tabelas de contagem/deslocamento calculadas uma única vez):
+#   X[:, K_r] = solve(A, B[:, K_r])                    - cada processo recebe (Scatterv) e resolve só as suas colunas de B
+#   X = [X[:, K_0] ... X[:, K_p-1]]                    - Allgatherv: todos os processos ficam com X = A⁻¹B
+#   T[K_r, :] = C[K_r, :] @ X                          - cada processo recebe (Scatterv) só as suas linhas de C
+#   S = D - T                                          - Gatherv de blocos disjuntos de linhas de T até o rank 0
+# Nenhum processo recebe C inteira nem soma um bloco m x m completo: as linhas de C e de T por processo são O(n² / p), e só A e X
+# ficam replicadas (como em distribuicao.calcular_T_distribuido, que também difunde X).
+# ======================================================================================================================================
+
 def ler_matriz_de_arquivo(caminho):
     with open(caminho, 'r') as arquivo:
         linhas = arquivo.readlines()
         matriz = [list(map(float, linha.replace(';', ' ').split())) for linha in linhas]
     return np.array(matriz, dtype=np.float64)
 
-def multiplicar_matrizes_paralelo(A, B):
+def particionar(n):
     """
-    Multiplica matrizes A e B em paralelo dividindo A por linhas entre os processos.
+    Tabelas de contagem e deslocamento (em linhas) para dividir n linhas/colunas entre os processos.
+    Calculadas uma única vez e reaproveitadas por todas as etapas.
     """
-    if rank == 0:
-        n, m = A.shape
-        p = B.shape[1]
-    else:
-        n = m = p = None
-
-    n = comm.bcast(n, root=0)
-    m = comm.bcast(m, root=0)
-    p = comm.bcast(p, root=0)
-
-    linhas_por_processo = n // tamanho
+    por_processo = n // tamanho
     sobras = n % tamanho
-    contagens = [linhas_por_processo + 1 if i < sobras else linhas_por_processo for i in range(tamanho)]
-    deslocamentos = [sum(contagens[:i]) for i in range(tamanho)]
-
-    parte_local_A = np.empty((contagens[rank], m), dtype=np.float64)
-    if rank == 0:
-        comm.Scatterv([A.ravel(), np.array(contagens) * m, np.array(deslocamentos) * m, MPI.DOUBLE], parte_local_A.ravel(), root=0)
-    else:
-        comm.Scatterv([None, np.array(contagens) * m, np.array(deslocamentos) * m, MPI.DOUBLE], parte_local_A.ravel(), root=0)
-
-    B = comm.bcast(B if rank == 0 else None, root=0)
-
-    parte_local_resultado = np.dot(parte_local_A, B)
-
-    if rank == 0:
-        resultado = np.empty((n, p), dtype=np.float64)
-    else:
-        resultado = None
-
-    comm.Gatherv(parte_local_resultado.ravel(), [resultado.ravel() if rank == 0 else None, np.array(contagens) * p, np.array(deslocamentos) * p, MPI.DOUBLE], root=0)
+    contagens = np.array([por_processo + 1 if i < sobras else por_processo for i in range(tamanho)], dtype=np.int64)
+    deslocamentos = np.zeros_like(contagens)
+    deslocamentos[1:] = np.cumsum(contagens)[:-1]
+    return contagens, deslocamentos
 
-    return resultado
-
-def inverter_matriz_paralelo(matriz):
-    """
-    Calcula a inversa de uma matriz dividindo a matriz identidade entre os processos,
-    cada processo resolve o sistema linear para suas colunas, e o resultado é reunido.
+def complemento_schur_distribuido(A, B, C, D):
     """
-    n = matriz.shape[0]
-
-    if rank == 0:
-        identidade = np.eye(n, dtype=np.float64)
-    else:
-        identidade = None
+    S = D - C * A⁻¹ * B com as colunas de B (e de X = A⁻¹B) e as linhas de C (e de T = C X) divididas entre os processos.
 
-    # Todos recebem a matriz completa
-    matriz_local = matriz.copy() if rank == 0 else np.empty((n, n), dtype=np.float64)
-    comm.Bcast(matriz_local, root=0)
-
-    # Dividir as colunas da identidade entre os processos
-    colunas_por_processo = n // tamanho
-    sobras = n % tamanho
-    contagens = [colunas_por_processo + 1 if i < sobras else colunas_por_processo for i in range(tamanho)]
-    deslocamentos = [sum(contagens[:i]) for i in range(tamanho)]
-
-    parte_local_identidade = np.empty((n, contagens[rank]), dtype=np.float64)
-
-    if rank == 0:
-        comm.Scatterv([identidade.ravel(), np.array(contagens) * n, np.array(deslocamentos) * n, MPI.DOUBLE],
-                      parte_local_identidade.ravel(), root=0)
-    else:
-        comm.Scatterv([None, np.array(contagens) * n, np.array(deslocamentos) * n, MPI.DOUBLE],
-                      parte_local_identidade.ravel(), root=0)
-
-    # Cada processo resolve o sistema linear
-    parte_local_inversa = np.linalg.solve(matriz_local, parte_local_identidade)
-
-    # Reunir as partes da inversa no processo 0
-    if rank == 0:
-        inversa = np.empty((n, n), dtype=np.float64)
-    else:
-        inversa = None
-
-    comm.Gatherv(parte_local_inversa.ravel(),
-                 [inversa.ravel() if rank == 0 else None, np.array(contagens) * n, np.array(deslocamentos) * n, MPI.DOUBLE],
-                 root=0)
-
-    return inversa
+    A, B, C e D só precisam existir no rank 0, o único que recebe S.
+    """
+    formas = comm.bcast((A.shape[0], D.shape[0]) if rank == 0 else None, root=0)
+    meio, resto = formas
+
+    # A replicada (buffer tipado, sem pickle)
+    if rank != 0:
+        A = np.empty((meio, meio), dtype=np.float64)
+    comm.Bcast(A, root=0)
+
+    # O mesmo particionamento serve para as colunas de B/X e para as linhas de C/T (ambos com `resto` elementos)
+    contagens, deslocamentos = particionar(resto)
+    minhas = int(contagens[rank])
+
+    # Colunas de B (linhas de Bᵀ, contíguas) e X[:, K_r] = A⁻¹ B[:, K_r]
+    Bt_local = np.empty((minhas, meio), dtype=np.float64)
+    comm.Scatterv([np.ascontiguousarray(B.T), contagens * meio, deslocamentos * meio, MPI.DOUBLE] if rank == 0 else None,
+                  Bt_local, root=0)
+    Xt_local = np.ascontiguousarray(np.linalg.solve(A, Bt_local.T).T)
+    Xt = np.empty((resto, meio), dtype=np.float64)
+    comm.Allgatherv(Xt_local, [Xt, contagens * meio, deslocamentos * meio, MPI.DOUBLE])
+
+    # Linhas de C e T[K_r, :] = C[K_r, :] @ X
+    C_local = np.empty((minhas, meio), dtype=np.float64)
+    comm.Scatterv([C, contagens * meio, deslocamentos * meio, MPI.DOUBLE] if rank == 0 else None, C_local, root=0)
+    T_local = np.ascontiguousarray(C_local @ Xt.T)
+
+    T = np.empty((resto, resto), dtype=np.float64) if rank == 0 else None
+    comm.Gatherv(T_local, [T, contagens * resto, deslocamentos * resto, MPI.DOUBLE] if rank == 0 else None, root=0)
+    return D - T if rank == 0 else None
 
 def determinante_via_schur(M):
-    n = M.shape[0]
-    meio = n // 2
+    if rank == 0:
+        n = M.shape[0]
+        meio = n // 2
 
-    A = M[:meio, :meio].copy()
-    B = M[:meio, meio:].copy()
-    C = M[meio:, :meio].copy()
-    D = M[meio:, meio:].copy()
+        A = np.ascontiguousarray(M[:meio, :meio])
+        B = np.ascontiguousarray(M[:meio, meio:])
+        C = np.ascontiguousarray(M[meio:, :meio])
+        D = np.ascontiguousarray(M[meio:, meio:])
 
-    if rank == 0:
         print("\nSubmatriz A:\n", A)
         print("Submatriz B:\n", B)
         print("Submatriz C:\n", C)
         print("Submatriz D:\n", D)
-        print("\nCalculando a inversa de A...")
-
-    inversa_A = inverter_matriz_paralelo(A)
+        print("\nCalculando o complemento de Schur (colunas de B e linhas de C distribuidas)...")
+    else:
+        A = B = C = D = None
 
-    if rank == 0:
-        print("\nInversa de A:\n", inversa_A)
-        print("\nCalculando C * A_inv...")
-    CA_inv = multiplicar_matrizes_paralelo(C, inversa_A)
+    inicio = time.perf_counter()
+    schur = complemento_schur_distribuido(A, B, C, D)
 
     if rank == 0:
-        print("\nC * A_inv:\n", CA_inv)
-        print("\nCalculando C * A_inv * B...")
-    CA_inv_B = multiplicar_matrizes_paralelo(CA_inv, B)
-
-    if rank == 0:
-        print("\nC * A_inv * B:\n", CA_inv_B)
-        schur = D - CA_inv_B
-        print("\nComplemento de Schur (S = D - C * A_inv * B):\n", schur)
-
         det_A = np.linalg.det(A)
         det_S = np.linalg.det(schur)
         det_M = det_A * det_S
+        tempo = time.perf_counter() - inicio
+
+        print("\nComplemento de Schur (S = D - C * A_inv * B):\n", schur)
+        print(f"\nTempo total de paralelismo: {tempo:.6f} segundos")
 
         print(f"\ndet(A) = {det_A}")
         print(f"det(S) = {det_S}")
@@ -157,11 +131,11 @@ if __name__ == "__main__":
     else:
         matriz_M = None
 
-    matriz_M = comm.bcast(matriz_M, root=0)
-
-    determinante_via_schur(matriz_M)
+    # Apenas a validade da entrada é difundida; os blocos seguem por buffers tipados
+    if comm.bcast(matriz_M is not None, root=0):
+        determinante_via_schur(matriz_M)
 
-''' 
+'''
 Matriz M (lida do arquivo):
  [[2. 3. 1. 0.]
  [1. 4. 2. 1.]
@@ -181,30 +155,16 @@ Submatriz D:
  [[3. 2.]
  [1. 1.]]
 
-Calculando a inversa de A...
-
-Inversa de A:
- [[ 0.8 -0.2]
- [-0.6  0.4]]
-
-Calculando C * A_inv...
-
-C * A_inv:
- [[ 3.4 -0.6]
- [-1.2  0.8]]
-
-Calculando C * A_inv * B...
-
-C * A_inv * B:
- [[ 2.2 -0.6]
- [ 0.4  0.8]]
+Calculando o complemento de Schur (colunas de B e linhas de C distribuidas)...
 
 Complemento de Schur (S = D - C * A_inv * B):
- [[0.8 2.6]
- [0.6 0.2]]
+ [[ 4.4  4.6]
+ [-0.2  0.2]]
+
+Tempo total de paralelismo: 0.004770 segundos
 
 det(A) = 5.000000000000001
-det(S) = -1.4000000000000004
-det(M) pela f¾rmula de Schur = -7.000000000000003
-det(M) pelo numpy = 8.999999999999998 
-'''
\ No newline at end of file
+det(S) = 1.7999999999999996
+det(M) pela fórmula de Schur = 9.0
+det(M) pelo numpy = 8.999999999999998
+'''
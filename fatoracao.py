@@ -0,0 +1,376 @@
+import warnings
+
+import numpy as np
+from mpi4py import MPI
+
+from distribuicao import contagens_deslocamentos, contiguo, particionar_linhas
+from instrumentacao import fase
+
+try:
+    from scipy.linalg import lu_factor, solve_triangular
+except ImportError:  # scipy é opcional: sem ele fatorar_lu_rapido usa fatorar_lu e resolver_triangular resolve em blocos (mais lentos)
+    lu_factor = solve_triangular = None
+
+# ======================================================
+# Fatoração LU de A reaproveitada para det(A) e X = A⁻¹B
+# ======================================================
+
+# ======================================================================================================================================
+# Uma única fatoração PA = LU (pivotamento parcial, em blocos) fornece:
+#   det(A) = (-1)^trocas * prod(diag(U))
+#   X = A⁻¹B = U⁻¹ L⁻¹ (P B), por substituições triangulares, sem calcular A⁻¹ explicitamente.
+# As substituições são independentes por coluna de B, então são distribuídas por colunas entre os processos.
+#
+# Pivotamento em bloco: se A for singular ou mal condicionada, as linhas de M são permutadas de acordo com a LU com pivotamento
+# parcial das primeiras k colunas de M. Se M é não singular essas colunas têm posto completo, então o novo bloco líder é não singular
+# e det(M) = (-1)^trocas * det(PM). Permutar apenas linhas é suficiente para qualquer M não singular.
+# ======================================================================================================================================
+
+BLOCO_LU = 64
+
+# Razão mínima entre o menor e o maior pivô de U para aceitar A sem pivotamento em bloco
+LIMIAR_PIVO = 1e-12
+
+
+def fatorar_lu(A, bloco=BLOCO_LU):
+    """
+    Fatoração LU com pivotamento parcial por linhas, em blocos (right-looking), em NumPy puro: é o caminho de
+    fatorar_lu_rapido() quando scipy não está disponível.
+
+    A pode ser retangular (n x k, com n >= k). Retorna (LU, piv, trocas): L (diagonal unitária, abaixo
+    da diagonal) e U compartilham a matriz LU, a linha i de PA é A[piv[i]] e `trocas` é o número de
+    transposições de linhas realizadas. Lança np.linalg.LinAlgError se algum pivô for exatamente zero.
+    """
+    LU = np.array(A, dtype=np.float64, copy=True)
+    n, n_colunas = LU.shape
+    piv = np.arange(n)
+    trocas = 0
+
+    for k in range(0, n_colunas, bloco):
+        fim = min(k + bloco, n_colunas)
+
+        # Fatoração do painel LU[k:, k:fim] coluna a coluna
+        for j in range(k, fim):
+            p = j + int(np.argmax(np.abs(LU[j:, j])))
+            if LU[p, j] == 0.0:
+                raise np.linalg.LinAlgError("Matriz singular")
+            if p != j:
+                LU[[j, p], :] = LU[[p, j], :]
+                piv[[j, p]] = piv[[p, j]]
+                trocas += 1
+            LU[j + 1:, j] /= LU[j, j]
+            LU[j + 1:, j + 1:fim] -= np.outer(LU[j + 1:, j], LU[j, j + 1:fim])
+
+        if fim < n_colunas:
+            # U12 = L11⁻¹ A12 e atualização do complemento (um único GEMM)
+            LU[k:fim, fim:] = resolver_triangular(LU[k:fim, k:fim], LU[k:fim, fim:], inferior=True)
+            LU[fim:, fim:] -= LU[fim:, k:fim] @ LU[k:fim, fim:]
+
+    return LU, piv, trocas
+
+
+def bem_condicionado(LU, limiar=LIMIAR_PIVO):
+    """Critério barato de condicionamento: menor pivô de U relativo ao maior."""
+    pivos = np.abs(np.diag(LU))
+    return pivos.size == 0 or pivos.min() > limiar * pivos.max()
+
+
+def razao_pivos(*fatores):
+    """Menor |pivô| de U relativo ao maior, considerando as diagonais de todos os LU dados (ex.: o de A e o de S)."""
+    pivos = np.concatenate([np.abs(np.diag(LU)) for LU in fatores])
+    return float(pivos.min() / pivos.max()) if pivos.size and pivos.max() > 0 else 0.0
+
+
+def fatorar_lu_rapido(M):
+    """
+    Mesma saída de fatorar_lu() (LU, piv, trocas), pelo getrf do LAPACK (scipy.linalg.lu_factor) quando scipy está
+    disponível. M pode ser retangular (n x k, com n >= k), como o painel de escolher_permutacao(). Um pivô
+    exatamente nulo lança np.linalg.LinAlgError nos dois caminhos.
+    """
+    if lu_factor is None:
+        return fatorar_lu(M)
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # LinAlgWarning de pivô nulo: verificado abaixo
+        LU, ipiv = lu_factor(M, check_finite=False)
+    if not np.all(np.diag(LU)):
+        raise np.linalg.LinAlgError("Matriz singular")
+    # ipiv do LAPACK (linha i trocada com ipiv[i], em sequência, para as k colunas) -> permutação das n linhas no formato de
+    # fatorar_lu (PA = A[piv])
+    piv = list(range(LU.shape[0]))
+    for i, p in enumerate(ipiv.tolist()):
+        piv[i], piv[p] = piv[p], piv[i]
+    return LU, np.array(piv), int(np.count_nonzero(ipiv != np.arange(ipiv.size)))
+
+
+def slogdet_com_limiar(M, limiar=0.0):
+    """
+    (sinal, log|det(M)|) pela LU de M; com `limiar` > 0, M é tratada como singular (0.0, -inf) se razao_pivos() <= limiar.
+    É a mesma regra que determinante_paralelo aplica aos pivôs de A e de S com --limiar-singular.
+    """
+    try:
+        LU, _, trocas = fatorar_lu_rapido(M)
+    except np.linalg.LinAlgError:
+        return 0.0, -np.inf
+    if limiar > 0 and razao_pivos(LU) <= limiar:
+        return 0.0, -np.inf
+    return slogdet_lu(LU, trocas)
+
+
+def slogdet_schur_com_limiar(LU_A, S, limiar=0.0, fatores_S=None):
+    """
+    (sinalS, log|det(S)|, fatores_S) do complemento de Schur S = D - C A⁻¹ B, com a regra de slogdet_com_limiar() aplicada
+    aos pivôs de A e de S juntos: com `limiar` > 0, M é tratada como singular (sinalS = 0) se razao_pivos(LU_A, LU_S) <= limiar.
+
+    fatores_S = (LU_S, piv_S, trocas_S) é a LU de S (None se S tiver um pivô exatamente nulo) e pode ser passado já calculado.
+    """
+    if fatores_S is None:
+        try:
+            fatores_S = fatorar_lu_rapido(S)
+        except np.linalg.LinAlgError:
+            return 0.0, -np.inf, None
+    LU_S, _, trocas_S = fatores_S
+    if limiar > 0 and razao_pivos(LU_A, LU_S) <= limiar:
+        return 0.0, -np.inf, fatores_S
+    sinalS, logS = slogdet_lu(LU_S, trocas_S)
+    return sinalS, logS, fatores_S
+
+
+def escolher_permutacao(M, k):
+    """
+    Pivotamento em bloco: permutação das linhas de M que torna o bloco líder k x k não singular.
+
+    Retorna (perm, trocas, LU_lider): M[perm] tem como bloco líder A' = L11 U, cuja fatoração (sem trocas
+    adicionais) é LU_lider. Lança np.linalg.LinAlgError se as k primeiras colunas de M não tiverem posto
+    completo, ou seja, se M for singular.
+    """
+    LU_painel, perm, trocas = fatorar_lu_rapido(M[:, :k])
+    return perm, trocas, LU_painel[:k].copy()
+
+
+def fatorar_bloco_lider(M, k, limiar=LIMIAR_PIVO):
+    """
+    Fatora A = M[:k, :k]; se A for singular ou mal condicionada (critério de bem_condicionado()),
+    recorre a escolher_permutacao().
+
+    Retorna (perm, trocas_perm, LU, piv, trocas), com perm = None quando A foi usada sem permutação.
+    Lança np.linalg.LinAlgError se M for singular.
+    """
+    try:
+        LU, piv, trocas = fatorar_lu_rapido(M[:k, :k])
+        if bem_condicionado(LU, limiar):
+            return None, 0, LU, piv, trocas
+    except np.linalg.LinAlgError:
+        pass
+
+    perm, trocas_perm, LU = escolher_permutacao(M, k)
+    return perm, trocas_perm, LU, np.arange(k), 0
+
+
+def det_lu(LU, trocas):
+    """det(A) a partir da diagonal de U e da paridade das trocas de linhas."""
+    sinal = -1.0 if trocas % 2 else 1.0
+    return sinal * np.prod(np.diag(LU))
+
+
+def slogdet_lu(LU, trocas):
+    """(sinal, log|det(A)|) a partir do LU, no mesmo formato de np.linalg.slogdet (sem overflow/underflow)."""
+    diagonal = np.diag(LU)
+    sinal = (-1.0 if trocas % 2 else 1.0) * float(np.prod(np.sign(diagonal)))
+    if sinal == 0:
+        return 0.0, -np.inf
+    return sinal, float(np.sum(np.log(np.abs(diagonal))))
+
+
+def resolver_triangular(T, B, inferior, bloco=BLOCO_LU, unitaria=None):
+    """
+    Resolve T X = B por substituição em blocos. Com inferior=True usa a parte estritamente inferior de T
+    com diagonal unitária (L); caso contrário usa a parte superior com a diagonal (U). `unitaria` troca o
+    tratamento da diagonal (usado pelas substituições transpostas, com Uᵀ inferior e Lᵀ superior).
+    """
+    if unitaria is None:
+        unitaria = inferior
+    if solve_triangular is not None:
+        return solve_triangular(T, np.asarray(B, dtype=np.float64), lower=inferior, unit_diagonal=unitaria, check_finite=False)
+    X = np.array(B, dtype=np.float64, copy=True)
+    n = T.shape[0]
+    inicios = list(range(0, n, bloco))
+    if not inferior:
+        inicios.reverse()
+
+    for k in inicios:
+        fim = min(k + bloco, n)
+        Tkk = np.tril(T[k:fim, k:fim], -int(unitaria)) if inferior else np.triu(T[k:fim, k:fim], int(unitaria))
+        if unitaria:
+            Tkk += np.eye(fim - k)
+        X[k:fim] = np.linalg.solve(Tkk, X[k:fim])
+        if inferior:
+            X[fim:] -= T[fim:, k:fim] @ X[k:fim]
+        else:
+            X[:k] -= T[:k, k:fim] @ X[k:fim]
+    return X
+
+
+def resolver_lu(LU, piv, B):
+    """X = A⁻¹B a partir de PA = LU."""
+    Y = resolver_triangular(LU, B[piv], inferior=True)
+    return resolver_triangular(LU, Y, inferior=False)
+
+
+def resolver_lu_transposto(LU, piv, B):
+    """X = A⁻ᵀB a partir de PA = LU (Aᵀ = Uᵀ Lᵀ P)."""
+    if solve_triangular is not None:
+        Y = solve_triangular(LU, np.asarray(B, dtype=np.float64), trans="T", lower=False, check_finite=False)
+        Y = solve_triangular(LU, Y, trans="T", lower=True, unit_diagonal=True, check_finite=False)
+    else:
+        Y = resolver_triangular(LU.T, B, inferior=True, unitaria=False)
+        Y = resolver_triangular(LU.T, Y, inferior=False, unitaria=True)
+    X = np.empty_like(Y)
+    X[piv] = Y
+    return X
+
+
+def estimar_condicao_1(A, LU, piv, iteracoes=5):
+    """
+    Estimativa determinística de κ₁(A) = ‖A‖₁ ‖A⁻¹‖₁ (estimador de Hager-Higham, o mesmo do xGECON do LAPACK).
+
+    ‖A⁻¹‖₁ é estimada com poucas substituições com o LU já calculado (PA = LU), em O(iteracoes · n²), sem formar A⁻¹.
+    É um limite inferior quase sempre exato a menos de um fator pequeno.
+    """
+    n = LU.shape[0]
+    if n == 0:
+        return 1.0
+    LU = np.asfortranarray(LU)  # uma cópia só, em vez de uma por substituição no LAPACK
+    x = np.full((n, 1), 1.0 / n)
+    norma_inversa = 0.0
+    for _ in range(iteracoes):
+        y = resolver_lu(LU, piv, x)
+        nova = float(np.abs(y).sum())
+        if nova <= norma_inversa:
+            break
+        norma_inversa = nova
+        z = resolver_lu_transposto(LU, piv, np.where(y >= 0, 1.0, -1.0))
+        j = int(np.argmax(np.abs(z)))
+        if abs(z[j, 0]) <= float(z[:, 0] @ x[:, 0]):
+            break
+        x = np.zeros((n, 1))
+        x[j] = 1.0
+    # Vetor alternativo de Higham, que cobre os casos em que as iterações param cedo demais
+    b = ((-1.0) ** np.arange(n) * (1.0 + np.arange(n) / max(n - 1, 1)))[:, None]
+    norma_inversa = max(norma_inversa, 2.0 * float(np.abs(resolver_lu(LU, piv, b)).sum()) / (3.0 * n))
+    return float(np.abs(A).sum(axis=0).max()) * norma_inversa
+
+
+def resolver_distribuido(comm, LU, piv, B, leitor_B=None):
+    """
+    Calcula X = A⁻¹B dividindo as colunas de B entre os processos de `comm`; cada processo faz as
+    substituições triangulares das suas colunas com o LU (já fatorado no rank 0 e replicado por Bcast).
+
+    Operação coletiva: LU, piv e B só precisam existir no rank 0, o único que recebe X.
+    Com `leitor_B` (em todos os processos), cada processo lê as suas colunas com leitor_B(indices_colunas)
+    em vez de recebê-las do rank 0.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    with fase("distribuicao"):
+        formas = comm.bcast((LU.shape[0], B.shape[1]) if rank == 0 else None, root=0)
+        n, m = formas
+
+        if rank == 0:
+            LU = contiguo(LU)
+            piv = np.ascontiguousarray(piv, dtype=np.int64)
+            B_t = contiguo(B.T) if leitor_B is None else None  # colunas de B como linhas contíguas
+        else:
+            LU = np.empty((n, n), dtype=np.float64)
+            piv = np.empty(n, dtype=np.int64)
+            B_t = None
+
+        comm.Bcast(LU, root=0)
+        comm.Bcast(piv, root=0)
+
+        partes = particionar_linhas(m, size)
+        contagens, deslocamentos = contagens_deslocamentos(partes, n)
+
+        if leitor_B is not None:
+            B_local_t = contiguo(leitor_B(partes[rank]).T)
+        else:
+            B_local_t = np.empty((len(partes[rank]), n), dtype=np.float64)
+            comm.Scatterv([B_t, contagens, deslocamentos, MPI.DOUBLE] if rank == 0 else None, B_local_t, root=0)
+
+    with fase("resolucao"):
+        X_local_t = contiguo(resolver_lu(LU, piv, B_local_t.T).T)
+
+    with fase("coleta"):
+        X_t = np.empty((m, n), dtype=np.float64) if rank == 0 else None
+        comm.Gatherv(X_local_t, [X_t, contagens, deslocamentos, MPI.DOUBLE] if rank == 0 else None, root=0)
+
+    return X_t.T if rank == 0 else None
+
+
+# ======================================================================================================================================
+# Precisão mista: T̃ = C X em float32 e S̃ = D - T̃ em float64.
+# Antes de qualquer trabalho em float32, κ₁(A) (estimar_condicao_1) prevê se o modo tem chance de atingir a tolerância: X = A⁻¹B
+# cresce com κ(A) e o cancelamento em C X amplifica o arredondamento de float32. Nas matrizes de teste (densas, simétricas,
+# Wishart, kernels), o erro estimado a posteriori nunca ficou abaixo de FATOR_CONDICAO_MISTA · u · κ₁(A) quando κ₁(A) > 1e3.
+# ======================================================================================================================================
+
+ARREDONDAMENTO_FLOAT32 = 2.0 ** -24
+FATOR_CONDICAO_MISTA = 1e-3
+
+
+def erro_previsto_misto(condicao_A):
+    """Previsão a priori (conservadora) do erro de log|det(S̃)| em precisão mista, a partir de κ₁(A)."""
+    return FATOR_CONDICAO_MISTA * ARREDONDAMENTO_FLOAT32 * condicao_A
+
+
+def corrigir_diagonal_schur(S, C, D, X):
+    """
+    Refaz em float64, no lugar, a diagonal de S = D - C X montada com T̃ = C X em float32 (precisão mista):
+    S[i, i] = D[i, i] - C[i, :] · X[:, i], em O(n · m).
+
+    O erro de arredondamento da diagonal de T̃ é o único sistemático em log|det(S̃)| (em matrizes simétricas
+    definidas positivas, os termos de C[i, :] · X[:, i] têm o mesmo sinal); o das demais entradas se cancela no traço.
+    """
+    indices = np.diag_indices(S.shape[0])
+    S[indices] = np.diag(D) - np.einsum("ij,ji->i", C, X)
+    return S
+
+
+def estimar_erro_misto(S, C, D, X, LU_S, piv_S, sondas=8, semente=0):
+    """
+    Erro estimado de log|det(S̃)| em relação a log|det(S)|, com S̃ montada em precisão mista (e a diagonal corrigida).
+
+    Com F = S̃⁻¹ S - I, log|det(S)| - log|det(S̃)| = log|det(I + F)| ~ tr(F). Os resíduos S z = D z - C (X z) são
+    aplicados em float64 só com produtos matriz-vetor e resolvidos com o LU de S̃ (PS̃ = LU): F z = S̃⁻¹ (S z) - z.
+    ‖F‖_F é estimada com sondas de Rademacher de semente fixa (a estimativa de uma norma não depende de cancelamento,
+    ao contrário da do traço) e, como as entradas de F fora da diagonal se cancelam no traço, o erro estimado é
+    3 ‖F‖_F / sqrt(m). Custa O(sondas · (n · m + m²)), contra O(n · m²) do GEMM em float64.
+    """
+    m = S.shape[0]
+    rng = np.random.default_rng(semente)
+    Z = rng.choice([-1.0, 1.0], size=(m, sondas))
+    SZ = D @ Z - C @ (X @ Z)
+    FZ = resolver_lu(LU_S, piv_S, SZ) - Z
+    norma_F = float(np.sqrt(np.sum(FZ * FZ) / sondas))
+    return 3.0 * norma_F / np.sqrt(m)
+
+
+def combinar_slogdet(*pares):
+    """Combina pares (sinal, log|det|) de um produto de determinantes: sinais multiplicam, logaritmos somam."""
+    sinal, logabs = 1.0, 0.0
+    for s, l in pares:
+        sinal *= s
+        logabs += l
+    if sinal == 0:
+        return 0.0, -np.inf
+    return sinal, logabs
+
+
+def formatar_slogdet(sinal, logabs, precisao=6):
+    """Representa sinal * exp(logabs) em notação científica base 10, mesmo fora da faixa do float64."""
+    if sinal == 0:
+        return "0"
+    expoente10 = logabs / np.log(10)
+    expoente = int(np.floor(expoente10))
+    mantissa = sinal * 10 ** (expoente10 - expoente)
+    return f"{mantissa:.{precisao}f}e{expoente:+d}"
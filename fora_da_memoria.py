@@ -0,0 +1,187 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from distribuicao import contiguo, particionar_linhas
+from fatoracao import combinar_slogdet, fatorar_bloco_lider, resolver_lu, slogdet_lu
+from instrumentacao import fase
+from leitura_matriz import como_slice, ler_bloco
+
+# ======================================================
+# Complemento de Schur fora da memória (matrizes maiores que a RAM)
+# ======================================================
+
+# ======================================================================================================================================
+# No modo normal o coordenador guarda M, A, B, C, D, X, T e S ao mesmo tempo. Aqui nenhum processo guarda mais que o orçamento de
+# memória (--memoria-max): M é lida por tiles do arquivo mapeado e os resultados intermediários vão para o disco.
+#
+# Em cada nível, com M (n x n) em um arquivo:
+#   1. A = M[:k, :k], com k escolhido pelo orçamento (k <= n/2), é fatorada no rank 0 (com pivotamento em bloco se preciso) e
+#      replicada; det(A) é acumulado.
+#   2. Xᵀ = (A⁻¹B)ᵀ é gravada em um arquivo temporário: cada processo resolve as suas colunas de B, em tiles lidos do arquivo de M.
+#   3. S = D - C·X é gravada em outro arquivo temporário: cada processo calcula as suas linhas de S em tiles (linhas de C) x (linhas
+#      de Xᵀ), enquanto uma thread já lê o tile seguinte de Xᵀ e de D (a leitura do disco fica sobreposta ao GEMM).
+#   4. O arquivo de S passa a ser a matriz do próximo nível, até que ela caiba inteira no orçamento do rank 0 (slogdet direto).
+#
+# É uma LU em blocos "right-looking" com painéis do tamanho que a memória permite: O(n³) operações no total e O(n³/k) de leitura
+# do disco. Os arquivos temporários (--temporario) precisam estar em um sistema de arquivos visível por todos os processos; ocupam
+# no máximo cerca do tamanho de M e são apagados a cada nível. O pivotamento em bloco (A singular ou mal condicionada) lê o painel
+# M[:, :k] inteiro no rank 0.
+# ======================================================================================================================================
+
+MB = 1024 * 1024
+
+
+def dimensao_painel(n, orcamento):
+    """k do bloco líder de cada nível: A (k x k) e o seu LU ocupam até 1/3 do orçamento; no máximo n/2."""
+    return int(max(1, min(n // 2, np.sqrt(orcamento / (3 * 8)))))
+
+
+def dimensao_tile(k, orcamento):
+    """
+    Linhas por tile: com o LU (k x k) replicado, cada processo guarda um tile de C, dois de Xᵀ (o atual e o antecipado),
+    dois de D e um de S; os tiles (r x k e r x r, r <= k) cabem nos 2/3 restantes do orçamento.
+    """
+    restante = max(orcamento - 8 * k * k, orcamento // 3)
+    return int(max(1, min(k, restante // (8 * 6 * k))))
+
+
+def com_antecipacao(leituras):
+    """Executa as leituras (funções sem argumentos) em ordem; enquanto uma é consumida, a seguinte já roda em uma thread."""
+    leituras = iter(leituras)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        proxima = next(leituras, None)
+        pendente = executor.submit(proxima) if proxima is not None else None
+        while pendente is not None:
+            atual = pendente.result()
+            proxima = next(leituras, None)
+            pendente = executor.submit(proxima) if proxima is not None else None
+            yield atual
+
+
+def _tiles(indices, tamanho):
+    """Faixas (inicio, fim) consecutivas de até `tamanho` elementos cobrindo `indices` (faixa contígua)."""
+    if len(indices) == 0:
+        return []
+    inicio, fim = int(indices[0]), int(indices[-1]) + 1
+    return [(i, min(i + tamanho, fim)) for i in range(inicio, fim, tamanho)]
+
+
+def _ler_tile_S(M, linhas_C, n1, X_t, i0, i1, j0, j1, ler_C):
+    C = ler_bloco(M, como_slice(linhas_C[i0:i1]), slice(0, n1)) if ler_C else None
+    X_t_j = np.ascontiguousarray(X_t[j0:j1])
+    D = ler_bloco(M, como_slice(linhas_C[i0:i1]), slice(n1 + j0, n1 + j1))
+    return C, X_t_j, D, i0, i1, j0, j1
+
+
+def _criar_arquivos(comm, temporario, nivel, m, n1):
+    """Cria (no rank 0) os arquivos de Xᵀ (m x n1) e S (m x m) do nível e os abre para escrita em todos os processos."""
+    if comm.Get_rank() == 0:
+        base = os.path.join(temporario, f"schur_{os.getpid()}_{nivel}")
+        caminhos = (base + "_X.npy", base + "_S.npy")
+        np.lib.format.open_memmap(caminhos[0], mode="w+", dtype=np.float64, shape=(m, n1)).flush()
+        np.lib.format.open_memmap(caminhos[1], mode="w+", dtype=np.float64, shape=(m, m)).flush()
+    else:
+        caminhos = None
+    caminhos = comm.bcast(caminhos, root=0)
+    return caminhos, [np.load(caminho, mmap_mode="r+") for caminho in caminhos]
+
+
+def _remover(comm, *caminhos):
+    comm.Barrier()
+    if comm.Get_rank() == 0:
+        for caminho in caminhos:
+            if caminho is not None and os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def slogdet_fora_da_memoria(comm, M, orcamento=1024 * MB, temporario=None):
+    """
+    Operação coletiva: (sinal, log|det(M)|, niveis) no rank 0 (None nos demais), com no máximo cerca de `orcamento` bytes
+    de matriz em memória por processo. M deve ser o np.memmap do arquivo de entrada, aberto em todos os processos.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    temporario = temporario or tempfile.gettempdir()
+
+    acumulado = (1.0, 0.0)
+    atual, arquivo_atual = M, None
+    niveis = 0
+    while True:
+        n = atual.shape[0]
+
+        # Caso base: a matriz do nível cabe inteira no orçamento do rank 0
+        if n * n * 8 <= orcamento or n < 2:
+            if rank == 0:
+                with fase("det_S"):
+                    acumulado = combinar_slogdet(acumulado, tuple(float(v) for v in np.linalg.slogdet(np.array(atual))))
+            del atual
+            _remover(comm, arquivo_atual)
+            return (*acumulado, niveis) if rank == 0 else None
+
+        niveis += 1
+        n1 = dimensao_painel(n, orcamento)
+        m = n - n1
+
+        # 1. LU do bloco líder no rank 0 (pivotamento em bloco se A for singular ou mal condicionada), replicado por Bcast
+        if rank == 0:
+            try:
+                with fase("fatoracao"):
+                    perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(atual, n1)
+                cabecalho = (True, perm)
+            except np.linalg.LinAlgError:
+                cabecalho = (False, None)
+        else:
+            cabecalho = None
+        continuar, perm = comm.bcast(cabecalho, root=0)
+        if not continuar:
+            # As primeiras k colunas da matriz do nível são linearmente dependentes: det(M) = 0
+            del atual
+            _remover(comm, arquivo_atual)
+            return (0.0, -np.inf, niveis) if rank == 0 else None
+
+        with fase("distribuicao"):
+            if rank != 0:
+                LU = np.empty((n1, n1), dtype=np.float64)
+                piv = np.empty(n1, dtype=np.int64)
+            else:
+                LU = contiguo(LU)  # o LU do LAPACK vem em ordem Fortran
+                piv = np.ascontiguousarray(piv, dtype=np.int64)
+                acumulado = combinar_slogdet(acumulado, (-1.0 if trocas_perm % 2 else 1.0, 0.0), slogdet_lu(LU, trocas))
+            comm.Bcast(LU, root=0)
+            comm.Bcast(piv, root=0)
+
+        ordem = perm if perm is not None else np.arange(n)
+        linhas_A = como_slice(ordem[:n1])
+        linhas_C = ordem[n1:]
+        tile = dimensao_tile(n1, orcamento)
+        (caminho_X, caminho_S), (X_t, S) = _criar_arquivos(comm, temporario, niveis, m, n1)
+        minhas = particionar_linhas(m, size)[rank]
+
+        # 2. Xᵀ = (A⁻¹B)ᵀ: as colunas de B deste processo, tile a tile
+        leituras = (partial(ler_bloco, atual, linhas_A, slice(n1 + j0, n1 + j1)) for j0, j1 in _tiles(minhas, tile))
+        for (j0, j1), B in zip(_tiles(minhas, tile), com_antecipacao(leituras)):
+            with fase("resolucao"):
+                X_t[j0:j1] = resolver_lu(LU, piv, B).T
+        X_t.flush()
+        del LU
+        comm.Barrier()
+
+        # 3. S = D - C·X: as linhas de S deste processo, em tiles (linhas de C) x (linhas de Xᵀ)
+        leituras = (partial(_ler_tile_S, atual, linhas_C, n1, X_t, i0, i1, j0, j1, j0 == 0)
+                    for i0, i1 in _tiles(minhas, tile) for j0, j1 in _tiles(np.arange(m), tile))
+        for C_novo, X_t_j, D, i0, i1, j0, j1 in com_antecipacao(leituras):
+            if C_novo is not None:
+                C = C_novo
+            with fase("gemm"):
+                S[i0:i1, j0:j1] = D - C @ X_t_j.T
+        S.flush()
+        del X_t, S
+
+        # 4. S é a matriz do próximo nível
+        del atual
+        _remover(comm, arquivo_atual, caminho_X)
+        atual, arquivo_atual = np.load(caminho_S, mmap_mode="r"), caminho_S
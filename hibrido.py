@@ -0,0 +1,185 @@
+import argparse
+import os
+import socket
+
+# ======================================================
+# Modo híbrido: MPI entre processos + BLAS multithread em cada processo
+# ======================================================
+
+# ======================================================================================================================================
+# Cada processo MPI carrega o seu próprio BLAS (OpenBLAS/MKL), que por padrão abre uma thread por núcleo do nó. Com p processos
+# no mesmo nó isso dá p * núcleos threads disputando os mesmos núcleos. Aqui a quantidade de threads do BLAS de cada processo é
+# ajustada para min(núcleos da afinidade do processo, núcleos do nó / processos no nó):
+#
+#   configurar_ambiente() - chamada pelo script principal ANTES do primeiro import do NumPy: define OMP_NUM_THREADS,
+#                           OPENBLAS_NUM_THREADS, MKL_NUM_THREADS, ... a partir da quantidade de processos no nó informada pelo
+#                           lançador (OMPI_COMM_WORLD_LOCAL_SIZE, MPI_LOCALNRANKS, ...). Variáveis já definidas pelo usuário
+#                           são respeitadas. Com --backend threads/processos, os "processos no nó" são os trabalhadores.
+#   ajustar_threads()     - com o NumPy já carregado (uso como biblioteca), muda as threads em tempo de execução pelo threadpoolctl,
+#                           se estiver instalado (dependência opcional).
+#   posicionamento()      - operação coletiva: nó, rank local, CPUs da afinidade e threads do BLAS de cada processo, para o
+#                           relatório impresso no início do modo --hibrido.
+# ======================================================================================================================================
+
+VARIAVEIS_THREADS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS",
+                     "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# Processos no nó, como informados pelos lançadores mais comuns (Open MPI, MPICH/Hydra e Intel MPI, MVAPICH, Slurm)
+VARIAVEIS_PROCESSOS_NO = ("OMPI_COMM_WORLD_LOCAL_SIZE", "MPI_LOCALNRANKS", "MV2_COMM_WORLD_LOCAL_SIZE", "SLURM_NTASKS_PER_NODE")
+
+
+def nucleos_do_no():
+    return os.cpu_count() or 1
+
+
+def cpus_da_afinidade():
+    """CPUs em que este processo pode executar (o lançador pode ter fixado o processo em alguns núcleos)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(nucleos_do_no()))
+
+
+def processos_no_no_do_ambiente():
+    """Quantidade de processos MPI neste nó segundo o lançador, ou None se não for informada."""
+    for variavel in VARIAVEIS_PROCESSOS_NO:
+        valor = os.environ.get(variavel, "").split("(")[0]  # Slurm: "4(x2)"
+        if valor.isdigit() and int(valor) > 0:
+            return int(valor)
+    return None
+
+
+def threads_por_processo(processos_no_no, cpus=None):
+    """Threads do BLAS para cada um dos `processos_no_no` processos: os núcleos do nó divididos entre eles."""
+    cpus = cpus if cpus is not None else cpus_da_afinidade()
+    return max(1, min(len(cpus), nucleos_do_no() // max(1, processos_no_no)))
+
+
+def threads_definidas_pelo_usuario():
+    """Valor de OMP_NUM_THREADS/OPENBLAS_NUM_THREADS/... definido fora do programa, ou None."""
+    for variavel in VARIAVEIS_THREADS:
+        if os.environ.get(variavel, "").isdigit():
+            return int(os.environ[variavel])
+    return None
+
+
+def configurar_ambiente(argv=None):
+    """
+    Define as variáveis de threads do BLAS antes do import do NumPy (depois dele não têm efeito).
+
+    Usa --threads-blas N da linha de comando, se houver; senão, se o usuário não definiu nenhuma variável, divide os
+    núcleos do nó entre os processos do nó (ou entre os --trabalhadores dos backends de memória compartilhada).
+    Retorna a quantidade de threads definida, ou None se nada foi alterado.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--threads-blas", type=int, default=0)
+    parser.add_argument("--backend", default="mpi")
+    parser.add_argument("--trabalhadores", type=int, default=0)
+    opcoes, _ = parser.parse_known_args(argv)
+
+    if opcoes.threads_blas > 0:
+        threads = opcoes.threads_blas
+    elif threads_definidas_pelo_usuario() is not None:
+        return None
+    elif opcoes.backend != "mpi":
+        threads = threads_por_processo(opcoes.trabalhadores or nucleos_do_no())
+    else:
+        processos = processos_no_no_do_ambiente()
+        if processos is None:
+            return None
+        threads = threads_por_processo(processos)
+
+    for variavel in VARIAVEIS_THREADS:
+        os.environ[variavel] = str(threads)
+    return threads
+
+
+def threads_blas_atuais():
+    """Threads do BLAS em uso (threadpoolctl, se instalado; senão o valor das variáveis de ambiente), ou None."""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return threads_definidas_pelo_usuario()
+    blas = [pool["num_threads"] for pool in threadpool_info() if pool.get("user_api") == "blas"]
+    return max(blas) if blas else threads_definidas_pelo_usuario()
+
+
+def threads_automaticas(comm):
+    """Threads do BLAS definidas pelo usuário ou, se não houver, os núcleos do nó divididos entre os processos do nó."""
+    from mpi4py import MPI
+
+    definidas = threads_definidas_pelo_usuario()
+    if definidas is not None:
+        return definidas
+    local = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    try:
+        return threads_por_processo(local.Get_size())
+    finally:
+        local.Free()
+
+
+def ajustar_threads(threads):
+    """Muda as threads do BLAS já carregado (threadpoolctl). Retorna False se não for possível."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return False
+    threadpool_limits(limits=threads, user_api="blas")
+    return True
+
+
+def posicionamento(comm):
+    """
+    Operação coletiva: lista (no rank 0) com nó, rank local, processos no nó, CPUs da afinidade e threads do BLAS
+    de cada processo de `comm`; os demais recebem None.
+    """
+    from mpi4py import MPI
+
+    local = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    try:
+        dados = {
+            "rank": comm.Get_rank(),
+            "no": socket.gethostname(),
+            "rank_local": local.Get_rank(),
+            "processos_no_no": local.Get_size(),
+            "nucleos_no_no": nucleos_do_no(),
+            "cpus": cpus_da_afinidade(),
+            "threads_blas": threads_blas_atuais(),
+        }
+    finally:
+        local.Free()
+    return comm.gather(dados, root=0)
+
+
+def _intervalos_de_cpus(cpus):
+    """[0, 1, 2, 5] -> '0-2,5'."""
+    partes = []
+    for cpu in cpus:
+        if partes and cpu == partes[-1][1] + 1:
+            partes[-1][1] = cpu
+        else:
+            partes.append([cpu, cpu])
+    return ",".join(f"{a}-{b}" if a != b else f"{a}" for a, b in partes)
+
+
+def imprimir_posicionamento(processos):
+    """Tabela do posicionamento (rank 0), com avisos de núcleos superocupados ou processos fixados em um único núcleo."""
+    print("------------------------------------------------------------------------------------")
+    print("Posicionamento (MPI + BLAS multithread)")
+    print(f"{'rank':<6}{'no':<20}{'local':>8}{'cpus':>14}{'threads BLAS':>15}")
+    for p in processos:
+        threads = p["threads_blas"] if p["threads_blas"] is not None else "?"
+        print(f"{p['rank']:<6}{p['no'][:19]:<20}{p['rank_local']:>4}/{p['processos_no_no']:<3}"
+              f"{_intervalos_de_cpus(p['cpus']):>14}{threads:>15}")
+
+    nos = {}
+    for p in processos:
+        nos.setdefault(p["no"], []).append(p)
+    for no, lista in nos.items():
+        threads = sum(p["threads_blas"] or 1 for p in lista)
+        nucleos = lista[0]["nucleos_no_no"]
+        if threads > nucleos:
+            print(f"AVISO: {no}: {threads} threads para {nucleos} nucleos (superocupacao); use --threads-blas ou menos processos por no.")
+        elif all(len(p["cpus"]) == 1 for p in lista) and len(lista) < nucleos:
+            print(f"AVISO: {no}: cada processo esta fixado em um unico nucleo pelo lancador; use, por exemplo, "
+                  f"mpiexec --bind-to none ou --map-by ppr:<processos>:node:pe=<threads>.")
+    print("------------------------------------------------------------------------------------")
@@ -0,0 +1,239 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+from mpi4py import MPI
+
+# ======================================================
+# Instrumentação: tempo por fase e bytes comunicados por processo
+# ======================================================
+
+# ======================================================================================================================================
+# Cada processo acumula o tempo de cada fase (leitura, estrutura, divisao, fatoracao, distribuicao, resolucao, gemm, coleta, det_S,
+# quadratura, verificacao) com o gerenciador de contexto fase(). As fases podem ser aninhadas: o tempo é exclusivo, ou seja, enquanto uma
+# fase interna está ativa o relógio da fase externa fica parado, então a soma das fases nunca ultrapassa o tempo total.
+#
+# Os bytes são contados por instrumentar(comm), que devolve o mesmo comunicador com Send/Recv/Isend/Irecv/Bcast/Scatterv/Gatherv/Allgatherv
+# contabilizando o tamanho dos buffers tipados na fase ativa (volume lógico: um Bcast conta o buffer (p - 1) vezes na raiz).
+# Sub-comunicadores criados a partir dele (Split, Create_cart, Sub) também são instrumentados.
+#
+# Ao final, reunir() junta as métricas de todos os processos no rank 0, que calcula o desbalanceamento (máximo / média) por fase
+# e o tempo ocioso de cada processo (tempo total menos o tempo das fases de cálculo).
+# ======================================================================================================================================
+
+FASES_CALCULO = ("leitura", "estrutura", "divisao", "fatoracao", "resolucao", "gemm", "det_S", "quadratura", "verificacao")
+
+_tempos = defaultdict(float)
+_enviados = defaultdict(int)
+_recebidos = defaultdict(int)
+_pilha = []
+
+
+def zerar():
+    """Descarta todas as métricas acumuladas neste processo."""
+    _tempos.clear()
+    _enviados.clear()
+    _recebidos.clear()
+    _pilha.clear()
+
+
+def _fase_ativa():
+    return _pilha[-1][0] if _pilha else "outros"
+
+
+@contextmanager
+def fase(nome):
+    """Mede o tempo (exclusivo) gasto no bloco `with` e atribui a ele os bytes comunicados."""
+    agora = time.perf_counter()
+    if _pilha:
+        externo, inicio = _pilha[-1]
+        _tempos[externo] += agora - inicio
+    _pilha.append((nome, agora))
+    try:
+        yield
+    finally:
+        agora = time.perf_counter()
+        _, inicio = _pilha.pop()
+        _tempos[nome] += agora - inicio
+        if _pilha:
+            _pilha[-1] = (_pilha[-1][0], agora)
+
+
+def registrar_envio(nbytes):
+    _enviados[_fase_ativa()] += int(nbytes)
+
+
+def registrar_recebimento(nbytes):
+    _recebidos[_fase_ativa()] += int(nbytes)
+
+
+def _buffer(espec):
+    """Array de uma especificação de buffer do mpi4py (array ou [array, contagens, deslocamentos, tipo])."""
+    if isinstance(espec, (list, tuple)):
+        return espec[0], (espec[1] if len(espec) > 2 else None)
+    return espec, None
+
+
+def _nbytes(espec):
+    buf, _ = _buffer(espec)
+    return 0 if buf is None else np.asarray(buf).nbytes
+
+
+def _bytes_contagens(espec):
+    buf, contagens = _buffer(espec)
+    if buf is None or contagens is None:
+        return _nbytes(espec)
+    return int(np.sum(contagens)) * np.asarray(buf).itemsize
+
+
+class _ContagemMixin:
+    """Sobrepõe as operações com buffers tipados do comunicador para contabilizar bytes."""
+
+    def Send(self, buf, dest, tag=0):
+        registrar_envio(_nbytes(buf))
+        return super().Send(buf, dest, tag)
+
+    def Recv(self, buf, source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=None):
+        resultado = super().Recv(buf, source, tag, status)
+        registrar_recebimento(_nbytes(buf))
+        return resultado
+
+    def Isend(self, buf, dest, tag=0):
+        registrar_envio(_nbytes(buf))
+        return super().Isend(buf, dest, tag)
+
+    def Irecv(self, buf, source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG):
+        # Contabilizado ao postar o recebimento (o buffer tem o tamanho da mensagem esperada)
+        registrar_recebimento(_nbytes(buf))
+        return super().Irecv(buf, source, tag)
+
+    def Bcast(self, buf, root=0):
+        resultado = super().Bcast(buf, root)
+        if self.Get_rank() == root:
+            registrar_envio(_nbytes(buf) * (self.Get_size() - 1))
+        else:
+            registrar_recebimento(_nbytes(buf))
+        return resultado
+
+    def Scatterv(self, sendbuf, recvbuf, root=0):
+        resultado = super().Scatterv(sendbuf, recvbuf, root)
+        if self.Get_rank() == root:
+            registrar_envio(_bytes_contagens(sendbuf) - _nbytes(recvbuf))
+        else:
+            registrar_recebimento(_nbytes(recvbuf))
+        return resultado
+
+    def Gatherv(self, sendbuf, recvbuf, root=0):
+        resultado = super().Gatherv(sendbuf, recvbuf, root)
+        if self.Get_rank() == root:
+            registrar_recebimento(_bytes_contagens(recvbuf) - _nbytes(sendbuf))
+        else:
+            registrar_envio(_nbytes(sendbuf))
+        return resultado
+
+    def Allgatherv(self, sendbuf, recvbuf):
+        resultado = super().Allgatherv(sendbuf, recvbuf)
+        registrar_envio(_nbytes(sendbuf) * (self.Get_size() - 1))
+        registrar_recebimento(_bytes_contagens(recvbuf) - _nbytes(sendbuf))
+        return resultado
+
+    def Split(self, *args, **kwargs):
+        return instrumentar(super().Split(*args, **kwargs))
+
+    def Create_cart(self, *args, **kwargs):
+        return instrumentar(super().Create_cart(*args, **kwargs))
+
+    def Sub(self, *args, **kwargs):
+        return instrumentar(super().Sub(*args, **kwargs))
+
+
+_classes_instrumentadas = {}
+
+
+def instrumentar(comm):
+    """Mesmo comunicador (mesmo handle MPI), com contagem de bytes nas operações com buffers tipados."""
+    if comm == MPI.COMM_NULL or isinstance(comm, _ContagemMixin):
+        return comm
+    base = type(comm)
+    if base not in _classes_instrumentadas:
+        _classes_instrumentadas[base] = type(f"{base.__name__}Instrumentado", (_ContagemMixin, base), {})
+    return _classes_instrumentadas[base](comm)
+
+
+def metricas_locais():
+    fases = set(_tempos) | set(_enviados) | set(_recebidos)
+    return {
+        "fases": {f: {"tempo": _tempos.get(f, 0.0),
+                      "bytes_enviados": _enviados.get(f, 0),
+                      "bytes_recebidos": _recebidos.get(f, 0)} for f in sorted(fases)},
+        "bytes_enviados": sum(_enviados.values()),
+        "bytes_recebidos": sum(_recebidos.values()),
+    }
+
+
+def reunir(comm, tempo_total):
+    """
+    Junta as métricas de todos os processos no rank 0 e retorna o resumo (None nos demais).
+    Operação coletiva.
+    """
+    locais = metricas_locais()
+    locais["rank"] = comm.Get_rank()
+    locais["tempo_total"] = tempo_total
+    todas = comm.gather(locais, root=0)
+    if comm.Get_rank() != 0:
+        return None
+    return resumir(todas)
+
+
+def resumir(por_rank):
+    """Resumo por fase (mín/médio/máx, desbalanceamento) e por processo (tempo ocioso, bytes)."""
+    nomes = sorted({f for m in por_rank for f in m["fases"]})
+    fases = {}
+    for nome in nomes:
+        tempos = np.array([m["fases"].get(nome, {}).get("tempo", 0.0) for m in por_rank])
+        media = float(tempos.mean())
+        fases[nome] = {
+            "tempo_min": float(tempos.min()),
+            "tempo_medio": media,
+            "tempo_max": float(tempos.max()),
+            "desbalanceamento": float(tempos.max() / media) if media > 0 else 1.0,
+            "bytes_enviados": int(sum(m["fases"].get(nome, {}).get("bytes_enviados", 0) for m in por_rank)),
+            "bytes_recebidos": int(sum(m["fases"].get(nome, {}).get("bytes_recebidos", 0) for m in por_rank)),
+        }
+
+    processos = []
+    for m in por_rank:
+        ocupado = sum(v["tempo"] for f, v in m["fases"].items() if f in FASES_CALCULO)
+        processos.append({
+            "rank": m["rank"],
+            "tempo_total": m["tempo_total"],
+            "tempo_calculo": ocupado,
+            "tempo_ocioso": max(0.0, m["tempo_total"] - ocupado),
+            "bytes_enviados": m["bytes_enviados"],
+            "bytes_recebidos": m["bytes_recebidos"],
+            "fases": m["fases"],
+        })
+
+    return {"processos": len(por_rank), "fases": fases, "por_rank": processos}
+
+
+def imprimir_resumo(resumo):
+    print("------------------------------------------------------------------------------------")
+    print("Metricas por fase (segundos; desbalanceamento = max / media entre os processos)")
+    print(f"{'fase':<14}{'min':>11}{'media':>11}{'max':>11}{'desbal.':>9}{'MB enviados':>14}")
+    for nome, f in resumo["fases"].items():
+        print(f"{nome:<14}{f['tempo_min']:>11.6f}{f['tempo_medio']:>11.6f}{f['tempo_max']:>11.6f}"
+              f"{f['desbalanceamento']:>9.2f}{f['bytes_enviados'] / 1e6:>14.3f}")
+    print("------------------------------------------------------------------------------------")
+    print(f"{'rank':<6}{'total':>11}{'calculo':>11}{'ocioso':>11}{'MB env.':>11}{'MB rec.':>11}")
+    for p in resumo["por_rank"]:
+        print(f"{p['rank']:<6}{p['tempo_total']:>11.6f}{p['tempo_calculo']:>11.6f}{p['tempo_ocioso']:>11.6f}"
+              f"{p['bytes_enviados'] / 1e6:>11.3f}{p['bytes_recebidos'] / 1e6:>11.3f}")
+    print("------------------------------------------------------------------------------------")
+
+
+def exportar_json(resumo, caminho):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resumo, arquivo, indent=2)
@@ -0,0 +1,217 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # scipy é opcional: só o formato npz (matriz esparsa) depende dele
+    sp = None
+
+# ======================================================
+# Leitura da matriz de entrada (texto, .npy ou binário bruto)
+# ======================================================
+
+# ======================================================================================================================================
+# Formatos suportados:
+#   txt - texto, uma linha da matriz por linha do arquivo (np.loadtxt). Lido inteiro pelo coordenador.
+#   npy - formato do NumPy (np.save). Mapeado em memória (mmap), sem leitura antecipada.
+#   bin - float64 little-endian em ordem C, sem cabeçalho; a dimensão N é deduzida do tamanho do arquivo (8 * N * N bytes).
+#   npz - matriz esparsa do scipy (scipy.sparse.save_npz), carregada em CSR pelo coordenador. Exige o scipy.
+#
+# Nos formatos mapeados em memória cada processo abre o arquivo e lê apenas os seus blocos de A/B/C/D (ler_bloco), de forma que o
+# tempo de inicialização não depende do tamanho do texto da matriz e o coordenador não precisa enviar os blocos.
+#
+# Lotes (ler_lote): um arquivo texto com várias matrizes separadas por linhas em branco ou por linhas de rótulo (formato de
+# exemplos_matriz.txt), ou um diretório com um arquivo de matriz por arquivo.
+#
+# Conversão: python leitura_matriz.py matriz.txt matriz.npy
+# ======================================================================================================================================
+
+FORMATOS = ("txt", "npy", "bin", "npz")
+
+
+def detectar_formato(caminho, formato=None):
+    """Formato explícito ou deduzido pela extensão do arquivo (txt por padrão)."""
+    if formato:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato '{formato}' desconhecido (use um de {', '.join(FORMATOS)}).")
+        return formato
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".npy":
+        return "npy"
+    if extensao in (".bin", ".raw"):
+        return "bin"
+    if extensao == ".npz":
+        return "npz"
+    return "txt"
+
+
+def eh_mapeavel(formato):
+    """Indica se o formato pode ser mapeado em memória (leitura por blocos em cada processo)."""
+    return formato in ("npy", "bin")
+
+
+def carregar_matriz(caminho, formato=None):
+    """
+    Carrega a matriz do arquivo. Nos formatos npy/bin retorna um np.memmap somente leitura
+    (os dados só são lidos do disco quando acessados); no formato txt retorna um np.ndarray
+    e no formato npz uma matriz esparsa CSR do scipy.
+    """
+    formato = detectar_formato(caminho, formato)
+
+    if formato == "txt":
+        return np.loadtxt(caminho, ndmin=2)
+
+    if formato == "npz":
+        if sp is None:
+            raise ValueError("O formato npz (matriz esparsa) exige o scipy.")
+        return sp.load_npz(caminho).tocsr().astype(np.float64)
+
+    if formato == "npy":
+        M = np.load(caminho, mmap_mode="r")
+        if M.dtype != np.float64:
+            raise ValueError(f"O arquivo '{caminho}' deve conter float64 (encontrado {M.dtype}).")
+        return M
+
+    tamanho = os.path.getsize(caminho)
+    n = int(np.sqrt(tamanho // 8))
+    if n * n * 8 != tamanho:
+        raise ValueError(f"O arquivo binario '{caminho}' ({tamanho} bytes) nao contem uma matriz N x N de float64.")
+    return np.memmap(caminho, dtype="<f8", mode="r", shape=(n, n))
+
+
+def ler_bloco(M, linhas, colunas):
+    """
+    Cópia contígua float64 de M[linhas, colunas]. Com M mapeada em memória apenas os elementos pedidos
+    são lidos do disco. `linhas` pode ser um slice ou um vetor de índices; `colunas` deve ser um slice.
+    """
+    return np.ascontiguousarray(M[linhas, colunas], dtype=np.float64)
+
+
+def como_slice(indices):
+    """Converte um vetor de índices consecutivos em slice (indexação básica, sem cópia intermediária)."""
+    if len(indices) == 0:
+        return slice(0, 0)
+    indices = np.asarray(indices)
+    inicio, fim = int(indices[0]), int(indices[-1]) + 1
+    # Mesmo com fim - inicio == len(indices), uma permutação (ex.: [2, 4, 3, 5]) não é uma faixa consecutiva
+    if fim - inicio == len(indices) and np.all(np.diff(indices) == 1):
+        return slice(inicio, fim)
+    return indices
+
+
+def leitores_de_blocos(M, ordem_linhas, n2):
+    """
+    Funções de leitura usadas pelos processos para buscar os próprios blocos direto do arquivo:
+    leitor_B(indices_colunas) -> colunas de B e leitor_C(indices_linhas) -> linhas de C, considerando
+    a ordem das linhas de M (permutação do pivotamento em bloco) dada por `ordem_linhas`
+    (None quando não houve permutação).
+    """
+    if ordem_linhas is None:
+        ordem_linhas = np.arange(M.shape[0])
+    linhas_A = como_slice(ordem_linhas[:n2])
+    linhas_C = ordem_linhas[n2:]
+
+    def leitor_B(indices_colunas):
+        colunas = como_slice(np.asarray(indices_colunas) + n2)
+        return ler_bloco(M, linhas_A, colunas)
+
+    def leitor_C(indices_linhas):
+        return ler_bloco(M, como_slice(linhas_C[indices_linhas]), slice(0, n2))
+
+    return leitor_B, leitor_C
+
+
+def _linha_numerica(linha):
+    """Valores da linha como floats, ou None se a linha não for numérica."""
+    try:
+        return [float(v) for v in linha.replace(';', ' ').split()]
+    except ValueError:
+        return None
+
+
+def ler_lote(caminho):
+    """
+    Lista de (nome, matriz) de um lote. Em um diretório, cada arquivo .txt/.npy/.bin/.raw é uma matriz
+    (ordem alfabética). Em um arquivo texto, as matrizes são separadas por linhas em branco ou por linhas
+    não numéricas, que servem de rótulo para a matriz seguinte. Matrizes que não puderem ser lidas
+    (ou com linhas de tamanhos diferentes) aparecem como None.
+    """
+    if os.path.isdir(caminho):
+        lote = []
+        for nome in sorted(os.listdir(caminho)):
+            if os.path.splitext(nome)[1].lower() in (".txt", ".npy", ".bin", ".raw"):
+                try:
+                    lote.append((nome, carregar_matriz(os.path.join(caminho, nome))))
+                except ValueError:
+                    lote.append((nome, None))
+        return lote
+
+    lote = []
+    linhas_atuais = []
+    rotulo = None
+
+    def fechar():
+        nonlocal rotulo
+        if linhas_atuais:
+            nome = rotulo or f"matriz {len(lote) + 1}"
+            # Linhas de tamanhos diferentes: matriz inválida (None), reportada por quem processa o lote
+            if len({len(l) for l in linhas_atuais}) == 1:
+                matriz = np.array(linhas_atuais, dtype=np.float64)
+            else:
+                matriz = None
+            lote.append((nome, matriz))
+            linhas_atuais.clear()
+            rotulo = None
+
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            valores = _linha_numerica(linha)
+            if valores:
+                linhas_atuais.append(valores)
+                continue
+            fechar()
+            if linha.strip() and valores is None:
+                rotulo = linha.strip().rstrip(':')
+    fechar()
+    return lote
+
+
+def converter(entrada, saida, formato_saida=None):
+    """Converte a matriz de `entrada` (qualquer formato suportado) para npy, bin, npz ou txt."""
+    formato_saida = detectar_formato(saida, formato_saida)
+    M = carregar_matriz(entrada)
+
+    if formato_saida == "npz":
+        if sp is None:
+            raise ValueError("O formato npz (matriz esparsa) exige o scipy.")
+        sp.save_npz(saida, sp.csr_matrix(M))
+        return M.shape
+    if sp is not None and sp.issparse(M):
+        M = M.toarray()
+    M = np.asarray(M, dtype=np.float64)
+
+    if formato_saida == "npy":
+        np.save(saida, M)
+    elif formato_saida == "bin":
+        M.astype("<f8").tofile(saida)
+    else:
+        np.savetxt(saida, M)
+    return M.shape
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte a matriz de entrada entre os formatos txt, npy, bin e npz.")
+    parser.add_argument("entrada", help="arquivo de origem (txt, npy, bin ou npz)")
+    parser.add_argument("saida", help="arquivo de destino; o formato eh deduzido pela extensao (.npy, .bin/.raw, .npz, .txt)")
+    parser.add_argument("--formato", choices=FORMATOS, default=None, help="formato de saida (sobrepoe a extensao)")
+    args = parser.parse_args()
+
+    try:
+        forma = converter(args.entrada, args.saida, args.formato)
+    except Exception as e:
+        print(f"ERRO: Nao foi possivel converter '{args.entrada}': {e}")
+        sys.exit(1)
+    print(f"Matriz {forma[0]}x{forma[1]} convertida de '{args.entrada}' para '{args.saida}'.")
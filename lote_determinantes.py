@@ -0,0 +1,232 @@
+import argparse
+import sys
+import time
+from collections import deque
+
+import hibrido
+
+# Threads do BLAS por processo definidas antes do primeiro import do NumPy (ver hibrido.py)
+if __name__ == "__main__":
+    hibrido.configurar_ambiente()
+
+import numpy as np
+from mpi4py import MPI
+
+from determinante_paralelo import determinante
+from distribuicao import contiguo
+from fatoracao import LIMIAR_PIVO, formatar_slogdet, slogdet_com_limiar
+from leitura_matriz import ler_lote
+
+# ======================================================
+# Lote de determinantes em um único job MPI (task farm)
+# ======================================================
+
+# ======================================================================================================================================
+# O rank 0 é o escalonador; os demais processos pedem tarefas e devolvem (sinal, log|det|) assim que terminam, e os resultados são
+# impressos na ordem em que chegam.
+#
+# Fase 1 - matrizes grandes (N >= --limiar): os trabalhadores são divididos em grupos de --tamanho-grupo processos (comm.Split).
+#          O líder de cada grupo pede uma matriz, e o grupo inteiro calcula o determinante pelo complemento de Schur distribuído
+#          no sub-comunicador.
+# Fase 2 - matrizes pequenas: quando não há mais matrizes grandes, cada trabalhador pede matrizes individualmente e as calcula
+#          sozinho (fatoracao.slogdet_com_limiar).
+#
+# Os dois caminhos usam a mesma regra de singularidade: M é tratada como singular (det = 0) se o menor pivô da LU for <= LIMIAR_PIVO
+# vezes o maior (no Schur distribuído, os pivôs das LU de A e de S; ver --limiar-singular), e não um resíduo de arredondamento como
+# 1e-14. Assim o resultado não depende de a matriz ter ido para um grupo ou para um único processo.
+#
+# Assim o custo de inicialização do MPI (mpiexec, imports, leitura) é pago uma única vez para milhares de matrizes.
+# ======================================================================================================================================
+
+# Exec: mpiexec -n 9 python lote_determinantes.py exemplos_matriz.txt --limiar 512 --tamanho-grupo 4
+
+TAG_PEDIDO = 30
+TAG_PEDIDO_GRUPO = 31
+TAG_TAREFA = 32
+TAG_DADOS = 33
+TAG_FIM = 34
+TAG_RESULTADO = 35
+
+
+def parse_args():
+
+    parser = argparse.ArgumentParser(description="Calcula o determinante de varias matrizes em um unico job MPI.")
+    parser.add_argument("lote", help="arquivo texto com varias matrizes (ex.: exemplos_matriz.txt) ou diretorio de matrizes")
+    parser.add_argument("--limiar", type=int, default=512,
+                        help="dimensao a partir da qual a matriz usa o Schur distribuido em um grupo (padrao: 512)")
+    parser.add_argument("--tamanho-grupo", type=int, default=4,
+                        help="processos por grupo no Schur distribuido das matrizes grandes (padrao: 4)")
+    return parser.parse_args()
+
+
+def slogdet_schur_distribuido(comm, M):
+    """
+    (sinal, log|det(M)|) pelo complemento de Schur distribuído entre os processos de `comm`
+    (determinante_paralelo.determinante, em modo log-det e sem mensagens).
+
+    Operação coletiva: M só precisa existir no rank 0, o único que recebe o resultado.
+    """
+    resultado = determinante(M, comm, logdet=True, limiar_singular=LIMIAR_PIVO, verbosidade=0)
+    if resultado is None:
+        return None
+    if resultado["singular"]:
+        return 0.0, -np.inf
+    return resultado["sinal"], resultado["log_abs_det"]
+
+
+def slogdet_local(M):
+    """(sinal, log|det(M)|) calculado por um único processo, com a mesma regra de singularidade do Schur distribuído."""
+    sinal, logabs = slogdet_com_limiar(M, LIMIAR_PIVO)
+    return float(sinal), float(logabs)
+
+
+def enviar_matriz(comm, indice, M, dest):
+    comm.Send(np.array([indice, M.shape[0]], dtype=np.int64), dest=dest, tag=TAG_TAREFA)
+    comm.Send(contiguo(M), dest=dest, tag=TAG_DADOS)
+
+
+def receber_matriz(comm, status):
+    """Recebe uma tarefa do escalonador: (indice, M), ou None quando recebe TAG_FIM."""
+    cabecalho = np.empty(2, dtype=np.int64)
+    comm.Recv(cabecalho, source=0, tag=MPI.ANY_TAG, status=status)
+    if status.Get_tag() == TAG_FIM:
+        return None
+    indice, n = (int(v) for v in cabecalho)
+    M = np.empty((n, n), dtype=np.float64)
+    comm.Recv(M, source=0, tag=TAG_DADOS)
+    return indice, M
+
+
+def imprimir_resultado(concluidas, total, nome, n, sinal, logabs, origem):
+    if sinal == 0:
+        texto = "det = 0 (singular)"
+    else:
+        texto = f"det = {formatar_slogdet(sinal, logabs)}  (sinal {sinal:+.0f}, log|det| = {logabs:.6f})"
+    print(f"[{concluidas}/{total}] {nome} ({n}x{n}): {texto}  <- {origem}", flush=True)
+
+
+def escalonar(comm, lote, limiar):
+    """Laço do rank 0: distribui as matrizes e imprime os resultados à medida que chegam."""
+    size = comm.Get_size()
+    total = len(lote)
+    concluidas = 0
+
+    grandes = deque()
+    pequenas = deque()
+    for indice, (nome, M) in enumerate(lote):
+        if M is None or M.ndim != 2 or M.shape[0] != M.shape[1]:
+            concluidas += 1
+            print(f"[{concluidas}/{total}] {nome}: ERRO - matriz invalida (ilegivel ou nao quadrada).", flush=True)
+        elif M.shape[0] >= limiar and M.shape[0] >= 2:
+            grandes.append(indice)
+        else:
+            pequenas.append(indice)
+
+    # Sem trabalhadores, o coordenador calcula tudo sozinho
+    if size == 1:
+        for indice in list(grandes) + list(pequenas):
+            nome, M = lote[indice]
+            concluidas += 1
+            imprimir_resultado(concluidas, total, nome, M.shape[0], *slogdet_local(M), "rank 0")
+        return
+
+    # O escalonador participa da criação dos grupos (coletiva), mas não pertence a nenhum
+    comm.Split(MPI.UNDEFINED, 0)
+
+    ativos = size - 1
+    pendentes = 0
+    resultado = np.empty(4, dtype=np.float64)
+    status = MPI.Status()
+
+    while ativos > 0 or pendentes > 0:
+        comm.Recv(resultado, source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
+        origem = status.Get_source()
+        tag = status.Get_tag()
+
+        if tag == TAG_RESULTADO:
+            indice, sinal, logabs, tamanho_grupo = resultado
+            nome, M = lote[int(indice)]
+            concluidas += 1
+            pendentes -= 1
+            quem = f"rank {origem}" if tamanho_grupo == 1 else f"grupo do rank {origem} ({int(tamanho_grupo)} processos)"
+            imprimir_resultado(concluidas, total, nome, M.shape[0], sinal, logabs, quem)
+
+        elif tag == TAG_PEDIDO_GRUPO:
+            if grandes:
+                indice = grandes.popleft()
+                enviar_matriz(comm, indice, lote[indice][1], origem)
+                pendentes += 1
+            else:
+                comm.Send(np.zeros(2, dtype=np.int64), dest=origem, tag=TAG_FIM)
+
+        elif tag == TAG_PEDIDO:
+            if pequenas:
+                indice = pequenas.popleft()
+                enviar_matriz(comm, indice, lote[indice][1], origem)
+                pendentes += 1
+            else:
+                comm.Send(np.zeros(2, dtype=np.int64), dest=origem, tag=TAG_FIM)
+                ativos -= 1
+
+
+def trabalhar(comm, tamanho_grupo):
+    """Laço dos trabalhadores: fase 1 em grupos (matrizes grandes) e fase 2 individual (matrizes pequenas)."""
+    rank = comm.Get_rank()
+    status = MPI.Status()
+    pedido = np.zeros(4, dtype=np.float64)
+
+    # Fase 1: grupos de `tamanho_grupo` trabalhadores
+    grupo = comm.Split((rank - 1) // tamanho_grupo, rank)
+    lider = grupo.Get_rank() == 0
+    while True:
+        tarefa = None
+        if lider:
+            comm.Send(pedido, dest=0, tag=TAG_PEDIDO_GRUPO)
+            tarefa = receber_matriz(comm, status)
+        if not grupo.bcast(tarefa is not None, root=0):
+            break
+        resultado = slogdet_schur_distribuido(grupo, tarefa[1] if lider else None)
+        if lider:
+            resposta = np.array([tarefa[0], resultado[0], resultado[1], grupo.Get_size()], dtype=np.float64)
+            comm.Send(resposta, dest=0, tag=TAG_RESULTADO)
+    grupo.Free()
+
+    # Fase 2: cada trabalhador sozinho
+    while True:
+        comm.Send(pedido, dest=0, tag=TAG_PEDIDO)
+        tarefa = receber_matriz(comm, status)
+        if tarefa is None:
+            break
+        indice, M = tarefa
+        sinal, logabs = slogdet_local(M)
+        comm.Send(np.array([indice, sinal, logabs, 1], dtype=np.float64), dest=0, tag=TAG_RESULTADO)
+
+
+if __name__ == "__main__":
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    args = parse_args()
+
+    if rank == 0:
+        try:
+            sys.stdout.reconfigure(encoding='utf-8')
+        except TypeError:
+            pass
+
+        try:
+            lote = ler_lote(args.lote)
+        except Exception as e:
+            print(f"ERRO: Ocorreu um erro ao ler o lote '{args.lote}': {e}", flush=True)
+            comm.Abort()
+
+        print(f"\nExecutando com {size} processos: {len(lote)} matrizes em '{args.lote}'.\n", flush=True)
+        start_time = time.perf_counter()
+        escalonar(comm, lote, args.limiar)
+        elapsed_time = time.perf_counter() - start_time
+
+        print("------------------------------------------------------------------------------------")
+        print(f"Tempo total do lote: {elapsed_time:.6f} segundos ({len(lote) / elapsed_time:.1f} matrizes/s)")
+        print("------------------------------------------------------------------------------------")
+    else:
+        trabalhar(comm, max(1, args.tamanho_grupo))
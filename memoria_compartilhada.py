@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from distribuicao import multiplicar_em_paineis, particionar_linhas, tamanho_bloco
+from fatoracao import combinar_slogdet, fatorar_bloco_lider, resolver_lu, slogdet_lu, slogdet_schur_com_limiar
+from instrumentacao import fase
+
+# ======================================================
+# Backend de memória compartilhada (um único nó, sem MPI)
+# ======================================================
+
+# ======================================================================================================================================
+# Mesmo algoritmo de determinante_paralelo.py (LU do bloco líder com pivotamento em bloco, X = A⁻¹B por colunas, T = C @ X
+# por linhas, det(M) = sinal(P) * det(A) * det(S)), mas os trabalhadores compartilham a memória em vez de trocar mensagens:
+#
+#   threads   - ThreadPoolExecutor. As substituições triangulares e os GEMMs do NumPy liberam o GIL, então as threads
+#               calculam em paralelo sobre os mesmos arrays, sem nenhuma cópia.
+#   processos - ProcessPoolExecutor com LU, piv, B, C, X e T em multiprocessing.shared_memory. Cada processo anexa os blocos
+#               uma única vez (initializer) e recebe apenas os intervalos (inicio, fim) de cada tarefa. Os processos são criados
+#               com fork quando disponível; nas plataformas sem fork (Windows) usa-se spawn, que reimporta o script principal
+#               (protegido pela guarda __main__) em cada processo.
+#
+# Em ambos os modos cada tarefa escreve as suas colunas de X e as suas linhas de T diretamente no buffer de saída compartilhado.
+# ======================================================================================================================================
+
+BACKENDS = ("mpi", "threads", "processos")
+
+# Arrays compartilhados anexados por cada processo do pool (modo processos)
+_anexados = {}
+_segmentos = []
+
+
+def _criar_compartilhado(mat, segmentos):
+    """Cópia de `mat` em um bloco de shared_memory; retorna (array, descritor para os processos)."""
+    mat = np.ascontiguousarray(mat)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, mat.nbytes))
+    segmentos.append(shm)
+    compartilhado = np.ndarray(mat.shape, dtype=mat.dtype, buffer=shm.buf)
+    compartilhado[...] = mat
+    return compartilhado, (shm.name, mat.shape, mat.dtype.str)
+
+
+def _anexar(descritores):
+    """Initializer do pool: anexa os blocos compartilhados no processo trabalhador."""
+    for nome, (shm_nome, forma, dtype) in descritores.items():
+        shm = shared_memory.SharedMemory(name=shm_nome)
+        _segmentos.append(shm)
+        _anexados[nome] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _resolver_colunas(arrays, inicio, fim):
+    """X[:, inicio:fim] = A⁻¹ B[:, inicio:fim] (substituições com o LU compartilhado)."""
+    arrays["X"][:, inicio:fim] = resolver_lu(arrays["LU"], arrays["piv"], arrays["B"][:, inicio:fim])
+
+
+def _multiplicar_linhas(arrays, inicio, fim, bloco):
+    """T[inicio:fim] = C[inicio:fim] @ X, escrito direto nas linhas de T."""
+    multiplicar_em_paineis(arrays["C"][inicio:fim], [arrays["X"]], bloco, saida=arrays["T"][inicio:fim])
+
+
+def _tarefa_processo(tipo, inicio, fim, bloco):
+    if tipo == "X":
+        _resolver_colunas(_anexados, inicio, fim)
+    else:
+        _multiplicar_linhas(_anexados, inicio, fim, bloco)
+
+
+def _intervalos(n, partes):
+    return [(int(p[0]), int(p[-1]) + 1) for p in particionar_linhas(n, partes) if len(p)]
+
+
+def calcular_X_T(LU, piv, B, C, backend="threads", trabalhadores=None, bloco=0):
+    """
+    X = A⁻¹B (colunas de B divididas entre os trabalhadores) e T = C @ X (linhas de C em tarefas de `bloco` linhas),
+    com threads ou processos compartilhando a memória. Retorna (X, T).
+    """
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    n2, m = B.shape
+    if bloco <= 0:
+        bloco = tamanho_bloco(m)
+    # Tarefas menores que o painel quando há poucas linhas por trabalhador, para balancear a carga
+    bloco_tarefa = max(1, min(bloco, -(-C.shape[0] // (4 * trabalhadores))))
+    colunas = _intervalos(m, 4 * trabalhadores)
+    linhas = [(inicio, min(inicio + bloco_tarefa, C.shape[0])) for inicio in range(0, C.shape[0], bloco_tarefa)]
+
+    if backend == "threads":
+        arrays = {"LU": np.ascontiguousarray(LU), "piv": np.asarray(piv), "B": B, "C": C,
+                  "X": np.empty((n2, m), dtype=np.float64), "T": np.empty((C.shape[0], m), dtype=np.float64)}
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            with fase("resolucao"):
+                list(executor.map(lambda intervalo: _resolver_colunas(arrays, *intervalo), colunas))
+            with fase("gemm"):
+                list(executor.map(lambda intervalo: _multiplicar_linhas(arrays, *intervalo, bloco), linhas))
+        return arrays["X"], arrays["T"]
+
+    if backend != "processos":
+        raise ValueError(f"Backend '{backend}' desconhecido (use threads ou processos).")
+    metodo = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+    segmentos = []
+    try:
+        with fase("distribuicao"):
+            descritores = {}
+            arrays = {}
+            for nome, mat in (("LU", LU), ("piv", np.asarray(piv, dtype=np.int64)), ("B", B), ("C", C),
+                              ("X", np.empty((n2, m))), ("T", np.empty((C.shape[0], m)))):
+                arrays[nome], descritores[nome] = _criar_compartilhado(mat, segmentos)
+
+        with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=multiprocessing.get_context(metodo),
+                                 initializer=_anexar, initargs=(descritores,)) as executor:
+            with fase("resolucao"):
+                list(executor.map(_tarefa_processo, ["X"] * len(colunas), *zip(*colunas), [bloco] * len(colunas)))
+            with fase("gemm"):
+                list(executor.map(_tarefa_processo, ["T"] * len(linhas), *zip(*linhas), [bloco] * len(linhas)))
+
+        with fase("coleta"):
+            return arrays["X"].copy(), arrays["T"].copy()
+    finally:
+        for shm in segmentos:
+            shm.close()
+            shm.unlink()
+
+
+def slogdet_schur_compartilhado(M, backend="threads", trabalhadores=None, bloco=0, limiar=0.0):
+    """
+    (sinal, log|det(M)|) pelo complemento de Schur em um único nó, com `trabalhadores` threads ou processos.
+    Com `limiar` > 0, M é tratada como singular se o menor pivô das LU de A e de S for <= limiar vezes o maior
+    (a regra de --limiar-singular do backend mpi).
+
+    Retorna também os fatores para o relatório: (sinalM, logM, perm, (sinalP, 0), (sinalA, logA), (sinalS, logS)).
+    Lança np.linalg.LinAlgError se as primeiras N/2 colunas de M forem linearmente dependentes (det(M) = 0).
+    """
+    n = M.shape[0]
+    n2 = n // 2
+
+    with fase("fatoracao"):
+        perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(M, n2)
+    with fase("divisao"):
+        M_pivotado = np.asarray(M[perm] if perm is not None else M, dtype=np.float64)
+        B = np.ascontiguousarray(M_pivotado[:n2, n2:])
+        C = np.ascontiguousarray(M_pivotado[n2:, :n2])
+        D = M_pivotado[n2:, n2:]
+
+    _, T = calcular_X_T(LU, piv, B, C, backend, trabalhadores, bloco)
+
+    with fase("det_S"):
+        sinalS, logS, _ = slogdet_schur_com_limiar(LU, D - T, limiar)
+
+    sinalP = -1.0 if trocas_perm % 2 else 1.0
+    sinalA, logA = slogdet_lu(LU, trocas)
+    sinalM, logM = combinar_slogdet((sinalP, 0.0), (sinalA, logA), (float(sinalS), float(logS)))
+    return sinalM, logM, perm, (sinalP, 0.0), (sinalA, logA), (float(sinalS), float(logS))
@@ -0,0 +1,385 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+from instrumentacao import zerar
+from leitura_matriz import FORMATOS, carregar_matriz
+
+# ======================================================
+# Serviço de determinantes: processos MPI permanentes e fila local de jobs
+# ======================================================
+
+# ======================================================================================================================================
+# Com --servico ENDERECO, determinante_paralelo.py não termina depois de um único determinante: o mpiexec, os imports do mpi4py/NumPy
+# e o aquecimento do BLAS são pagos uma única vez, e cada job custa apenas o cálculo. O rank 0 espera os jobs e os demais processos
+# ficam parados em um Ibcast testado com pausas curtas (sem ocupar os núcleos enquanto não há trabalho).
+#
+# Endereços:
+#   unix:/caminho/do/socket - socket Unix local. Por conexão, um ou mais jobs: uma linha JSON de cabeçalho
+#                             {"forma": [N, N], "opcoes": {...}} seguida de 8 * N * N bytes (float64 little-endian, ordem C);
+#                             a resposta é uma linha JSON. O cabeçalho {"comando": "parar"} encerra o serviço.
+#                             Os dados são recebidos direto em um buffer preparado no rank 0 e reaproveitado entre os jobs.
+#   DIRETORIO               - diretório de spool: cada arquivo de matriz (.npy, .bin, .txt, .npz) gravado em DIRETORIO/entrada
+#                             é um job, com opções opcionais em <arquivo>.json; o resultado é gravado em DIRETORIO/resultados/
+#                             <arquivo>.json. Os arquivos .npy/.bin são mapeados em memória por todos os processos, como na
+#                             opção --entrada. O arquivo DIRETORIO/PARAR encerra o serviço.
+#
+# As opções de cada job são as da linha de comando com que o serviço foi iniciado (--logdet, --pipeline, --bloco, ...), sobrescritas
+# pelas opções do job; os jobs são silenciosos (verbosidade 0) a menos que peçam o contrário.
+#
+# Um job que falha (em qualquer processo) é respondido com {"erro": ...} e o serviço continua: cada job roda em uma cópia do
+# comunicador e termina com uma barreira no comunicador do serviço. Se a falha deixou processos presos em uma coletiva do job, a
+# barreira não se completa e o serviço é abortado depois de TEMPO_SINCRONIA segundos (em vez de travar).
+#
+# Cliente: python servico.py ENDERECO --entrada matriz.npy [--opcoes '{"logdet": true}']   |   python servico.py ENDERECO --parar
+# ======================================================================================================================================
+
+COMANDO_PARAR = 0
+COMANDO_CALCULAR = 1
+
+ESPERA = 0.002  # pausa (s) entre os testes do Ibcast nos processos ociosos
+ESPERA_SPOOL = 0.05  # intervalo (s) entre as varreduras do diretório de spool
+TEMPO_SINCRONIA = 60.0  # espera máxima (s) pelos demais processos depois de um job que falhou neste processo
+
+# Opções que pertencem ao serviço, não aos jobs
+OPCOES_DO_SERVICO = ("servico", "json", "entrada", "formato")
+
+
+def eh_socket(endereco):
+    return endereco.startswith("unix:")
+
+
+# ======================================================
+# Processos trabalhadores
+# ======================================================
+
+def aguardar_comando(comm):
+    """Espera o próximo comando do rank 0 sem ocupar o núcleo (Ibcast testado com pausas curtas)."""
+    comando = np.zeros(1, dtype=np.int64)
+    pedido = comm.Ibcast(comando, root=0)
+    while not pedido.Test():
+        time.sleep(ESPERA)
+    return int(comando[0])
+
+
+def enviar_comando(comm, comando):
+    comm.Ibcast(np.array([comando], dtype=np.int64), root=0).Wait()
+
+
+def sincronizar(comm, job, falhou):
+    """
+    Fim de um job: todos os processos passam por uma barreira no comunicador do serviço. O job roda em uma cópia
+    (`job`) do comunicador, então uma coletiva que ficou pendente nela não se confunde com a barreira. Se o job
+    falhou neste processo, os demais podem ter ficado presos em uma coletiva do job: sem a barreira em
+    TEMPO_SINCRONIA segundos os processos estão dessincronizados e o serviço é abortado, em vez de travar.
+    """
+    pedido = comm.Ibarrier()
+    limite = time.monotonic() + TEMPO_SINCRONIA
+    while not pedido.Test():
+        if falhou and time.monotonic() > limite:
+            print(f"[servico] rank {comm.Get_rank()}: processos dessincronizados depois de um job com erro; "
+                  "encerrando o servico.", file=sys.stderr, flush=True)
+            comm.Abort(1)
+        time.sleep(ESPERA)
+    job.Free()
+
+
+def servir_trabalhador(comm, calcular):
+    """Processos trabalhadores: executam a parte coletiva de cada job até o comando de parada."""
+    while aguardar_comando(comm) == COMANDO_CALCULAR:
+        opcoes = comm.bcast(None, root=0)
+        zerar()
+        job = comm.Dup()
+        falhou = False
+        try:
+            calcular(None, job, **opcoes)
+        except Exception:
+            falhou = True  # o rank 0 responde o erro ao cliente
+        sincronizar(comm, job, falhou)
+
+
+# ======================================================
+# Rank 0: execução de um job
+# ======================================================
+
+def executar_job(comm, calcular, M, opcoes):
+    """Distribui um job aos processos e retorna o resultado (ou {"erro": ...}) como dicionário serializável."""
+    recebido = time.perf_counter()
+    enviar_comando(comm, COMANDO_CALCULAR)
+    comm.bcast(opcoes, root=0)
+    zerar()
+    job = comm.Dup()
+    try:
+        resultado = calcular(M, job, recebido, **opcoes)
+    except Exception as e:
+        resultado = {"erro": str(e) or type(e).__name__}
+    sincronizar(comm, job, "erro" in resultado)
+    if "erro" not in resultado:
+        resultado["tempo_servico"] = time.perf_counter() - recebido
+    return resultado
+
+
+def opcoes_do_job(padrao, pedidas):
+    """Opções do serviço sobrescritas pelas do job (sem as opções que só fazem sentido para o serviço)."""
+    pedidas = dict(pedidas or {})
+    proibidas = set(pedidas) & set(OPCOES_DO_SERVICO)
+    if proibidas:
+        raise ValueError(f"Opcoes nao permitidas em um job: {', '.join(sorted(proibidas))}")
+    return {**padrao, **pedidas}
+
+
+def registrar(verbosidade, job, resultado):
+    if verbosidade < 1:
+        return
+    if "erro" in resultado:
+        print(f"[servico] {job}: ERRO: {resultado['erro']}", flush=True)
+    else:
+        print(f"[servico] {job}: N = {resultado['n']}, det(M) = {resultado['det_formatado']} "
+              f"({resultado['tempo_servico']:.6f} s)", flush=True)
+
+
+# ======================================================
+# Rank 0: socket Unix
+# ======================================================
+
+def _ler_exato(arquivo, destino):
+    """Lê exatamente len(destino) bytes do arquivo da conexão para o buffer `destino`."""
+    visao = memoryview(destino).cast("B")
+    lidos = 0
+    while lidos < len(visao):
+        parte = arquivo.readinto(visao[lidos:])
+        if not parte:
+            raise ConnectionError("conexao encerrada no meio da matriz")
+        lidos += parte
+
+
+def servir_socket(comm, caminho, calcular, padrao, verbosidade):
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    # O bind cria o arquivo do socket antes do listen: um cliente que conectasse nesse intervalo seria recusado. O socket é criado
+    # com outro nome e só aparece em `caminho` (rename atômico) quando já aceita conexões.
+    provisorio = f"{caminho}.{os.getpid()}"
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(provisorio)
+    servidor.listen()
+    os.replace(provisorio, caminho)
+    if verbosidade >= 1:
+        print(f"[servico] {comm.Get_size()} processos aguardando jobs em unix:{caminho}", flush=True)
+
+    buffer = np.empty(0, dtype=np.float64)  # reaproveitado entre os jobs; só cresce
+    jobs = 0
+    try:
+        while True:
+            conexao, _ = servidor.accept()
+            with conexao, conexao.makefile("rb") as entrada, conexao.makefile("wb") as saida:
+                for linha in entrada:
+                    try:
+                        cabecalho = json.loads(linha)
+                    except json.JSONDecodeError as e:
+                        saida.write((json.dumps({"erro": f"cabecalho invalido: {e}"}) + "\n").encode())
+                        break
+                    if cabecalho.get("comando") == "parar":
+                        saida.write(b'{"parado": true}\n')
+                        return
+
+                    forma = cabecalho.get("forma")
+                    if (not isinstance(forma, list) or len(forma) != 2
+                            or not all(isinstance(d, int) and d >= 0 for d in forma)):
+                        saida.write((json.dumps({"erro": "cabecalho sem 'forma': [N, N]"}) + "\n").encode())
+                        break
+                    tamanho = forma[0] * forma[1]
+                    if buffer.size < tamanho:
+                        buffer = np.empty(tamanho, dtype=np.float64)
+                    M = buffer[:tamanho].reshape(forma)
+                    try:
+                        _ler_exato(entrada, M)
+                    except ConnectionError:
+                        break
+
+                    jobs += 1
+                    job = cabecalho.get("id", f"job {jobs}")
+                    try:
+                        opcoes = opcoes_do_job(padrao, cabecalho.get("opcoes"))
+                    except ValueError as e:
+                        resultado = {"erro": str(e)}
+                    else:
+                        resultado = executar_job(comm, calcular, M, opcoes)
+                    resultado["id"] = job
+                    registrar(verbosidade, job, resultado)
+                    saida.write((json.dumps(resultado) + "\n").encode())
+                    saida.flush()
+    finally:
+        servidor.close()
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+# ======================================================
+# Rank 0: diretório de spool
+# ======================================================
+
+def diretorios_spool(diretorio):
+    caminhos = {nome: os.path.join(diretorio, nome) for nome in ("entrada", "processando", "resultados")}
+    for caminho in caminhos.values():
+        os.makedirs(caminho, exist_ok=True)
+    return caminhos
+
+
+def gravar_json(caminho, dados):
+    """Grava em um arquivo temporário e renomeia, para que o cliente nunca leia um resultado pela metade."""
+    temporario = os.path.join(os.path.dirname(caminho), "." + os.path.basename(caminho) + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, caminho)
+
+
+def proximos_jobs(pasta):
+    """Arquivos de matriz prontos em `pasta` (temporários começam com '.'), do mais antigo para o mais novo."""
+    nomes = [nome for nome in os.listdir(pasta)
+             if not nome.startswith(".") and not nome.endswith(".json")]
+    return sorted(nomes, key=lambda nome: os.path.getmtime(os.path.join(pasta, nome)))
+
+
+def servir_spool(comm, diretorio, calcular, padrao, verbosidade):
+    pastas = diretorios_spool(diretorio)
+    parar = os.path.join(diretorio, "PARAR")
+    if verbosidade >= 1:
+        print(f"[servico] {comm.Get_size()} processos aguardando jobs em {pastas['entrada']}", flush=True)
+
+    while not os.path.exists(parar):
+        nomes = proximos_jobs(pastas["entrada"])
+        if not nomes:
+            time.sleep(ESPERA_SPOOL)
+            continue
+        for nome in nomes:
+            # os.replace é atômico: o job é retirado da entrada antes do cálculo
+            arquivo = os.path.join(pastas["processando"], nome)
+            try:
+                os.replace(os.path.join(pastas["entrada"], nome), arquivo)
+            except FileNotFoundError:
+                continue
+            lateral = os.path.join(pastas["entrada"], nome + ".json")
+            pedidas = None
+            try:
+                if os.path.exists(lateral):
+                    with open(lateral, encoding="utf-8") as f:
+                        pedidas = json.load(f)
+                    os.remove(lateral)
+                opcoes = opcoes_do_job(padrao, pedidas)
+                # Nos formatos mapeados em memória cada processo lê os próprios blocos do arquivo do job
+                M = carregar_matriz(arquivo)
+            except Exception as e:
+                resultado = {"erro": f"job '{nome}': {e}"}
+            else:
+                resultado = executar_job(comm, calcular, M, {**opcoes, "entrada": arquivo})
+                del M
+            resultado["id"] = nome
+            registrar(verbosidade, nome, resultado)
+            gravar_json(os.path.join(pastas["resultados"], nome + ".json"), resultado)
+            os.remove(arquivo)
+    os.remove(parar)
+
+
+def servir(comm, endereco, calcular, opcoes):
+    """
+    Executa o serviço até o comando de parada. Operação coletiva: todos os processos de `comm` a chamam;
+    `calcular` é determinante_paralelo.determinante e `opcoes` as opções da linha de comando do serviço.
+    """
+    opcoes = {chave: valor for chave, valor in opcoes.items() if chave not in OPCOES_DO_SERVICO}
+    verbosidade = opcoes.get("verbosidade", 1)
+    padrao = {**opcoes, "verbosidade": 0}
+
+    if comm.Get_rank() != 0:
+        servir_trabalhador(comm, calcular)
+        return
+
+    try:
+        if eh_socket(endereco):
+            servir_socket(comm, endereco[len("unix:"):], calcular, padrao, verbosidade)
+        else:
+            servir_spool(comm, endereco, calcular, padrao, verbosidade)
+    finally:
+        enviar_comando(comm, COMANDO_PARAR)
+    if verbosidade >= 1:
+        print("[servico] encerrado.", flush=True)
+
+
+# ======================================================
+# Cliente
+# ======================================================
+
+def enviar(endereco, M, opcoes=None, tempo_limite=None):
+    """Envia a matriz M ao serviço em `endereco` e retorna o resultado (dicionário)."""
+    M = np.ascontiguousarray(M, dtype="<f8")
+    if eh_socket(endereco):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+            conexao.settimeout(tempo_limite)
+            conexao.connect(endereco[len("unix:"):])
+            cabecalho = {"forma": list(M.shape), "opcoes": opcoes or {}}
+            conexao.sendall((json.dumps(cabecalho) + "\n").encode())
+            conexao.sendall(memoryview(M).cast("B"))
+            with conexao.makefile("rb") as resposta:
+                return json.loads(resposta.readline())
+
+    pastas = diretorios_spool(endereco)
+    nome = f"job-{os.getpid()}-{time.time_ns()}.npy"
+    if opcoes:
+        gravar_json(os.path.join(pastas["entrada"], nome + ".json"), opcoes)
+    temporario = os.path.join(pastas["entrada"], "." + nome)
+    with open(temporario, "wb") as arquivo:
+        np.save(arquivo, M)
+    os.replace(temporario, os.path.join(pastas["entrada"], nome))
+
+    resultado = os.path.join(pastas["resultados"], nome + ".json")
+    limite = None if tempo_limite is None else time.monotonic() + tempo_limite
+    while not os.path.exists(resultado):
+        if limite is not None and time.monotonic() > limite:
+            raise TimeoutError(f"sem resposta do servico em {endereco}")
+        time.sleep(ESPERA_SPOOL)
+    with open(resultado, encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    os.remove(resultado)
+    return dados
+
+
+def parar(endereco):
+    """Pede o encerramento do serviço."""
+    if eh_socket(endereco):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+            conexao.connect(endereco[len("unix:"):])
+            conexao.sendall(b'{"comando": "parar"}\n')
+            conexao.recv(64)
+    else:
+        open(os.path.join(endereco, "PARAR"), "w").close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente do servico de determinantes (determinante_paralelo.py --servico).")
+    parser.add_argument("endereco", help="unix:/caminho/do/socket ou diretorio de spool do servico")
+    parser.add_argument("--entrada", default="matriz.txt", help="arquivo da matriz (padrao: matriz.txt)")
+    parser.add_argument("--formato", choices=FORMATOS, default=None, help="formato do arquivo (padrao: pela extensao)")
+    parser.add_argument("--opcoes", default=None, metavar="JSON",
+                        help='opcoes do job, ex.: \'{"logdet": true, "pipeline": true}\'')
+    parser.add_argument("--tempo-limite", type=float, default=None, help="segundos de espera pela resposta")
+    parser.add_argument("--parar", action="store_true", help="encerra o servico")
+    args = parser.parse_args()
+
+    if args.parar:
+        parar(args.endereco)
+        return
+
+    M = carregar_matriz(args.entrada, args.formato)
+    M = M.toarray() if hasattr(M, "toarray") else np.asarray(M)
+    resultado = enviar(args.endereco, M, json.loads(args.opcoes) if args.opcoes else None, args.tempo_limite)
+    print(json.dumps(resultado, indent=2))
+    if "erro" in resultado:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+import numpy as np
+from mpi4py import MPI
+
+from determinante_paralelo import determinante, parse_args, resultado_final
+from distribuicao import calcular_T_distribuido, contiguo
+from fatoracao import (bem_condicionado, combinar_slogdet, fatorar_lu_rapido, resolver_distribuido, resolver_lu, slogdet_lu,
+                       slogdet_schur_com_limiar)
+from instrumentacao import fase
+
+# ======================================================
+# Sessão: fatoração de A em cache e atualizações de posto baixo
+# ======================================================
+
+# ======================================================================================================================================
+# Para sequências de matrizes parecidas (só D muda, ou algumas linhas/colunas, ou uma perturbação de posto baixo), uma Sessao evita
+# refazer o que não mudou:
+#
+#   determinante(M) - complemento de Schur distribuído como em calcular_schur(), mas com um cache LRU (limitado em bytes) da
+#                     fatoração LU de A, de X = A⁻¹B e de T = C·X, indexados pelo hash do conteúdo de A, B e C. Se só D mudou,
+#                     o custo é o de S = D - T e da sua fatoração (O(m³) serial no rank 0), sem nenhuma comunicação.
+#   atualizar(U, V) - M + U·Vᵀ (U e V com k colunas) pelo lema do determinante da matriz:
+#                         det(M + U·Vᵀ) = det(M) · det(I_k + Vᵀ·M⁻¹·U)
+#                     M⁻¹·U sai dos fatores já guardados (LU de A, X, C e LU de S), em O(n²k). Atualizações sucessivas se
+#                     acumulam (Woodbury sobre a última matriz fatorada); quando o posto acumulado passa de `posto_maximo`, ou
+#                     se a matriz fatorada for singular, a matriz atual é refatorada com determinante() (que reaproveita o cache
+#                     de A se as atualizações não tocaram em A, B ou C).
+#   substituir_linhas() / substituir_colunas() - trocas de linhas/colunas como atualizações de posto k.
+#
+# Se A for singular ou mal condicionada, a sessão recorre a determinante_paralelo.determinante() (pivotamento em bloco, estrutura,
+# ...), sem cache. Todos os métodos são operações coletivas: todos os processos de `comm` os chamam, as matrizes só precisam existir
+# no rank 0 e só ele recebe o resultado.
+# ======================================================================================================================================
+
+CAPACIDADE_PADRAO = 1 << 30  # bytes do cache LRU (1 GiB)
+
+
+def hash_bloco(bloco):
+    """Hash do conteúdo (forma, tipo e valores) de um bloco de matriz."""
+    bloco = np.ascontiguousarray(bloco)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((bloco.shape, bloco.dtype.str)).encode())
+    h.update(memoryview(bloco).cast("B"))
+    return h.hexdigest()
+
+
+class CacheLRU:
+    """Cache com remoção do item usado há mais tempo quando o total de bytes passa da capacidade."""
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.capacidade = capacidade
+        self.itens = OrderedDict()
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+
+    @staticmethod
+    def _tamanho(valor):
+        return sum(v.nbytes for v in valor if isinstance(v, np.ndarray))
+
+    def obter(self, chave):
+        if chave not in self.itens:
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        self.itens.move_to_end(chave)
+        return self.itens[chave]
+
+    def guardar(self, chave, valor):
+        tamanho = self._tamanho(valor)
+        if tamanho > self.capacidade:
+            return
+        if chave in self.itens:
+            self.bytes -= self._tamanho(self.itens.pop(chave))
+        while self.itens and self.bytes + tamanho > self.capacidade:
+            _, removido = self.itens.popitem(last=False)
+            self.bytes -= self._tamanho(removido)
+        self.itens[chave] = valor
+        self.bytes += tamanho
+
+    def resumo(self):
+        return {"itens": len(self.itens), "bytes": self.bytes, "acertos": self.acertos, "faltas": self.faltas}
+
+
+class Sessao:
+    """
+    Determinantes de uma sequência de matrizes relacionadas (ver o comentário do módulo).
+
+    `opcoes` são as de determinante() (bloco e dinamico também valem para o caminho com cache); `capacidade` é o limite em
+    bytes do cache e `posto_maximo` o posto acumulado a partir do qual atualizar() refatora a matriz (padrão: N // 8).
+    """
+
+    def __init__(self, comm=None, capacidade=CAPACIDADE_PADRAO, posto_maximo=None, **opcoes):
+        desconhecidas = set(opcoes) - set(vars(parse_args([])))
+        if desconhecidas:
+            raise TypeError(f"Opcoes desconhecidas: {', '.join(sorted(desconhecidas))}")
+        self.comm = comm if comm is not None else MPI.COMM_WORLD
+        self.opcoes = {"verbosidade": 0, **opcoes}
+        self.bloco = opcoes.get("bloco", 0)
+        self.dinamico = opcoes.get("dinamico", False)
+        self.limiar = {**vars(parse_args([])), **opcoes}["limiar_singular"]
+        self.cache = CacheLRU(capacidade)
+        self.posto_maximo = posto_maximo
+
+        # Estado do rank 0: matriz atual, fatores da última matriz fatorada e atualizações acumuladas desde então
+        self.M = None
+        self._fatores = None
+        self._slogdet_base = None
+        self._U = self._V = self._W = None
+
+    # ======================================================
+    # Determinante com cache
+    # ======================================================
+
+    def determinante(self, M=None):
+        """Determinante de M (rank 0), reaproveitando do cache a fatoração de A, X = A⁻¹B e T = C·X."""
+        comm = self.comm
+        inicio = time.perf_counter()
+
+        if comm.Get_rank() != 0:
+            plano = comm.bcast(None, root=0)
+            if plano == "completo":
+                determinante(None, comm, **self.opcoes)
+            elif plano != "erro":
+                precisa_X, precisa_T = plano
+                if precisa_X:
+                    resolver_distribuido(comm, None, None, None)
+                if precisa_T:
+                    calcular_T_distribuido(comm, None, None, self.bloco, self.dinamico)
+            return None
+
+        if M is None or M.ndim != 2 or M.shape[0] != M.shape[1] or M.shape[0] < 2:
+            self._erro("A matriz deve ser quadrada com dimensao (N) de pelo menos 2.")
+
+        n = M.shape[0]
+        n1 = n // 2
+        A, B, C, D = M[:n1, :n1], M[:n1, n1:], M[n1:, :n1], M[n1:, n1:]
+        reaproveitado = []
+
+        chave_A = hash_bloco(A)
+        fatorA = self.cache.obter(("A", chave_A))
+        if fatorA is not None:
+            reaproveitado.append("A")
+        else:
+            try:
+                with fase("fatoracao"):
+                    LU, piv, trocas = fatorar_lu_rapido(A)
+                if bem_condicionado(LU):
+                    fatorA = (LU, piv, trocas)
+                    self.cache.guardar(("A", chave_A), fatorA)
+            except np.linalg.LinAlgError:
+                pass
+
+        if fatorA is None:
+            # A singular ou mal condicionada: pivotamento em bloco pelo caminho completo, sem cache
+            comm.bcast("completo", root=0)
+            resultado = determinante(M, comm, **self.opcoes)
+            logabs = resultado["log_abs_det"] if resultado["log_abs_det"] is not None else -np.inf
+            self._nova_base(M, None, (resultado["sinal"], logabs))
+            resultado.update(modo="sessao", reaproveitado=[], cache=self.cache.resumo())
+            return resultado
+
+        chave_X = ("X", chave_A, hash_bloco(B))
+        chave_T = chave_X[1:] + (hash_bloco(C),)
+        X = self.cache.obter(chave_X)
+        T = self.cache.obter(("T",) + chave_T)
+        comm.bcast((X is None, T is None), root=0)
+
+        LU, piv, trocas = fatorA
+        if X is None:
+            X = resolver_distribuido(comm, LU, piv, B)
+            self.cache.guardar(chave_X, (X,))
+        else:
+            X = X[0]
+            reaproveitado.append("X")
+        if T is None:
+            T = calcular_T_distribuido(comm, C, [X], self.bloco, self.dinamico)
+            self.cache.guardar(("T",) + chave_T, (T,))
+        else:
+            T = T[0]
+            reaproveitado.append("T")
+
+        with fase("det_S"):
+            sinalS, logS, fatores_S = slogdet_schur_com_limiar(LU, D - T, self.limiar)
+            fatores = (LU, piv, X, contiguo(C)) + fatores_S[:2] if sinalS != 0 else None
+
+        sinal, logabs = combinar_slogdet(slogdet_lu(LU, trocas), (sinalS, logS))
+        self._nova_base(M, fatores, (sinal, logabs))
+        return resultado_final(sinal, logabs, time.perf_counter() - inicio, modo="sessao", reaproveitado=reaproveitado,
+                               cache=self.cache.resumo(), n=n, processos=comm.Get_size())
+
+    def _erro(self, mensagem):
+        """Libera os trabalhadores (plano "erro") e lança ValueError no rank 0."""
+        self.comm.bcast("erro", root=0)
+        raise ValueError(mensagem)
+
+    def _matriz_n_por_k(self, valores, nome):
+        """`valores` como matriz N x k (um vetor de N elementos vira N x 1); forma inválida chama _erro() em vez de lançar só no rank 0."""
+        n = self.M.shape[0]
+        try:
+            valores = np.asarray(valores, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            self._erro(f"{nome} deve ser numerica: {e}")
+        if valores.ndim == 1 and valores.size == n:
+            return valores.reshape(n, 1)
+        if valores.ndim != 2 or valores.shape[0] != n:
+            self._erro(f"{nome} deve ter forma ({n}, k) (recebida {valores.shape}).")
+        return valores
+
+    def _indices(self, indices, nome):
+        """Índices distintos em [0, N); inválidos chamam _erro()."""
+        n = self.M.shape[0]
+        indices = np.atleast_1d(np.asarray(indices))
+        if indices.ndim != 1 or indices.size == 0 or not np.issubdtype(indices.dtype, np.integer):
+            self._erro(f"Indices de {nome} devem ser uma lista nao vazia de inteiros.")
+        if indices.min() < -n or indices.max() >= n:
+            self._erro(f"Indices de {nome} fora do intervalo [0, {n}).")
+        indices = indices % n
+        if np.unique(indices).size != indices.size:
+            self._erro(f"Indices de {nome} repetidos.")
+        return indices
+
+    def _nova_base(self, M, fatores, slogdet):
+        self.M = np.array(M, dtype=np.float64)
+        self._fatores = fatores
+        self._slogdet_base = slogdet
+        k0 = np.empty((M.shape[0], 0))
+        self._U, self._V, self._W = k0, k0, k0
+
+    def _resolver(self, U):
+        """M_base⁻¹·U pelos fatores do complemento de Schur: O(n²k)."""
+        LU, piv, X, C, LU_S, piv_S = self._fatores
+        n1 = LU.shape[0]
+        Y1 = resolver_lu(LU, piv, U[:n1])
+        Z2 = resolver_lu(LU_S, piv_S, U[n1:] - C @ Y1)
+        return np.vstack([Y1 - X @ Z2, Z2])
+
+    # ======================================================
+    # Atualizações de posto baixo
+    # ======================================================
+
+    def atualizar(self, U=None, V=None):
+        """
+        Substitui a matriz atual M por M + U·Vᵀ (U e V de N x k, no rank 0) e retorna o novo determinante pelo lema do
+        determinante da matriz, em O(N²k), sem refazer o complemento de Schur.
+        """
+        comm = self.comm
+        inicio = time.perf_counter()
+
+        if comm.Get_rank() != 0:
+            plano = comm.bcast(None, root=0)
+            if plano == "refatorar":
+                return self.determinante(None)
+            return None
+
+        if self.M is None:
+            self._erro("A sessao ainda nao tem matriz: chame determinante(M) antes de atualizar().")
+        n = self.M.shape[0]
+        U = self._matriz_n_por_k(U, "U")
+        V = self._matriz_n_por_k(V, "V")
+        if U.shape != V.shape:
+            self._erro(f"U e V devem ter a mesma forma (recebidos {U.shape} e {V.shape}).")
+
+        self.M += U @ V.T
+        posto = self._U.shape[1] + U.shape[1]
+        posto_maximo = self.posto_maximo if self.posto_maximo is not None else max(1, n // 8)
+        if self._fatores is None or posto > posto_maximo:
+            comm.bcast("refatorar", root=0)
+            resultado = self.determinante(self.M)
+            resultado["atualizacao"] = "refatorada"
+            return resultado
+        comm.bcast("local", root=0)
+
+        with fase("resolucao"):
+            self._U = np.hstack([self._U, U])
+            self._V = np.hstack([self._V, V])
+            self._W = np.hstack([self._W, self._resolver(U)])
+            capacitancia = np.eye(posto) + self._V.T @ self._W
+            sinal_cap, log_cap = np.linalg.slogdet(capacitancia)
+
+        sinal, logabs = combinar_slogdet(self._slogdet_base, (float(sinal_cap), float(log_cap)))
+        return resultado_final(sinal, logabs, time.perf_counter() - inicio, modo="sessao", atualizacao="lema",
+                               posto_acumulado=posto, n=n, processos=comm.Get_size())
+
+    def substituir_linhas(self, indices=None, linhas=None):
+        """Troca as linhas `indices` da matriz atual por `linhas` (k x N): atualização de posto k."""
+        if self.comm.Get_rank() != 0 or self.M is None:
+            return self.atualizar()
+        indices = self._indices(indices, "linhas")
+        n = self.M.shape[0]
+        try:
+            linhas = np.atleast_2d(np.asarray(linhas, dtype=np.float64))
+        except (TypeError, ValueError) as e:
+            self._erro(f"linhas deve ser numerica: {e}")
+        if linhas.shape != (indices.size, n):
+            self._erro(f"linhas deve ter forma ({indices.size}, {n}) (recebida {linhas.shape}).")
+        U = np.zeros((n, indices.size))
+        U[indices, np.arange(indices.size)] = 1.0
+        return self.atualizar(U, (linhas - self.M[indices]).T)
+
+    def substituir_colunas(self, indices=None, colunas=None):
+        """Troca as colunas `indices` da matriz atual por `colunas` (N x k): atualização de posto k."""
+        if self.comm.Get_rank() != 0 or self.M is None:
+            return self.atualizar()
+        indices = self._indices(indices, "colunas")
+        colunas = self._matriz_n_por_k(colunas, "colunas")
+        if colunas.shape[1] != indices.size:
+            self._erro(f"Sao {indices.size} indices de colunas e {colunas.shape[1]} colunas novas.")
+        V = np.zeros((self.M.shape[0], indices.size))
+        V[indices, np.arange(indices.size)] = 1.0
+        return self.atualizar(colunas - self.M[:, indices], V)
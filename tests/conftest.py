@@ -0,0 +1,75 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+from mpi4py import MPI
+
+# ======================================================
+# Testes: python -m pytest -q tests   ou   mpiexec -n 3 python -m pytest -q -p no:cacheprovider tests
+# ======================================================
+
+# ======================================================================================================================================
+# Os módulos ficam na raiz do repositório (sem pacote), então a raiz entra no sys.path.
+#
+# Os testes das operações coletivas rodam em todos os processos de MPI.COMM_WORLD: com mpiexec -n 1/2/3 cada processo executa
+# a mesma sequência de testes, as matrizes são geradas com sementes fixas (iguais em todos os processos) e só o rank 0, que
+# recebe o resultado, faz as verificações. Os testes seriais (fatoração, CRT, Bareiss) apenas se repetem em cada processo.
+# ======================================================================================================================================
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Erro aceito em log|det| nas comparações com np.linalg.slogdet (mesma ordem do --tolerancia do benchmark)
+TOLERANCIA = 1e-8
+
+
+@pytest.fixture
+def comm():
+    return MPI.COMM_WORLD
+
+
+@pytest.fixture
+def diretorio_comum(comm):
+    """Diretório temporário criado pelo rank 0 e visível a todos os processos (mesmo nó), removido ao final."""
+    caminho = comm.bcast(tempfile.mkdtemp(prefix="det-teste-") if comm.Get_rank() == 0 else None, root=0)
+    yield caminho
+    comm.Barrier()
+    if comm.Get_rank() == 0:
+        shutil.rmtree(caminho, ignore_errors=True)
+
+
+def matriz_aleatoria(n, semente=0):
+    """Matriz gaussiana bem condicionada (diagonal reforçada), igual em todos os processos."""
+    rng = np.random.default_rng(semente)
+    return rng.standard_normal((n, n)) + np.sqrt(n) * np.eye(n)
+
+
+def matriz_singular(n, semente=0):
+    """Posto n - 1: a última linha é combinação das duas primeiras."""
+    M = matriz_aleatoria(n, semente)
+    M[-1] = M[0] - 2.0 * M[1]
+    return M
+
+
+def matriz_lider_singular(n, semente=0):
+    """M não singular com o bloco líder A = M[:n//2, :n//2] singular (exige o pivotamento em bloco)."""
+    rng = np.random.default_rng(semente)
+    M = rng.standard_normal((n, n))
+    n2 = n // 2
+    M[1, :n2] = M[0, :n2]
+    return M
+
+
+def matriz_inteira(n, semente=0, limite=9):
+    rng = np.random.default_rng(semente)
+    return rng.integers(-limite, limite + 1, size=(n, n)).astype(np.float64)
+
+
+def conferir_slogdet(resultado, M, tolerancia=TOLERANCIA):
+    """Compara (sinal, log|det|) de um resultado de determinante() com np.linalg.slogdet."""
+    sinal, logabs = np.linalg.slogdet(M)
+    assert resultado["sinal"] == sinal
+    assert not resultado["singular"]
+    assert abs(resultado["log_abs_det"] - logabs) <= tolerancia * max(1.0, abs(logabs))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from aritmetica_modular import det_exato_distribuido, det_mod_p, primos, quantidade_primos, reconstruir_crt
+from conftest import matriz_inteira, matriz_lider_singular
+from determinante_laplace import determinante_bareiss
+from determinante_paralelo import determinante
+
+
+def test_primos_distintos_abaixo_do_limite():
+    p = primos(5)
+    assert len(set(p)) == 5 and all(q < 2 ** 31 for q in p)
+    assert list(p) == sorted(p, reverse=True)
+
+
+@pytest.mark.parametrize("x", [0, 1, -1, 12345678901234567890, -(3 ** 80)])
+def test_reconstruir_crt_no_intervalo_simetrico(x):
+    modulos = primos(6)
+    assert reconstruir_crt([x % p for p in modulos], modulos) == x
+
+
+@pytest.mark.parametrize("semente", range(3))
+def test_det_mod_p_igual_a_bareiss(semente):
+    M = matriz_inteira(12, semente)
+    exato = determinante_bareiss(M)
+    for p in primos(3):
+        assert det_mod_p(M.astype(np.int64), p) == exato % p
+
+
+def test_det_mod_p_com_pivo_nulo():
+    M = np.array([[0, 2], [3, 4]], dtype=np.int64)  # exige troca de linhas
+    assert det_mod_p(M, 7) == (-6) % 7
+
+
+def casos():
+    singular = matriz_inteira(20, 1)
+    singular[-1] = singular[0] - 2 * singular[1]
+    grande = matriz_inteira(30, 2, limite=10 ** 6)  # Hadamard ~ 2^700: dezenas de primos divididos entre os processos
+    return {"aleatoria": matriz_inteira(25, 0), "singular": singular, "lider_singular": np.round(4 * matriz_lider_singular(20, 3)),
+            "grande": grande}
+
+
+@pytest.mark.parametrize("nome", ["aleatoria", "singular", "lider_singular", "grande"])
+def test_det_exato_distribuido_igual_a_bareiss(comm, nome):
+    M = casos()[nome]
+    resultado = det_exato_distribuido(comm, M if comm.Get_rank() == 0 else None)
+    if comm.Get_rank() == 0:
+        det, k = resultado
+        assert k == quantidade_primos(M)
+        assert det == determinante_bareiss(M)
+        if nome == "grande":
+            assert k > comm.Get_size()
+    else:
+        assert resultado is None
+
+
+def test_modo_exato_de_determinante(comm):
+    M = matriz_inteira(40, 4)
+    resultado = determinante(M, comm, exato=True, verbosidade=0)
+    if comm.Get_rank() == 0:
+        exato = determinante_bareiss(M)
+        assert resultado["modo"] == "exato"
+        assert int(resultado["det_exato"]) == exato
+        assert resultado["sinal"] == np.sign(exato)
+
+
+def test_modo_exato_recusa_matriz_nao_inteira(comm):
+    M = np.eye(4) * 0.5
+    if comm.Get_rank() == 0:
+        with pytest.raises(ValueError):
+            determinante(M, comm, exato=True, verbosidade=0)
+    else:
+        assert determinante(None, comm, exato=True, verbosidade=0) is None
@@ -0,0 +1,79 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import determinante_laplace as modulo
+from conftest import matriz_inteira, matriz_lider_singular
+from determinante_laplace import determinante_bareiss, determinante_bitmask, determinante_laplace
+
+
+@pytest.fixture(params=["flint", "python"])
+def sem_flint(request, monkeypatch):
+    """Roda o teste com e sem o caminho opcional do python-flint (fmpz_mat.det) no Bareiss de matrizes inteiras."""
+    if request.param == "flint" and modulo.flint is None:
+        pytest.skip("python-flint nao instalado")
+    if request.param == "python":
+        monkeypatch.setattr(modulo, "flint", None)
+    return request.param
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 7])
+def test_tres_metodos_concordam_em_inteiros(sem_flint, n):
+    M = matriz_inteira(n, n)
+    esperado = int(round(np.linalg.det(M)))
+    assert determinante_laplace(M) == pytest.approx(esperado)
+    assert determinante_bitmask(M) == esperado
+    assert determinante_bareiss(M) == esperado
+    assert isinstance(determinante_bareiss(M), int)
+
+
+def test_bitmask_e_bareiss_exatos_acima_de_float64(sem_flint):
+    # det(10^6 I_3) = 10^18 > 2^53: os inteiros do Python não perdem dígitos
+    M = np.diag([10.0 ** 6, 10.0 ** 6, 10.0 ** 6 + 1])
+    assert determinante_bitmask(M) == determinante_bareiss(M) == 10 ** 12 * (10 ** 6 + 1)
+
+
+@pytest.mark.parametrize("metodo", [determinante_bitmask, determinante_bareiss])
+def test_singular_e_lider_singular(sem_flint, metodo):
+    M = matriz_inteira(8, 1)
+    M[-1] = M[0] - 2 * M[1]
+    assert metodo(M) == 0
+    # bloco líder singular (e a_00 = 0): exige troca de linhas na eliminação
+    L = np.round(4 * matriz_lider_singular(8, 2))
+    L[0, 0] = 0.0
+    assert metodo(L) == int(round(np.linalg.det(L)))
+
+
+def test_bareiss_flint_igual_ao_python(monkeypatch):
+    if modulo.flint is None:
+        pytest.skip("python-flint nao instalado")
+    M = matriz_inteira(60, 5)
+    com_flint = determinante_bareiss(M)
+    monkeypatch.setattr(modulo, "flint", None)
+    assert determinante_bareiss(M) == com_flint
+
+
+def test_bareiss_500x500_com_flint():
+    if modulo.flint is None:
+        pytest.skip("python-flint nao instalado")
+    M = matriz_inteira(500, 6)
+    exato = determinante_bareiss(M)
+    sinal, logabs = np.linalg.slogdet(M)
+    assert isinstance(exato, int) and np.sign(exato) == sinal
+    assert math.log(abs(exato)) == pytest.approx(logabs, rel=1e-10)
+
+
+def test_bareiss_com_elementos_racionais():
+    M = matriz_lider_singular(9, 3)
+    exato = determinante_bareiss(M)
+    assert isinstance(exato, float)
+    assert exato == pytest.approx(np.linalg.det(M), rel=1e-10)
+    assert determinante_bareiss(np.array([[0.5, 0.25], [1.0, 3.0]])) == float(Fraction(5, 4))
+
+
+@pytest.mark.parametrize("metodo", [determinante_laplace, determinante_bitmask, determinante_bareiss])
+def test_matriz_nao_quadrada(metodo):
+    with pytest.raises(ValueError):
+        metodo(np.ones((2, 3)))
@@ -0,0 +1,177 @@
+import numpy as np
+import pytest
+
+import fatoracao
+from conftest import conferir_slogdet, matriz_aleatoria, matriz_lider_singular, matriz_singular
+from determinante_paralelo import determinante
+from leitura_matriz import carregar_matriz
+
+# Modos do caminho denso (opções de determinante(), com os nomes do argparse); blocos e tiles pequenos para que mesmo
+# matrizes de ~100 linhas tenham várias tarefas por processo
+MODOS = {
+    "padrao": {},
+    "dinamico": {"dinamico": True, "bloco": 8},
+    "pipeline": {"pipeline": True, "bloco": 8},
+    "grade2d": {"grade2d": True, "tile": 8},
+    "recursivo": {"recursivo": True, "corte": 16},
+    "threads": {"backend": "threads", "trabalhadores": 2, "bloco": 16},
+    "processos": {"backend": "processos", "trabalhadores": 2, "bloco": 16},
+}
+
+
+def calcular(comm, M, **opcoes):
+    return determinante(M if comm.Get_rank() == 0 else None, comm, logdet=True, estrutura=False, verbosidade=0, **opcoes)
+
+
+@pytest.mark.parametrize("n", [2, 3, 101])
+@pytest.mark.parametrize("modo", MODOS)
+def test_modos_iguais_a_slogdet(comm, modo, n):
+    M = matriz_aleatoria(n, n)
+    resultado = calcular(comm, M, **MODOS[modo])
+    if comm.Get_rank() == 0:
+        conferir_slogdet(resultado, M)
+        assert not resultado.get("permutacao")
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_modos_matriz_singular(comm, modo):
+    resultado = calcular(comm, matriz_singular(96, 1), **MODOS[modo])
+    if comm.Get_rank() == 0:
+        assert resultado["singular"] and resultado["sinal"] == 0
+        assert resultado["log_abs_det"] is None
+
+
+def test_mesma_singularidade_com_e_sem_logdet(comm):
+    """A última linha é o dobro da primeira: det(S) ~ 1.8e-13 por arredondamento, singular nas duas saídas (--limiar-singular)."""
+    M = np.array([[8, 5, 3, 1], [2, 7, 4, 9], [6, 1, 5, 4], [16, 10, 6, 2]], dtype=np.float64)
+    resultados = [determinante(M if comm.Get_rank() == 0 else None, comm, logdet=logdet, estrutura=False, verbosidade=0)
+                  for logdet in (False, True)]
+    if comm.Get_rank() == 0:
+        assert [(r["singular"], r["sinal"]) for r in resultados] == [(True, 0.0), (True, 0.0)]
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_modos_bloco_lider_singular(comm, modo):
+    M = matriz_lider_singular(96, 2)
+    resultado = calcular(comm, M, **MODOS[modo])
+    if comm.Get_rank() == 0:
+        conferir_slogdet(resultado, M, 1e-7)
+        if modo != "recursivo":
+            assert resultado["permutacao"]
+
+
+def test_recursivo_fatora_cada_A_uma_vez(comm, monkeypatch):
+    """N = 64, corte 16: LU de A (32), de A (16) e do caso base S (16) no rank 0, nenhuma nos demais (1 processo: LU de M)."""
+    chamadas = []
+    fatorar = fatoracao.fatorar_lu_rapido
+    monkeypatch.setattr(fatoracao, "fatorar_lu_rapido", lambda M: chamadas.append(M.shape) or fatorar(M))
+    M = matriz_aleatoria(64, 11)
+    resultado = calcular(comm, M, **MODOS["recursivo"])
+    if comm.Get_rank() == 0:
+        conferir_slogdet(resultado, M)
+        assert chamadas == ([(32, 32), (16, 16), (16, 16)] if comm.Get_size() > 1 else [(64, 64)])
+    else:
+        assert chamadas == []
+
+
+@pytest.mark.parametrize("modo", ["padrao", "dinamico", "pipeline"])
+def test_entrada_mapeada_lida_pelos_processos(comm, diretorio_comum, modo):
+    """Com entrada .npy cada processo lê os próprios blocos de B e C do arquivo (np.memmap)."""
+    caminho = f"{diretorio_comum}/m.npy"
+    for nome, M in (("aleatoria", matriz_aleatoria(90, 3)), ("lider_singular", matriz_lider_singular(90, 4))):
+        if comm.Get_rank() == 0:
+            np.save(caminho, M)
+        comm.Barrier()
+        mapeada = carregar_matriz(caminho) if comm.Get_rank() == 0 else None
+        resultado = calcular(comm, mapeada, entrada=caminho, **MODOS[modo])
+        if comm.Get_rank() == 0:
+            assert isinstance(mapeada, np.memmap)
+            conferir_slogdet(resultado, M, 1e-7)
+        comm.Barrier()
+
+
+def test_det_sem_logdet(comm):
+    M = matriz_aleatoria(20, 5) / 4
+    resultado = determinante(M, comm, estrutura=False, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["det"] == pytest.approx(np.linalg.det(M), rel=1e-9)
+
+
+def estruturadas():
+    rng = np.random.default_rng(6)
+    n = 120
+    triangular = np.triu(rng.standard_normal((n, n))) + 2 * np.eye(n)
+    bloco = matriz_aleatoria(n, 7)
+    bloco[:40, 40:] = 0.0  # B nulo: det = det(M[:40, :40]) * det(M[40:, 40:])
+    bloco[40:90, 90:] = 0.0
+    banda = np.triu(np.tril(matriz_aleatoria(n, 8), 1), -1)
+    linha_nula = matriz_aleatoria(n, 9)
+    linha_nula[17] = 0.0
+    return {"triangular": triangular, "bloco_triangular": bloco, "banda": banda, "singular": linha_nula}
+
+
+@pytest.mark.parametrize("tipo", ["triangular", "bloco_triangular", "banda", "singular"])
+def test_caminhos_estruturados(comm, tipo):
+    M = estruturadas()[tipo]
+    resultado = determinante(M if comm.Get_rank() == 0 else None, comm, logdet=True, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["modo"] == "estrutura" and resultado["estrutura"] == tipo
+        if tipo == "singular":
+            assert resultado["singular"]
+        else:
+            conferir_slogdet(resultado, M)
+
+
+def test_estrutura_da_entrada_mapeada_so_com_opcao(comm, diretorio_comum):
+    """A varredura de estrutura leria o arquivo inteiro: na entrada mapeada, só com --estrutura-mapeada."""
+    M = estruturadas()["triangular"]
+    caminho = f"{diretorio_comum}/triangular.npy"
+    if comm.Get_rank() == 0:
+        np.save(caminho, M)
+    comm.Barrier()
+    for estrutura_mapeada, modo in ((False, "schur"), (True, "estrutura")):
+        mapeada = carregar_matriz(caminho) if comm.Get_rank() == 0 else None
+        resultado = determinante(mapeada, comm, entrada=caminho, estrutura_mapeada=estrutura_mapeada, logdet=True,
+                                 verbosidade=0)
+        if comm.Get_rank() == 0:
+            assert resultado["modo"] == modo
+            conferir_slogdet(resultado, M)
+    comm.Barrier()
+
+
+def test_bloco_triangular_com_bloco_principal_lider_singular(comm):
+    # O maior bloco diagonal (> N/2) usa o caminho distribuído com mais de um processo, inclusive o pivotamento em bloco
+    M = matriz_aleatoria(100, 10)
+    M[:80, 80:] = 0.0
+    M[:80, :80] = matriz_lider_singular(80, 11)
+    resultado = determinante(M if comm.Get_rank() == 0 else None, comm, logdet=True, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["estrutura"] == "bloco_triangular"
+        conferir_slogdet(resultado, M, 1e-7)
+
+
+def test_esparsa(comm):
+    sp = pytest.importorskip("scipy.sparse")
+    M = (sp.random(150, 150, density=0.05, random_state=12) + 4 * sp.eye(150)).tolil()
+    M[0, 149] = 1.0  # sem estrutura triangular nem de banda
+    M[149, 0] = 1.0
+    M = M.tocsr()
+    resultado = determinante(M if comm.Get_rank() == 0 else None, comm, logdet=True, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["estrutura"] == "esparsa"
+        conferir_slogdet(resultado, M.toarray())
+
+
+@pytest.mark.parametrize("M, opcoes", [(np.ones((1, 1)), {}), (np.ones((2, 3)), {}), (np.eye(3), {"limiar_singular": -1.0}),
+                                       (np.eye(3), {"grade2d": True, "tile": 0}), (np.eye(3), {"fora_da_memoria": True})])
+def test_entrada_invalida_nao_trava_os_trabalhadores(comm, M, opcoes):
+    if comm.Get_rank() == 0:
+        with pytest.raises(ValueError):
+            determinante(M, comm, verbosidade=0, **opcoes)
+    else:
+        assert determinante(None, comm, verbosidade=0, **opcoes) is None
+
+
+def test_opcao_desconhecida(comm):
+    with pytest.raises(TypeError):
+        determinante(np.eye(3), comm, sem_estrutura=True)
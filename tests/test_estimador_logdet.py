@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from mpi4py import MPI
+
+from determinante_paralelo import determinante
+from estimador_logdet import estimar_logdet
+from leitura_matriz import carregar_matriz
+
+
+def matriz_spd(n, semente=0, condicao=10.0):
+    """Q·diag(λ)·Qᵀ com autovalores entre 1 e `condicao`."""
+    rng = np.random.default_rng(semente)
+    Q, _ = np.linalg.qr(rng.standard_normal((n, n)))
+    M = (Q * np.logspace(0, np.log10(condicao), n)) @ Q.T
+    return (M + M.T) / 2
+
+
+def no_rank0(comm, valor):
+    return valor if comm.Get_rank() == 0 else None
+
+
+def test_intervalo_contem_o_valor_exato(comm):
+    M = matriz_spd(200, 1)
+    resultado = estimar_logdet(comm, no_rank0(comm, M), sondas=64, passos=30, semente=3, confianca=0.99)
+    if comm.Get_rank() == 0:
+        exato = np.linalg.slogdet(M)[1]
+        inferior, superior = resultado["intervalo"]
+        assert inferior <= exato <= superior
+        assert abs(resultado["estimativa"] - exato) <= 0.05 * abs(exato)
+        assert len(resultado["amostras"]) == 64
+
+
+def test_nao_depende_da_quantidade_de_processos(comm):
+    """As sondas são geradas por linha a partir da semente: o resultado é o mesmo com qualquer -n."""
+    M = matriz_spd(90, 2)
+    distribuido = estimar_logdet(comm, no_rank0(comm, M), sondas=8, passos=20, semente=5)
+    if comm.Get_rank() == 0:
+        serial = estimar_logdet(MPI.COMM_SELF, M, sondas=8, passos=20, semente=5)
+        np.testing.assert_allclose(distribuido["amostras"], serial["amostras"], rtol=1e-10)
+
+
+def test_matriz_diagonal_exata(comm):
+    # Com 4 autovalores distintos o Lanczos termina em 4 passos e cada amostra zᵀ log(M) z = Σ log(d_i) é exata
+    d = np.tile([1.0, 2.0, 5.0, 9.0], 25)
+    M = np.diag(d)
+    resultado = estimar_logdet(comm, no_rank0(comm, M), sondas=4, passos=10)
+    if comm.Get_rank() == 0:
+        assert resultado["estimativa"] == pytest.approx(np.sum(np.log(d)), rel=1e-10)
+        assert resultado["passos"] == 4
+        assert resultado["erro_padrao"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_entrada_mapeada(comm, diretorio_comum):
+    M = matriz_spd(120, 4)
+    caminho = f"{diretorio_comum}/spd.npy"
+    if comm.Get_rank() == 0:
+        np.save(caminho, M)
+    comm.Barrier()
+    resultado = estimar_logdet(comm, carregar_matriz(caminho), mapeada=True, sondas=32, passos=25, confianca=0.99)
+    if comm.Get_rank() == 0:
+        inferior, superior = resultado["intervalo"]
+        assert inferior <= np.linalg.slogdet(M)[1] <= superior
+
+
+@pytest.mark.parametrize("caso", ["nao_simetrica", "indefinida"])
+def test_recusa_matriz_que_nao_eh_spd(comm, caso):
+    M = matriz_spd(60, 6)
+    if caso == "nao_simetrica":
+        M[0, 1] += 1.0
+    else:
+        M -= 5.0 * np.eye(60)
+    if comm.Get_rank() == 0:
+        with pytest.raises(ValueError):
+            estimar_logdet(comm, M, sondas=4, passos=20)
+    else:
+        assert estimar_logdet(comm, None, sondas=4, passos=20) is None
+
+
+def test_modo_estimar_de_determinante(comm):
+    M = matriz_spd(100, 7)
+    resultado = determinante(no_rank0(comm, M), comm, estimar=True, sondas=32, confianca=0.99, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["modo"] == "estimativa" and resultado["sinal"] == 1.0
+        inferior, superior = resultado["intervalo"]
+        assert inferior <= np.linalg.slogdet(M)[1] <= superior
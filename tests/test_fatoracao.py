@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+import fatoracao
+from conftest import matriz_aleatoria, matriz_lider_singular, matriz_singular
+from fatoracao import (combinar_slogdet, estimar_condicao_1, fatorar_bloco_lider, fatorar_lu, fatorar_lu_rapido, razao_pivos,
+                       resolver_distribuido, resolver_lu, resolver_lu_transposto, slogdet_com_limiar, slogdet_lu,
+                       slogdet_schur_com_limiar)
+
+
+@pytest.fixture(params=["lapack", "numpy"])
+def sem_scipy(request, monkeypatch):
+    """Roda o teste com e sem os caminhos opcionais do scipy (lu_factor e solve_triangular)."""
+    if request.param == "numpy":
+        monkeypatch.setattr(fatoracao, "lu_factor", None)
+        monkeypatch.setattr(fatoracao, "solve_triangular", None)
+    return request.param
+
+
+@pytest.mark.parametrize("n, bloco", [(1, 64), (7, 3), (130, 64), (200, 16)])
+def test_fatorar_lu_reconstroi_PA(n, bloco):
+    A = np.random.default_rng(n).standard_normal((n, n))
+    LU, piv, trocas = fatorar_lu(A, bloco)
+    L = np.tril(LU, -1) + np.eye(n)
+    U = np.triu(LU)
+    np.testing.assert_allclose(L @ U, A[piv], atol=1e-12 * n)
+    sinal, logabs = slogdet_lu(LU, trocas)
+    assert (sinal, pytest.approx(logabs, abs=1e-10)) == tuple(np.linalg.slogdet(A))
+
+
+def test_fatorar_lu_retangular():
+    M = np.random.default_rng(1).standard_normal((90, 40))
+    LU, piv, _ = fatorar_lu(M)
+    L = np.tril(LU, -1) + np.eye(90, 40)
+    np.testing.assert_allclose(L @ np.triu(LU[:40]), M[piv], atol=1e-12)
+
+
+def test_fatorar_lu_rapido_retangular(sem_scipy):
+    M = np.random.default_rng(1).standard_normal((90, 40))
+    LU, piv, trocas = fatorar_lu_rapido(M)
+    L = np.tril(LU, -1) + np.eye(90, 40)
+    np.testing.assert_allclose(L @ np.triu(LU[:40]), M[piv], atol=1e-12)
+    assert sorted(piv.tolist()) == list(range(90))
+    # A paridade de `trocas` é a da permutação piv
+    assert (-1.0) ** trocas == np.linalg.det(np.eye(90)[piv])
+
+
+def test_fatorar_lu_singular():
+    with pytest.raises(np.linalg.LinAlgError):
+        fatorar_lu(np.zeros((4, 4)))
+    with pytest.raises(np.linalg.LinAlgError):
+        fatorar_lu_rapido(np.ones((5, 5)) * [[1.0], [2.0], [3.0], [4.0], [5.0]])
+
+
+def test_fatorar_lu_rapido_no_formato_de_fatorar_lu(sem_scipy):
+    A = matriz_aleatoria(150, 2)
+    LU, piv, trocas = fatorar_lu_rapido(A)
+    L = np.tril(LU, -1) + np.eye(150)
+    np.testing.assert_allclose(L @ np.triu(LU), A[piv], atol=1e-10)
+    assert slogdet_lu(LU, trocas)[0] == np.linalg.slogdet(A)[0]
+
+
+@pytest.mark.parametrize("k", [1, 5])
+def test_substituicoes(sem_scipy, k):
+    rng = np.random.default_rng(3)
+    A = matriz_aleatoria(100, 3)
+    B = rng.standard_normal((100, k))
+    LU, piv, _ = fatorar_lu(A)
+    np.testing.assert_allclose(resolver_lu(LU, piv, B), np.linalg.solve(A, B), atol=1e-12)
+    np.testing.assert_allclose(resolver_lu_transposto(LU, piv, B), np.linalg.solve(A.T, B), atol=1e-12)
+
+
+@pytest.mark.parametrize("semente", range(4))
+def test_estimar_condicao_1(sem_scipy, semente):
+    rng = np.random.default_rng(semente)
+    A = rng.standard_normal((80, 80)) @ np.diag(np.logspace(0, semente + 1, 80))
+    LU, piv, _ = fatorar_lu(A)
+    exato = np.linalg.cond(A, 1)
+    # O estimador de Hager-Higham é um limite inferior, quase sempre exato a menos de um fator pequeno
+    assert exato / 3 <= estimar_condicao_1(A, LU, piv) <= exato * (1 + 1e-8)
+
+
+def test_bloco_lider_sem_permutacao(sem_scipy):
+    M = matriz_aleatoria(40, 5)
+    perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(M, 20)
+    assert perm is None and trocas_perm == 0
+    assert slogdet_lu(LU, trocas)[1] == pytest.approx(np.linalg.slogdet(M[:20, :20])[1], abs=1e-10)
+
+
+def test_bloco_lider_singular_permuta_linhas(sem_scipy):
+    M = matriz_lider_singular(40, 6)
+    assert np.linalg.matrix_rank(M[:20, :20]) < 20
+    perm, trocas_perm, LU, piv, trocas = fatorar_bloco_lider(M, 20)
+    assert perm is not None and sorted(perm.tolist()) == list(range(40))
+    # O novo bloco líder é não singular e det(M) = (-1)^trocas det(M[perm])
+    assert np.linalg.matrix_rank(M[perm][:20, :20]) == 20
+    sinal = -1.0 if trocas_perm % 2 else 1.0
+    assert sinal * np.linalg.slogdet(M[perm])[0] == np.linalg.slogdet(M)[0]
+
+
+def test_bloco_lider_de_matriz_singular(sem_scipy):
+    M = matriz_aleatoria(10, 7)
+    M[:, 2] = 0.0  # as primeiras colunas não têm posto completo (pivô exatamente nulo, o critério de fatorar_lu)
+    with pytest.raises(np.linalg.LinAlgError):
+        fatorar_bloco_lider(M, 5)
+
+
+def test_slogdet_com_limiar(sem_scipy):
+    M = matriz_aleatoria(30, 8)
+    assert slogdet_com_limiar(M, 1e-12) == pytest.approx(tuple(np.linalg.slogdet(M)))
+    assert slogdet_com_limiar(matriz_singular(30, 8), 1e-12) == (0.0, -np.inf)
+    assert slogdet_com_limiar(np.zeros((3, 3))) == (0.0, -np.inf)
+
+
+def test_slogdet_schur_com_limiar(sem_scipy):
+    M = matriz_aleatoria(40, 9)
+    LU_A, _, trocas_A = fatorar_lu_rapido(M[:20, :20])
+    S = M[20:, 20:] - M[20:, :20] @ np.linalg.solve(M[:20, :20], M[:20, 20:])
+    sinalS, logS, fatores_S = slogdet_schur_com_limiar(LU_A, S, 1e-12)
+    assert combinar_slogdet(slogdet_lu(LU_A, trocas_A), (sinalS, logS)) == pytest.approx(tuple(np.linalg.slogdet(M)))
+    assert slogdet_schur_com_limiar(LU_A, S, 1e-12, fatores_S)[:2] == (sinalS, logS)
+    # Um pivô de S pequeno só em relação aos de A: singular com limiar, regular sem
+    S_pequeno = np.diag([1e-14, 1e-14])
+    assert slogdet_schur_com_limiar(np.diag([1.0, 1.0]), S_pequeno, 1e-12)[:2] == (0.0, -np.inf)
+    assert slogdet_schur_com_limiar(np.diag([1.0, 1.0]), S_pequeno)[0] == 1.0
+    assert slogdet_schur_com_limiar(LU_A, np.zeros((2, 2)), 1e-12) == (0.0, -np.inf, None)
+
+
+def test_razao_pivos_e_combinar_slogdet():
+    assert razao_pivos(np.diag([4.0, -2.0]), np.diag([1.0])) == 0.25
+    assert combinar_slogdet((-1.0, 1.0), (-1.0, 2.0)) == (1.0, 3.0)
+    assert combinar_slogdet((1.0, 1.0), (0.0, -np.inf)) == (0.0, -np.inf)
+
+
+@pytest.mark.parametrize("m", [1, 2, 7, 64])
+def test_resolver_distribuido(comm, m):
+    # m menor que o número de processos deixa alguns sem colunas
+    rng = np.random.default_rng(m)
+    A = matriz_aleatoria(50, m)
+    B = rng.standard_normal((50, m))
+    LU, piv, _ = fatorar_lu(A)
+    if comm.Get_rank() == 0:
+        np.testing.assert_allclose(resolver_distribuido(comm, LU, piv, B), np.linalg.solve(A, B), atol=1e-12)
+    else:
+        assert resolver_distribuido(comm, None, None, None) is None
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import conferir_slogdet, matriz_aleatoria, matriz_lider_singular
+from determinante_paralelo import determinante
+from fora_da_memoria import slogdet_fora_da_memoria
+from leitura_matriz import carregar_matriz
+
+# Orçamento pequeno: para N = 200, blocos líderes de 57 linhas e dois níveis gravados em disco antes do caso base
+ORCAMENTO = 80_000
+
+
+def gravar(comm, diretorio, nome, M):
+    caminho = os.path.join(diretorio, nome + ".npy")
+    if comm.Get_rank() == 0:
+        np.save(caminho, M)
+    comm.Barrier()
+    return carregar_matriz(caminho)
+
+
+def casos():
+    linha_nula = matriz_aleatoria(200, 3)
+    linha_nula[150] = 0.0  # só aparece como pivô nulo no S do último nível
+    coluna_nula = matriz_aleatoria(200, 4)
+    coluna_nula[:, 5] = 0.0  # colunas do primeiro painel linearmente dependentes
+    return {"aleatoria": matriz_aleatoria(200, 1), "lider_singular": matriz_lider_singular(200, 2),
+            "linha_nula": linha_nula, "coluna_nula": coluna_nula}
+
+
+@pytest.mark.parametrize("nome", ["aleatoria", "lider_singular", "linha_nula", "coluna_nula"])
+def test_igual_a_slogdet(comm, diretorio_comum, nome):
+    M = casos()[nome]
+    mapeada = gravar(comm, diretorio_comum, nome, M)
+    resultado = slogdet_fora_da_memoria(comm, mapeada, ORCAMENTO, diretorio_comum)
+    del mapeada
+    if comm.Get_rank() != 0:
+        assert resultado is None
+        return
+    sinal, logabs, niveis = resultado
+    if nome in ("linha_nula", "coluna_nula"):
+        assert (sinal, logabs) == (0.0, -np.inf)
+    else:
+        assert niveis == 2
+        conferir_slogdet({"sinal": sinal, "log_abs_det": logabs, "singular": sinal == 0}, M, 1e-7)
+    # Os arquivos intermediários de todos os níveis foram apagados
+    assert sorted(os.listdir(diretorio_comum)) == [nome + ".npy"]
+
+
+def test_modo_fora_da_memoria_de_determinante(comm, diretorio_comum):
+    M = matriz_lider_singular(420, 5)  # 1.4 MB > --memoria-max 1
+    caminho = os.path.join(diretorio_comum, "m.npy")
+    mapeada = gravar(comm, diretorio_comum, "m", M)
+    resultado = determinante(mapeada if comm.Get_rank() == 0 else None, comm, fora_da_memoria=True, memoria_max=1,
+                             entrada=caminho, temporario=diretorio_comum, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["modo"] == "fora_da_memoria" and resultado["niveis"] >= 1
+        conferir_slogdet(resultado, M, 1e-7)
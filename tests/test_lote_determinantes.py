@@ -0,0 +1,66 @@
+import re
+
+import numpy as np
+import pytest
+
+from conftest import matriz_aleatoria, matriz_lider_singular, matriz_singular
+from lote_determinantes import escalonar, slogdet_local, slogdet_schur_distribuido, trabalhar
+
+LIMIAR = 40  # matrizes com N >= LIMIAR vão para os grupos (fase 1)
+
+LINHA = re.compile(r"^\[(\d+)/(\d+)\] (\S+)(?: \((\d+)x\d+\))?: (.*?)(?:  <- (.*))?$")
+
+
+def lote():
+    matrizes = [
+        ("grande", matriz_aleatoria(64, 1)),
+        ("grande_singular", matriz_singular(60, 2)),
+        ("grande_lider_singular", matriz_lider_singular(50, 3)),
+        ("pequena", matriz_aleatoria(8, 4)),
+        ("pequena_singular", matriz_singular(12, 5)),
+        ("pequena_lider_singular", matriz_lider_singular(10, 6)),
+        ("nao_quadrada", np.ones((3, 4))),
+        ("ilegivel", None),
+    ]
+    return matrizes + [(f"p{i}", matriz_aleatoria(2 + i % 5, 10 + i)) for i in range(12)]
+
+
+def test_lote_igual_a_slogdet(comm, capsys):
+    matrizes = lote()
+    if comm.Get_rank() != 0:
+        trabalhar(comm, 2)
+        return
+    escalonar(comm, matrizes, LIMIAR)
+
+    linhas = [LINHA.match(linha) for linha in capsys.readouterr().out.splitlines()]
+    assert all(linhas) and len(linhas) == len(matrizes)
+    assert sorted(int(m.group(1)) for m in linhas) == list(range(1, len(matrizes) + 1))
+    por_nome = {m.group(3): m for m in linhas}
+    assert por_nome.keys() == {nome for nome, _ in matrizes}
+
+    for nome, M in matrizes:
+        texto = por_nome[nome].group(5)
+        if M is None or M.shape[0] != M.shape[1]:
+            assert texto.startswith("ERRO")
+        elif "singular" in nome and "lider" not in nome:
+            assert texto == "det = 0 (singular)"
+        else:
+            sinal, logabs = np.linalg.slogdet(M)
+            obtido = re.search(r"\(sinal ([+-]\d), log\|det\| = (\S+)\)", texto)
+            assert float(obtido.group(1)) == sinal
+            assert float(obtido.group(2)) == pytest.approx(logabs, abs=1e-6)
+        if comm.Get_size() == 3 and nome.startswith("grande"):
+            # Os dois trabalhadores formam um grupo de tamanho_grupo = 2
+            assert por_nome[nome].group(6) == "grupo do rank 1 (2 processos)"
+
+
+@pytest.mark.parametrize("M", [matriz_singular(48, 7), matriz_lider_singular(48, 8), matriz_aleatoria(48, 9)],
+                         ids=["singular", "lider_singular", "aleatoria"])
+def test_grupo_e_processo_unico_concordam(comm, M):
+    """A mesma matriz tem o mesmo resultado no Schur distribuído (grupo) e no cálculo local (matriz pequena)."""
+    distribuido = slogdet_schur_distribuido(comm, M if comm.Get_rank() == 0 else None)
+    if comm.Get_rank() == 0:
+        local = slogdet_local(M)
+        assert distribuido[0] == local[0]
+        if local[0] != 0:
+            assert distribuido[1] == pytest.approx(local[1], abs=1e-9)
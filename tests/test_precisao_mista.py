@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from benchmark_escalabilidade import gerar_matriz
+from conftest import conferir_slogdet, matriz_lider_singular, matriz_singular
+from determinante_paralelo import determinante
+from fatoracao import corrigir_diagonal_schur, estimar_erro_misto, fatorar_lu_rapido, slogdet_lu
+
+
+def blocos(M):
+    n1 = M.shape[0] // 2
+    return M[:n1, :n1], M[:n1, n1:], M[n1:, :n1], M[n1:, n1:]
+
+
+@pytest.mark.parametrize("n, cond, estrutura", [(600, 1e1, "densa"), (1000, 1e1, "simetrica"), (1000, 1e2, "simetrica"),
+                                                (1000, 1e4, "densa"), (800, 1e1, "diagonal_dominante")])
+def test_erro_estimado_cobre_o_erro_real(n, cond, estrutura):
+    M = gerar_matriz(n, cond, estrutura, 1)
+    A, B, C, D = blocos(M)
+    X = np.linalg.solve(A, B)
+    S = D - (C.astype(np.float32) @ X.astype(np.float32))
+    corrigir_diagonal_schur(S, C, D, X)
+    LU_S, piv_S, trocas_S = fatorar_lu_rapido(S)
+
+    erro_real = abs(slogdet_lu(LU_S, trocas_S)[1] - np.linalg.slogdet(D - C @ X)[1])
+    assert estimar_erro_misto(S, C, D, X, LU_S, piv_S) >= erro_real
+
+
+def test_diagonal_refeita_em_float64():
+    M = gerar_matriz(200, 10, "simetrica", 1)
+    A, B, C, D = blocos(M)
+    X = np.linalg.solve(A, B)
+    S = corrigir_diagonal_schur(D - (C.astype(np.float32) @ X.astype(np.float32)), C, D, X)
+    np.testing.assert_allclose(np.diag(S), np.diag(D - C @ X), rtol=1e-13, atol=1e-13)
+
+
+def test_aceita_matriz_bem_condicionada(comm):
+    M = gerar_matriz(1000, 10, "simetrica", 1)
+    resultado = determinante(M, comm, precisao="mista", logdet=True, estrutura=False, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["precisao"] == "mista"
+        assert resultado["erro_estimado"] <= 1e-6
+        conferir_slogdet(resultado, M, 1e-6)
+
+
+def test_recusa_antes_do_float32_com_A_mal_condicionada(comm):
+    M = gerar_matriz(600, 1e4, "densa", 1)  # κ₁(A) ~ 4e5
+    resultado = determinante(M, comm, precisao="mista", logdet=True, estrutura=False, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["precisao"] == "dupla (A mal condicionada)"
+        assert resultado["erro_estimado"] is None
+        conferir_slogdet(resultado, M)
+
+
+def test_recusa_pelo_erro_estimado(comm):
+    # κ₁(A) pequeno, mas tolerância abaixo do que float32 alcança: T é refeita em float64
+    M = gerar_matriz(400, 10, "simetrica", 1)
+    resultado = determinante(M, comm, precisao="mista", tolerancia_mista=1e-12, logdet=True, estrutura=False, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert resultado["precisao"] in ("dupla (mista rejeitada)", "dupla (A mal condicionada)")
+        conferir_slogdet(resultado, M)
+
+
+@pytest.mark.parametrize("dinamico", [False, True])
+def test_singular_e_lider_singular(comm, dinamico):
+    singular = determinante(matriz_singular(64, 3), comm, precisao="mista", dinamico=dinamico, logdet=True,
+                            estrutura=False, verbosidade=0)
+    M = matriz_lider_singular(64, 4)
+    pivotada = determinante(M, comm, precisao="mista", dinamico=dinamico, logdet=True, estrutura=False,
+                            tolerancia_mista=1e-3, verbosidade=0)
+    if comm.Get_rank() == 0:
+        assert singular["singular"]
+        assert pivotada["permutacao"]
+        conferir_slogdet(pivotada, M, 1e-3)
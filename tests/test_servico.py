@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from conftest import conferir_slogdet, matriz_aleatoria, matriz_lider_singular, matriz_singular
+from determinante_paralelo import determinante, parse_args
+from servico import enviar, parar, servir
+
+# (nome, M, opções do job): os jobs com erro ficam no meio para mostrar que o serviço continua depois deles
+JOBS = [
+    ("aleatoria", matriz_aleatoria(80, 1), {}),
+    ("invalida", np.ones((1, 1)), {}),
+    ("singular", matriz_singular(64, 2), {}),
+    ("opcao_proibida", matriz_aleatoria(8, 3), {"entrada": "outra.npy"}),
+    ("lider_singular", matriz_lider_singular(64, 4), {"pipeline": True, "bloco": 8}),
+    ("recursivo", matriz_aleatoria(70, 5), {"recursivo": True, "corte": 16}),
+]
+
+
+def cliente(endereco, respostas):
+    """Envia os jobs em sequência (thread do rank 0, sem MPI) e sempre termina pedindo a parada do serviço."""
+    try:
+        if endereco.startswith("unix:"):
+            while not os.path.exists(endereco[len("unix:"):]):
+                time.sleep(0.01)
+        for nome, M, opcoes in JOBS:
+            respostas[nome] = enviar(endereco, M, opcoes, tempo_limite=60)
+    finally:
+        parar(endereco)
+
+
+@pytest.mark.parametrize("tipo", ["socket", "spool"])
+def test_servico(comm, diretorio_comum, tipo):
+    endereco = f"unix:{diretorio_comum}/det.sock" if tipo == "socket" else f"{diretorio_comum}/spool"
+    opcoes = {**vars(parse_args([])), "logdet": True, "estrutura": False, "verbosidade": 0}
+
+    respostas = {}
+    thread = None
+    if comm.Get_rank() == 0:
+        thread = threading.Thread(target=cliente, args=(endereco, respostas), daemon=True)
+        thread.start()
+    servir(comm, endereco, determinante, opcoes)
+    if thread is None:
+        return
+    thread.join(timeout=60)
+
+    assert respostas.keys() == {nome for nome, _, _ in JOBS}
+    for nome, M, _ in JOBS:
+        resposta = respostas[nome]
+        if nome in ("invalida", "opcao_proibida"):
+            assert "erro" in resposta
+        elif nome == "singular":
+            assert resposta["singular"]
+        else:
+            conferir_slogdet(resposta, M, 1e-7)
+            assert resposta["processos"] == comm.Get_size()
+    assert respostas["lider_singular"]["modo"] == "pipeline" and respostas["lider_singular"]["permutacao"]
+    assert respostas["recursivo"]["modo"] == "recursivo"
+    if tipo == "socket":
+        assert not os.path.exists(endereco[len("unix:"):])
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from conftest import conferir_slogdet, matriz_aleatoria, matriz_lider_singular
+from sessao import Sessao
+
+N = 80
+
+
+def no_rank0(comm, valor):
+    return valor if comm.Get_rank() == 0 else None
+
+
+def test_cache_reaproveita_A_X_T(comm):
+    sessao = Sessao(comm, bloco=8)
+    M = matriz_aleatoria(N, 1)
+    n1 = N // 2
+    rng = np.random.default_rng(2)
+
+    esperado = [[], ["A", "X", "T"], ["A", "X"], ["A"]]
+    matrizes = [M.copy()]
+    M[n1:, n1:] += rng.standard_normal((N - n1, N - n1))  # só D muda
+    matrizes.append(M.copy())
+    M[n1:, :n1] += rng.standard_normal((N - n1, n1))  # C muda: T é refeita
+    matrizes.append(M.copy())
+    M[:n1, n1:] += rng.standard_normal((n1, N - n1))  # B muda: X e T são refeitas
+    matrizes.append(M.copy())
+
+    for reaproveitado, Mi in zip(esperado, matrizes):
+        resultado = sessao.determinante(no_rank0(comm, Mi))
+        if comm.Get_rank() == 0:
+            assert resultado["reaproveitado"] == reaproveitado
+            conferir_slogdet(resultado, Mi)
+
+
+def test_atualizacoes_de_posto_baixo(comm):
+    sessao = Sessao(comm, posto_maximo=6)
+    M = matriz_aleatoria(N, 3)
+    rng = np.random.default_rng(4)
+    sessao.determinante(no_rank0(comm, M))
+
+    # Posto acumulado 1, 3, 5 pelo lema; 7 > posto_maximo refatora
+    for k, modo in ((1, "lema"), (2, "lema"), (2, "lema"), (2, "refatorada"), (1, "lema")):
+        U, V = rng.standard_normal((N, k)), rng.standard_normal((N, k))
+        M = M + U @ V.T
+        resultado = sessao.atualizar(no_rank0(comm, U), no_rank0(comm, V))
+        if comm.Get_rank() == 0:
+            assert resultado["atualizacao"] == modo
+            conferir_slogdet(resultado, M, 1e-7)
+
+
+def test_substituir_linhas_e_colunas(comm):
+    sessao = Sessao(comm)
+    M = matriz_aleatoria(N, 5)
+    rng = np.random.default_rng(6)
+    sessao.determinante(no_rank0(comm, M))
+
+    indices = [3, N - 1]
+    linhas = rng.standard_normal((2, N))
+    M[indices] = linhas
+    resultado = sessao.substituir_linhas(no_rank0(comm, indices), no_rank0(comm, linhas))
+    if comm.Get_rank() == 0:
+        assert resultado["atualizacao"] == "lema"
+        conferir_slogdet(resultado, M, 1e-7)
+
+    coluna = rng.standard_normal(N)
+    M[:, 10] = coluna
+    resultado = sessao.substituir_colunas(no_rank0(comm, [10]), no_rank0(comm, coluna))
+    if comm.Get_rank() == 0:
+        conferir_slogdet(resultado, M, 1e-7)
+
+
+def test_bloco_lider_singular_sem_cache(comm):
+    sessao = Sessao(comm)
+    M = matriz_lider_singular(N, 7)
+    resultado = sessao.determinante(no_rank0(comm, M))
+    if comm.Get_rank() == 0:
+        assert resultado["reaproveitado"] == [] and resultado["permutacao"]
+        conferir_slogdet(resultado, M, 1e-7)
+
+    # Sem fatores em cache, a atualização refatora pelo caminho completo
+    U, V = np.eye(N)[:, :1], np.ones((N, 1))
+    resultado = sessao.atualizar(no_rank0(comm, U), no_rank0(comm, V))
+    if comm.Get_rank() == 0:
+        assert resultado["atualizacao"] == "refatorada"
+        conferir_slogdet(resultado, M + U @ V.T, 1e-7)
+
+
+def test_matriz_singular_e_correcao(comm):
+    sessao = Sessao(comm)
+    M = matriz_aleatoria(N, 8)
+    M[-1] = 0.0  # linha nula em C e D: S tem um pivô exatamente nulo
+    resultado = sessao.determinante(no_rank0(comm, M))
+    if comm.Get_rank() == 0:
+        assert resultado["singular"]
+
+    linha = np.random.default_rng(9).standard_normal((1, N))
+    M[-1] = linha
+    resultado = sessao.substituir_linhas(no_rank0(comm, [N - 1]), no_rank0(comm, linha))
+    if comm.Get_rank() == 0:
+        assert resultado["atualizacao"] == "refatorada"
+        conferir_slogdet(resultado, M, 1e-7)
+
+
+@pytest.mark.parametrize("chamada", [
+    lambda s: s.determinante(np.ones((1, 1))),
+    lambda s: s.atualizar(np.ones((N, 2)), np.ones((N, 3))),
+    lambda s: s.atualizar(np.ones((N + 1, 1)), np.ones((N + 1, 1))),
+    lambda s: s.substituir_linhas([0, 0], np.ones((2, N))),
+    lambda s: s.substituir_linhas([N], np.ones((1, N))),
+    lambda s: s.substituir_colunas([1, 2], np.ones((N, 1))),
+], ids=["N1", "formas_UV", "forma_U", "linhas_repetidas", "indice_fora", "colunas"])
+def test_entrada_invalida_nao_trava_os_trabalhadores(comm, chamada):
+    sessao = Sessao(comm)
+    M = matriz_aleatoria(N, 10)
+    sessao.determinante(no_rank0(comm, M))
+    if comm.Get_rank() == 0:
+        with pytest.raises(ValueError):
+            chamada(sessao)
+    else:
+        assert chamada(sessao) is None
+
+    # A sessão continua utilizável (e com os processos sincronizados) depois do erro
+    resultado = sessao.determinante(no_rank0(comm, M))
+    if comm.Get_rank() == 0:
+        assert resultado["reaproveitado"] == ["A", "X", "T"]
+        conferir_slogdet(resultado, M)
+
+
+def test_opcao_desconhecida(comm):
+    with pytest.raises(TypeError):
+        Sessao(comm, sem_estrutura=True)